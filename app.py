@@ -6,22 +6,73 @@ Flask REST API for file conversions
 import os
 import subprocess
 import shutil
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, Request, Response, request, jsonify, send_file, render_template, redirect, url_for, g
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import safe_join, secure_filename
 from datetime import datetime
-from pdf2image import convert_from_path
-from PIL import Image
+from PIL import Image, ImageOps
 import pdf2docx
+try:
+    import pymupdf  # installed alongside pdf2docx
+except ImportError:  # PyMuPDF < 1.24.3 only ships the fitz name
+    import fitz as pymupdf
+try:
+    import openpyxl
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:
+    openpyxl = None
+try:
+    import redis
+except ImportError:
+    redis = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+import html_render
+import pdf_tables
 import logging
+import gzip
+import copy
+import hashlib
+import html
+import itertools
+import json
+import math
+import mimetypes
+import mmap
+import multiprocessing
+import queue
+import re
+import signal
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import uuid
 import zipfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from pathlib import Path
 
 app = Flask(__name__)
 CORS(app)
 
 # Configure directories
-UPLOAD_FOLDER = 'uploads'
-OUTPUT_FOLDER = 'outputs'
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+OUTPUT_FOLDER = os.environ.get('OUTPUT_FOLDER', 'outputs')
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -34,7 +85,7 @@ logger = logging.getLogger(__name__)
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
     'docx', 'doc', 'xlsx', 'xls', 'pptx', 'ppt',
-    'jpg', 'jpeg', 'png', 'pdf', 'html', 'htm'
+    'jpg', 'jpeg', 'png', 'pdf', 'html', 'htm', 'zip'
 }
 
 def allowed_file(filename):
@@ -50,506 +101,3835 @@ def cleanup_files(*filepaths):
         except Exception as e:
             logger.warning(f"Could not delete {filepath}: {e}")
 
-# ==================== WORD → PDF ====================
-@app.route('/api/convert/word-to-pdf', methods=['POST'])
-def word_to_pdf():
-    """Convert Word document to PDF using LibreOffice"""
+# ==================== STORAGE ====================
+# Completed uploads, cached intermediates and conversion results are kept in
+# a storage backend under keys like 'results/<job>_<name>'. 'local' keeps
+# them under STORAGE_ROOT; 's3' uses a bucket on AWS or any S3-compatible
+# server (e.g. MinIO), so several instances share uploads, caches and
+# results, and downloads are served by the object store.
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+STORAGE_ROOT = os.environ.get('STORAGE_ROOT', 'storage')
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_PREFIX = os.environ.get('S3_PREFIX', '')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+S3_REGION = os.environ.get('S3_REGION') or None
+S3_PART_SIZE = int(os.environ.get('S3_PART_SIZE_MB', 16)) * 1024 * 1024
+S3_PRESIGN_SECONDS = int(os.environ.get('S3_PRESIGN_SECONDS', 3600))
+S3_REDIRECT_DOWNLOADS = os.environ.get('S3_REDIRECT_DOWNLOADS', '1') == '1'
+RESULT_TTL = int(os.environ.get('RESULT_TTL', 3600))
+RESULT_CACHE_CONTROL = os.environ.get('RESULT_CACHE_CONTROL', f'private, max-age={RESULT_TTL}')
+STORAGE_EXPIRY_INTERVAL = 60
+
+class LocalStorage:
+    """Storage on a local (or shared network) directory"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def save(self, key, local_path):
+        """Move a local file into storage, replacing any existing object atomically"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        shutil.move(local_path, staging_path)
+        os.replace(staging_path, path)
+
+    def load(self, key, dest_path):
+        """Make an object available at dest_path; raises FileNotFoundError if missing"""
+        path = self.path(key)
+        try:
+            os.link(path, dest_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(path, dest_path)
+
+    def size(self, key):
+        """Size of an object in bytes, or None if it does not exist"""
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return None
+
+    def touch(self, key):
+        """Mark an object as recently used so expiry keeps it"""
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def delete(self, key):
+        cleanup_files(self.path(key))
+
+    def expire(self, prefix, max_age):
+        """Delete objects under prefix not touched for max_age seconds"""
+        cutoff = time.time() - max_age
+        try:
+            entries = list(os.scandir(self.path(prefix)))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def send(self, key, download_name, etag=None):
+        """Response delivering an object as a download, honouring If-None-Match and Range"""
+        response = send_file(os.path.abspath(self.path(key)), as_attachment=True, download_name=download_name,
+                             etag=etag or True, conditional=True)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Cache-Control'] = RESULT_CACHE_CONTROL
+        return response
+
+class S3Storage:
+    """Storage in an S3-compatible bucket"""
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None):
+        if boto3 is None:
+            raise RuntimeError('STORAGE_BACKEND=s3 needs boto3 (pip install boto3)')
+        if not bucket:
+            raise RuntimeError('S3_BUCKET is required for STORAGE_BACKEND=s3')
+        self.bucket = bucket
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip('/') else ''
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        # Files above one part are sent as parallel multipart uploads
+        self.transfer = TransferConfig(multipart_threshold=S3_PART_SIZE, multipart_chunksize=S3_PART_SIZE)
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _missing(error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def save(self, key, local_path):
+        """Upload a local file, then remove it"""
+        content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        self.client.upload_file(local_path, self.bucket, self._key(key),
+                                ExtraArgs={'ContentType': content_type}, Config=self.transfer)
+        os.remove(local_path)
+
+    def load(self, key, dest_path):
+        """Download an object to dest_path; raises FileNotFoundError if missing"""
+        try:
+            self.client.download_file(self.bucket, self._key(key), dest_path, Config=self.transfer)
+        except ClientError as e:
+            if self._missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def size(self, key):
+        """Size of an object in bytes, or None if it does not exist"""
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))['ContentLength']
+        except ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+
+    def touch(self, key):
+        """Refresh an object's LastModified with an in-place copy so expiry keeps it"""
+        try:
+            self.client.copy_object(Bucket=self.bucket, Key=self._key(key), MetadataDirective='REPLACE',
+                                    CopySource={'Bucket': self.bucket, 'Key': self._key(key)})
+        except ClientError as e:
+            logger.warning(f"Could not touch {key}: {e}")
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def expire(self, prefix, max_age):
+        """Delete objects under prefix not touched for max_age seconds"""
+        cutoff = time.time() - max_age
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            stale = [{'Key': obj['Key']} for obj in page.get('Contents', [])
+                     if obj['LastModified'].timestamp() < cutoff]
+            if stale:
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': stale, 'Quiet': True})
+
+    def send(self, key, download_name, etag=None):
+        """
+        Redirect to a presigned URL, or stream the object through this server.
+
+        The object store answers Range and conditional requests on presigned
+        URLs itself; when streaming they are handled here.
+        """
+        disposition = f'attachment; filename="{download_name}"'
+        if S3_REDIRECT_DOWNLOADS:
+            url = self.client.generate_presigned_url('get_object', ExpiresIn=S3_PRESIGN_SECONDS, Params={
+                'Bucket': self.bucket,
+                'Key': self._key(key),
+                'ResponseContentDisposition': disposition,
+                'ResponseCacheControl': RESULT_CACHE_CONTROL
+            })
+            return redirect(url)
+
+        if etag and request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            params = {'Bucket': self.bucket, 'Key': self._key(key)}
+            if request.range and request.method in ('GET', 'HEAD'):
+                params['Range'] = request.headers['Range']
+            try:
+                obj = self.client.get_object(**params)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'InvalidRange':
+                    raise
+                response = jsonify({'error': 'Requested range not satisfiable'})
+                response.status_code = 416
+                return response
+            response = Response(obj['Body'].iter_chunks(STREAM_BLOCK_SIZE), mimetype=obj['ContentType'],
+                                direct_passthrough=True, status=206 if 'ContentRange' in obj else 200)
+            response.headers['Content-Length'] = str(obj['ContentLength'])
+            response.headers['Content-Disposition'] = disposition
+            response.headers['Accept-Ranges'] = 'bytes'
+            if 'ContentRange' in obj:
+                response.headers['Content-Range'] = obj['ContentRange']
+        if etag:
+            response.set_etag(etag)
+        response.headers['Cache-Control'] = RESULT_CACHE_CONTROL
+        return response
+
+def create_storage():
+    """Storage backend selected by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == 's3':
+        return S3Storage(S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_REGION)
+    if STORAGE_BACKEND != 'local':
+        raise RuntimeError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (use 'local' or 's3')")
+    return LocalStorage(STORAGE_ROOT)
+
+storage = create_storage()
+_last_expiry = 0.0
+_expiry_lock = threading.Lock()
+
+def expire_storage():
+    """Delete stale results, queued inputs, upload blobs and cached PDFs, at most once per interval"""
+    global _last_expiry
+    with _expiry_lock:
+        if time.time() - _last_expiry < STORAGE_EXPIRY_INTERVAL:
+            return
+        _last_expiry = time.time()
+    for prefix, max_age in (('results/', RESULT_TTL), ('jobs/', RESULT_TTL), ('inputs/', RESULT_TTL),
+                            ('blobs/', UPLOAD_SESSION_TTL), ('pdf-cache/', PDF_CACHE_TTL)):
+        try:
+            storage.expire(prefix, max_age)
+        except Exception as e:
+            logger.warning(f"Could not expire {prefix}: {e}")
+
+# ==================== INPUT VALIDATION ====================
+# Uploads are sniffed before any converter runs so that a misnamed or corrupt
+# file is rejected in milliseconds instead of burning a full soffice/gs run.
+
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+RTF_MAGIC = b'{\\rtf'
+# Directory entry name of the encrypted payload in password-protected OOXML
+OLE_ENCRYPTED_STREAM = 'EncryptedPackage'.encode('utf-16-le')
+
+# Container format expected for each allowed extension
+EXTENSION_FORMATS = {
+    'docx': 'ooxml', 'xlsx': 'ooxml', 'pptx': 'ooxml',
+    'doc': 'ole', 'xls': 'ole', 'ppt': 'ole',
+    'pdf': 'pdf',
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image',
+    'html': 'html', 'htm': 'html',
+    'zip': 'bundle'
+}
+
+# Limits on ZIP bundles (an HTML page and its assets, or PDFs to merge)
+BUNDLE_MAX_FILES = 1000
+BUNDLE_MAX_BYTES = int(os.environ.get('BUNDLE_MAX_MB', 500)) * 1024 * 1024
+
+# Part every OOXML package of the given type must contain
+OOXML_MAIN_PARTS = {
+    'docx': 'word/document.xml',
+    'xlsx': 'xl/workbook.xml',
+    'pptx': 'ppt/presentation.xml'
+}
+
+# Image formats the image converters accept (as reported by PIL)
+ALLOWED_IMAGE_FORMATS = {'JPEG', 'PNG'}
+# Pixel budget per image; PIL also refuses to decode beyond twice this
+IMAGE_MAX_PIXELS = int(float(os.environ.get('IMAGE_MAX_MEGAPIXELS', 200)) * 1000 * 1000)
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+# PNGs whose rows cannot be embedded as they are (transparency, 16-bit,
+# interlaced, EXIF orientation) are decoded whole at up to 4 bytes a pixel,
+# so they get a quarter of the budget
+IMAGE_DECODE_MAX_PIXELS = int(float(
+    os.environ.get('IMAGE_DECODE_MAX_MEGAPIXELS', IMAGE_MAX_PIXELS / 4 / 1e6)
+) * 1000 * 1000)
+
+class ValidationError(Exception):
+    """Raised when an upload's content does not match its declared type"""
+
+def _read_head_tail(path, size=4096):
+    """Read the first and last `size` bytes of a file"""
+    with open(path, 'rb') as f:
+        head = f.read(size)
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - size))
+        tail = f.read(size)
+    return head, tail
+
+def _sniff_pdf(path, head, tail, info):
+    """Check PDF header/trailer and collect page count and encryption"""
+    if PDF_MAGIC not in head[:1024]:
+        raise ValidationError('File is not a valid PDF (missing %PDF header)')
+
+    # The trailer can sit before trailing padding or garbage that MuPDF
+    # skips, so a missing one only explains a PDF MuPDF cannot open
+    try:
+        with pymupdf.open(path) as doc:
+            info['encrypted'] = bool(doc.is_encrypted)
+            if doc.needs_pass:
+                raise ValidationError('Password-protected PDFs are not supported')
+            info['pages'] = doc.page_count
+    except ValidationError:
+        raise
+    except Exception as e:
+        if b'%%EOF' not in tail or b'startxref' not in tail:
+            raise ValidationError('PDF appears truncated or corrupt (missing xref trailer)')
+        raise ValidationError(f'PDF could not be parsed: {e}')
+
+    if not info['pages']:
+        raise ValidationError('PDF contains no pages')
+
+def _ole_is_encrypted(path):
+    """Check an OLE compound file for an encrypted OOXML package stream"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        return m.find(OLE_ENCRYPTED_STREAM) != -1
+
+def _sniff_ooxml(path, ext, head, info):
+    """Check an OOXML (docx/xlsx/pptx) ZIP container"""
+    if head.startswith(OLE_MAGIC):
+        # Encrypted OOXML documents are wrapped in an OLE compound file;
+        # an unencrypted one is just a legacy document with the wrong name
+        if _ole_is_encrypted(path):
+            info['encrypted'] = True
+            raise ValidationError('Password-protected Office documents are not supported')
+        info['format'] = 'ole'
+        return
+    if not head.startswith(ZIP_MAGIC):
+        raise ValidationError(f'File is not a valid .{ext} document')
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            names = set(zf.namelist())
+            if '[Content_Types].xml' not in names or OOXML_MAIN_PARTS[ext] not in names:
+                raise ValidationError(f'File is not a valid .{ext} document')
+
+            # Page/slide/sheet counts are cheap to read and useful as cost hints
+            if ext == 'xlsx':
+                info['pages'] = len(re.findall(rb'<sheet\b', zf.read('xl/workbook.xml')))
+            elif 'docProps/app.xml' in names:
+                tag = b'Slides' if ext == 'pptx' else b'Pages'
+                match = re.search(rb'<' + tag + rb'>(\d+)</' + tag + rb'>', zf.read('docProps/app.xml'))
+                if match:
+                    info['pages'] = int(match.group(1))
+    except zipfile.BadZipFile:
+        raise ValidationError(f'File is not a valid .{ext} document (corrupt ZIP container)')
+
+def bundle_index(names):
+    """HTML entry point of a bundle: the index.html nearest the root, else its only HTML file"""
+    pages = [name for name in names if name.lower().endswith(('.html', '.htm'))]
+    indexes = [name for name in pages if os.path.basename(name).lower() in ('index.html', 'index.htm')]
+    if indexes:
+        return min(indexes, key=lambda name: (name.count('/'), name))
+    return pages[0] if len(pages) == 1 else None
+
+def _sniff_bundle(path, head, info):
+    """Check a ZIP bundle's container and unpacked size; converters check its contents"""
+    if not head.startswith(ZIP_MAGIC):
+        raise ValidationError('File is not a valid ZIP bundle')
+    try:
+        with zipfile.ZipFile(path) as bundle:
+            members = [member for member in bundle.infolist() if not member.is_dir()]
+    except zipfile.BadZipFile:
+        raise ValidationError('File is not a valid ZIP bundle (corrupt ZIP container)')
+    if len(members) > BUNDLE_MAX_FILES:
+        raise ValidationError(f'Bundle has more than {BUNDLE_MAX_FILES} files')
+    if sum(member.file_size for member in members) > BUNDLE_MAX_BYTES:
+        raise ValidationError(f'Bundle unpacks to more than {BUNDLE_MAX_BYTES // (1024 * 1024)} MB')
+
+def _sniff_image(path, info):
+    """Read image headers without decoding pixel data"""
+    try:
+        with Image.open(path) as img:
+            if img.format not in ALLOWED_IMAGE_FORMATS:
+                raise ValidationError(f'Unsupported image format: {img.format}')
+            info['width'], info['height'] = img.size
+            info['pixels'] = img.size[0] * img.size[1]
+            info['pages'] = 1
+        if info['pixels'] > IMAGE_MAX_PIXELS:
+            raise ValidationError(f"Image is too large ({info['pixels'] / 1e6:.0f} megapixels, "
+                                  f"limit {IMAGE_MAX_PIXELS / 1e6:.0f})")
+        if info['pixels'] > IMAGE_DECODE_MAX_PIXELS and img.format == 'PNG' and png_layout(path) is None:
+            raise ValidationError(f"Image is too large ({info['pixels'] / 1e6:.0f} megapixels, limit "
+                                  f"{IMAGE_DECODE_MAX_PIXELS / 1e6:.0f} for transparent, 16-bit or interlaced PNGs)")
+    except ValidationError:
+        raise
+    except Image.DecompressionBombError:
+        raise ValidationError('Image dimensions are too large')
+    except Exception:
+        raise ValidationError('File is not a valid JPG or PNG image')
+
+def sniff_file(path, filename):
+    """
+    Inspect an uploaded file's content and return cost hints for it.
+
+    Raises ValidationError when the bytes do not match the extension, the
+    container is corrupt or the document is password protected.
+    """
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    expected = EXTENSION_FORMATS.get(ext)
+    if expected is None:
+        raise ValidationError('Invalid file type')
+
+    info = {
+        'format': expected,
+        'extension': ext,
+        'size': os.path.getsize(path),
+        'pages': None,
+        'encrypted': False
+    }
+    if info['size'] == 0:
+        raise ValidationError('File is empty')
+
+    head, tail = _read_head_tail(path)
+
+    if expected == 'pdf':
+        _sniff_pdf(path, head, tail, info)
+    elif expected == 'ooxml':
+        _sniff_ooxml(path, ext, head, info)
+    elif expected == 'ole':
+        # LibreOffice also opens RTF and OOXML saved under a legacy extension
+        if not head.startswith((OLE_MAGIC, ZIP_MAGIC, RTF_MAGIC)):
+            raise ValidationError(f'File is not a valid .{ext} document')
+    elif expected == 'image':
+        _sniff_image(path, info)
+    elif expected == 'html':
+        if b'\x00' in head:
+            raise ValidationError('File is not a valid HTML document')
+    elif expected == 'bundle':
+        _sniff_bundle(path, head, info)
+
+    return info
+
+def validate_upload(input_path, filename):
+    """Sniff a saved upload, returning (info, error_response)"""
+    try:
+        return sniff_file(input_path, filename), None
+    except ValidationError as e:
+        cleanup_files(input_path)
+        return None, (jsonify({'error': str(e)}), 400)
+
+# ==================== UPLOAD LIMITS ====================
+# Request bodies are capped while they stream in: MAX_UPLOAD_MB for every
+# request, lower per-kind limits (UPLOAD_LIMITS_MB, e.g.
+# "jpg-to-pdf=25,html-to-pdf=5") for conversions. Oversized bodies are
+# refused with 413 before they reach disk when Content-Length is known,
+# and as soon as the limit is crossed otherwise. Uploaded files are spooled
+# in memory up to UPLOAD_SPOOL_MEMORY_MB, then in UPLOAD_SPOOL_DIR (point it
+# at a tmpfs such as /dev/shm to keep spooling off the disk).
+
+MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', 200))
+UPLOAD_SPOOL_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MEMORY_MB', 2)) * 1024 * 1024
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+# Room for multipart boundaries and form fields around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+# Largest non-file form field, e.g. raw HTML sent to html-to-pdf
+FORM_FIELD_MAX_BYTES = int(os.environ.get('FORM_FIELD_MAX_MB', 10)) * 1024 * 1024
+
+def _parse_upload_limits(value):
+    """Parse "kind=MB,kind=MB" into {kind: MB}"""
+    limits = {}
+    for item in value.split(','):
+        if item.strip():
+            kind, _, megabytes = item.partition('=')
+            limits[kind.strip()] = int(megabytes)
+    return limits
+
+UPLOAD_LIMITS_MB = _parse_upload_limits(os.environ.get('UPLOAD_LIMITS_MB', ''))
+
+def upload_limit_mb(kind):
+    """Largest upload in MB accepted for a conversion kind"""
+    limit = UPLOAD_LIMITS_MB.get(kind, CONVERTERS[kind].get('max_upload_mb', MAX_UPLOAD_MB))
+    return min(limit, MAX_UPLOAD_MB)
+
+def upload_limits(kind):
+    """What a client may upload for a conversion kind, advertised to the web UI"""
+    converter = CONVERTERS[kind]
+    limits = {'max_upload_mb': upload_limit_mb(kind), 'extensions': list(converter['extensions'])}
+    if 'client_image' in converter:
+        limits['image'] = converter['client_image']
+    return limits
+
+@app.route('/api/limits', methods=['GET'])
+def limits():
+    """Upload limits of every conversion, so clients can check or shrink files first"""
+    return jsonify({
+        'max_upload_mb': MAX_UPLOAD_MB,
+        'rate_limit': {
+            'burst': RATE_LIMIT_BURST,
+            'per_minute': RATE_LIMIT_PER_MINUTE,
+            'daily_quota': DAILY_QUOTA
+        },
+        'converters': {kind: upload_limits(kind) for kind in CONVERTERS}
+    })
+
+def upload_too_large(limit_mb):
+    return jsonify({'error': f'File too large (maximum {limit_mb} MB)', 'max_mb': limit_mb}), 413
+
+class UploadRequest(Request):
+    """Request with a per-route body limit and memory-then-disk spooling of file parts"""
+
+    body_limit = None
+    # Text fields are kept in memory; this allows inline documents (raw HTML)
+    max_form_memory_size = FORM_FIELD_MAX_BYTES
+
+    @property
+    def max_content_length(self):
+        if self.body_limit is not None:
+            return self.body_limit
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MEMORY, dir=UPLOAD_SPOOL_DIR)
+
+def limit_request_body(limit_mb):
+    """Cap the current request body before it is read"""
+    request.body_limit = limit_mb * 1024 * 1024 + FORM_OVERHEAD_BYTES
+
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024 + FORM_OVERHEAD_BYTES
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """JSON 413 for bodies over the limit outside the conversion routes"""
+    return upload_too_large(MAX_UPLOAD_MB)
+
+# ==================== SCHEDULER ====================
+# Conversions are admitted through a cost-aware scheduler so that one huge
+# job cannot starve a queue of small ones. Cheap jobs run on the fast lane,
+# expensive ones on the bulk lane, each with its own concurrency budget.
+
+FAST_LANE_WORKERS = int(os.environ.get('FAST_LANE_WORKERS', 2))
+BULK_LANE_WORKERS = int(os.environ.get('BULK_LANE_WORKERS', 1))
+FAST_LANE_MAX_COST = float(os.environ.get('FAST_LANE_MAX_COST', 20))
+# Every SCHEDULER_AGING_SECONDS spent waiting halves, thirds, ... a job's priority cost
+SCHEDULER_AGING_SECONDS = float(os.environ.get('SCHEDULER_AGING_SECONDS', 30))
+SCHEDULER_QUEUE_TIMEOUT = float(os.environ.get('SCHEDULER_QUEUE_TIMEOUT', 300))
+SCHEDULER_FAIR_CLIENTS = os.environ.get('SCHEDULER_FAIR_CLIENTS', '1') == '1'
+
+# Used when the sniffer cannot tell the page count (legacy Office, HTML)
+BYTES_PER_PAGE_ESTIMATE = 50 * 1024
+# Images above this many pixels cost proportionally more than one page
+PIXELS_PER_PAGE_ESTIMATE = 12_000_000
+COST_PER_MB = 0.5
+
+class SchedulerBusy(Exception):
+    """Raised when a job waits longer than the queue timeout for a slot"""
+
+class ConversionScheduler:
+    """
+    Two-lane admission control for conversions.
+
+    Within a lane the cheapest waiting job runs first. Waiting lowers a job's
+    effective cost (aging) so expensive jobs still make progress, and with
+    per-client fairness each job a client already has running raises the
+    cost of that client's queued jobs.
+    """
+
+    def __init__(self, fast_workers, bulk_workers, fast_max_cost,
+                 aging_seconds, fair_clients=True, queue_timeout=None):
+        self.fast_max_cost = fast_max_cost
+        self.aging_seconds = aging_seconds
+        self.fair_clients = fair_clients
+        self.queue_timeout = queue_timeout
+        self.lanes = {
+            'fast': {'workers': fast_workers, 'running': 0, 'waiting': [], 'completed': 0},
+            'bulk': {'workers': bulk_workers, 'running': 0, 'waiting': [], 'completed': 0}
+        }
+        self._client_running = Counter()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+
+    def lane_for(self, cost):
+        """Pick the lane a job of the given cost runs on"""
+        return 'fast' if cost <= self.fast_max_cost else 'bulk'
+
+    def _priority(self, ticket, now):
+        cost = ticket['cost']
+        if self.fair_clients:
+            cost *= 1 + self._client_running[ticket['client']]
+        waited = now - ticket['enqueued']
+        return cost / (1 + waited / self.aging_seconds), ticket['seq']
+
+    def _is_next(self, lane, ticket):
+        if lane['running'] >= lane['workers']:
+            return False
+        now = time.monotonic()
+        return min(lane['waiting'], key=lambda t: self._priority(t, now)) is ticket
+
+    @contextmanager
+    def slot(self, cost, client=None, cancelled=None):
+        """
+        Block until the job may run, then hold a lane slot while it does.
+
+        `cancelled` is polled while waiting; when it returns True the job
+        leaves the queue with ConversionCancelled.
+        """
+        lane_name = self.lane_for(cost)
+        lane = self.lanes[lane_name]
+        ticket = {
+            'cost': cost,
+            'client': client,
+            'enqueued': time.monotonic(),
+            'seq': next(self._sequence)
+        }
+        deadline = ticket['enqueued'] + self.queue_timeout if self.queue_timeout else None
+
+        with self._cond:
+            lane['waiting'].append(ticket)
+            try:
+                while not self._is_next(lane, ticket):
+                    remaining = deadline - time.monotonic() if deadline else None
+                    if remaining is not None and remaining <= 0:
+                        raise SchedulerBusy('Server is busy, please try again later')
+                    if cancelled and cancelled():
+                        raise ConversionCancelled('Conversion cancelled')
+                    self._cond.wait(min(remaining, 1.0) if remaining is not None else 1.0)
+            finally:
+                lane['waiting'].remove(ticket)
+                # Let the next queued job re-check (capacity or order changed)
+                self._cond.notify_all()
+            lane['running'] += 1
+            self._client_running[client] += 1
+
+        try:
+            yield lane_name
+        finally:
+            with self._cond:
+                lane['running'] -= 1
+                lane['completed'] += 1
+                self._client_running[client] -= 1
+                if self._client_running[client] <= 0:
+                    del self._client_running[client]
+                self._cond.notify_all()
+
+    def stats(self):
+        """Snapshot of lane occupancy"""
+        with self._cond:
+            return {
+                name: {
+                    'workers': lane['workers'],
+                    'running': lane['running'],
+                    'waiting': len(lane['waiting']),
+                    'completed': lane['completed']
+                }
+                for name, lane in self.lanes.items()
+            }
+
+scheduler = ConversionScheduler(
+    FAST_LANE_WORKERS, BULK_LANE_WORKERS, FAST_LANE_MAX_COST,
+    SCHEDULER_AGING_SECONDS, SCHEDULER_FAIR_CLIENTS, SCHEDULER_QUEUE_TIMEOUT
+)
+
+def estimate_cost(kind, input_info):
+    """Estimate the relative cost of a conversion from its sniffed input"""
+    pages = input_info.get('pages') or max(1, input_info['size'] // BYTES_PER_PAGE_ESTIMATE)
+    cost = CONVERTERS[kind]['cost_per_page'] * pages
+    if input_info.get('pixels'):
+        cost *= max(1.0, input_info['pixels'] / PIXELS_PER_PAGE_ESTIMATE)
+    return cost + input_info['size'] / (1024 * 1024) * COST_PER_MB
+
+def client_key():
+    """Identify the requesting client for per-client fairness"""
+    return request.headers.get('X-API-Key') or request.remote_addr
+
+# ==================== RATE LIMITING ====================
+# Each client has a token bucket measured in conversion cost (pages times
+# the converter's cost per page, as estimated for the scheduler), not in
+# requests. The bucket holds RATE_LIMIT_BURST and refills at
+# RATE_LIMIT_PER_MINUTE; DAILY_QUOTA caps the cost one client may use per
+# UTC day. Clients are API keys listed in RATE_LIMIT_API_KEYS, otherwise IP
+# addresses (an unlisted key would let a client pick a fresh bucket).
+# State lives in this process, or with RATE_LIMIT_BACKEND=sqlite in a file
+# every process on the host shares. Conversion responses carry
+# RateLimit-Limit/-Remaining/-Reset for whichever limit is closer to
+# running out; refused requests get 429 with Retry-After.
+
+RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', 300))
+# 0 turns the bucket off
+RATE_LIMIT_PER_MINUTE = float(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))
+# 0 means no daily quota
+DAILY_QUOTA = float(os.environ.get('DAILY_QUOTA', 0))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', 'ratelimit.sqlite3')
+RATE_LIMIT_API_KEYS = {key.strip() for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(',') if key.strip()}
+# Forget clients whose state is back to a fresh one every this many requests
+RATE_LIMIT_PRUNE_EVERY = 1000
+SECONDS_PER_DAY = 24 * 3600
+
+class RateLimited(Exception):
+    """Raised when a client is out of tokens or over its daily quota"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class MemoryRateLimitStore:
+    """Rate limit state in this process"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, func):
+        """Atomically replace a client's state with func(state) -> (state, result)"""
+        with self._lock:
+            state, result = func(self._states.get(key))
+            self._states[key] = state
+            return result
+
+    def prune(self, now):
+        with self._lock:
+            for key in [key for key, state in self._states.items() if state['expires'] <= now]:
+                del self._states[key]
+
+class SQLiteRateLimitStore:
+    """Rate limit state in a SQLite database shared by the processes on one host"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._transaction() as db:
+            db.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                expires REAL NOT NULL,
+                state TEXT NOT NULL
+            )''')
+
+    @contextmanager
+    def _transaction(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('BEGIN IMMEDIATE')
+            yield db
+            db.execute('COMMIT')
+        except BaseException:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+    def update(self, key, func):
+        with self._transaction() as db:
+            row = db.execute('SELECT state FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            state, result = func(json.loads(row[0]) if row else None)
+            db.execute('INSERT OR REPLACE INTO rate_limits (key, expires, state) VALUES (?, ?, ?)',
+                       (key, state['expires'], json.dumps(state)))
+            return result
+
+    def prune(self, now):
+        with self._transaction() as db:
+            db.execute('DELETE FROM rate_limits WHERE expires <= ?', (now,))
+
+class TokenBucketLimiter:
+    """Cost-weighted token buckets and daily quotas per client"""
+
+    def __init__(self, store, burst, per_minute, daily_quota):
+        self.store = store
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.daily_quota = daily_quota
+        self._requests = itertools.count(1)
+
+    @property
+    def enabled(self):
+        return self.rate > 0 or self.daily_quota > 0
+
+    def _take(self, state, cost, now):
+        """Refill, then charge `cost` if the bucket and quota allow it; cost 0 only checks"""
+        today = int(now // SECONDS_PER_DAY)
+        if state is None:
+            state = {'tokens': self.burst, 'updated': now, 'day': today, 'used': 0.0}
+        tokens = min(self.burst, state['tokens'] + (now - state['updated']) * self.rate)
+        used = state['used'] if state['day'] == today else 0.0
+        day_left = (today + 1) * SECONDS_PER_DAY - now
+        # A job bigger than the burst needs a full bucket rather than never running
+        charge = min(cost, self.burst)
+
+        decision = {'allowed': True}
+        if self.daily_quota and (used + cost > self.daily_quota if cost else used >= self.daily_quota):
+            decision = {'allowed': False, 'error': 'Daily conversion quota exceeded', 'retry_after': day_left}
+        elif self.rate and tokens < (charge or 1):
+            decision = {'allowed': False, 'error': 'Too many conversions, please slow down',
+                        'retry_after': ((charge or 1) - tokens) / self.rate}
+        else:
+            if self.rate:
+                tokens -= charge
+            used += cost
+
+        # Report the policy with the least left, as RateLimit headers expect
+        policies = []
+        if self.rate:
+            policies.append((tokens, self.burst, (self.burst - tokens) / self.rate))
+        if self.daily_quota:
+            policies.append((self.daily_quota - used, self.daily_quota, day_left))
+        decision['remaining'], decision['limit'], decision['reset'] = min(policies)
+
+        # From `expires` on the state equals a fresh one and can be dropped
+        full_at = now + (self.burst - tokens) / self.rate if self.rate else now
+        expires = max(full_at, (today + 1) * SECONDS_PER_DAY if self.daily_quota and used else now)
+        return {'tokens': tokens, 'updated': now, 'day': today, 'used': used, 'expires': expires}, decision
+
+    def acquire(self, key, cost=0):
+        """Charge a client `cost` and return the decision with its header values"""
+        now = time.time()
+        if next(self._requests) % RATE_LIMIT_PRUNE_EVERY == 0:
+            self.store.prune(now)
+        return self.store.update(key, lambda state: self._take(state, cost, now))
+
+def create_rate_limit_store():
+    """Rate limit state store selected by RATE_LIMIT_BACKEND"""
+    if RATE_LIMIT_BACKEND == 'memory':
+        return MemoryRateLimitStore()
+    if RATE_LIMIT_BACKEND == 'sqlite':
+        return SQLiteRateLimitStore(RATE_LIMIT_DB)
+    raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND '{RATE_LIMIT_BACKEND}' (use 'memory' or 'sqlite')")
+
+rate_limiter = TokenBucketLimiter(create_rate_limit_store(), RATE_LIMIT_BURST, RATE_LIMIT_PER_MINUTE, DAILY_QUOTA)
+
+def rate_limit_key():
+    """Identify the requesting client for rate limiting: a known API key, else the IP address"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key in RATE_LIMIT_API_KEYS:
+        return 'key:' + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return f'ip:{request.remote_addr}'
+
+def rate_limit(cost=0):
+    """Charge the requesting client `cost` (0 only checks it has anything left), raising RateLimited"""
+    if not rate_limiter.enabled:
+        return
+    decision = rate_limiter.acquire(rate_limit_key(), cost)
+    g.rate_limit = decision
+    if not decision['allowed']:
+        raise RateLimited(decision['error'], math.ceil(decision['retry_after']))
+
+@app.after_request
+def add_rate_limit_headers(response):
+    """Send the client's rate limit state with responses that were charged or refused"""
+    decision = g.get('rate_limit')
+    if decision:
+        response.headers['RateLimit-Limit'] = str(math.floor(decision['limit']))
+        response.headers['RateLimit-Remaining'] = str(max(0, math.floor(decision['remaining'])))
+        response.headers['RateLimit-Reset'] = str(math.ceil(decision['reset']))
+    return response
+
+# ==================== REQUEST COALESCING ====================
+# Identical conversions requested at the same time (same content, kind and
+# options) run once: the first request converts and the others wait for it
+# and are sent the same stored result.
+
+COALESCE_REQUESTS = os.environ.get('COALESCE_REQUESTS', '1') == '1'
+
+class SingleFlight:
+    """Share the outcome of an in-flight call with concurrent callers of the same key"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, func, cancelled=None):
+        """
+        Call func, or wait for the call already running under key.
+
+        Returns (result, shared). A waiter stops with ConversionCancelled when
+        `cancelled` returns True; if the running call was itself cancelled,
+        a waiter runs func instead. While waiting, the caller's job reports
+        the running call's progress.
+        """
+        job = current_job.get()
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = {
+                        'done': threading.Event(), 'result': None, 'error': None, 'job': job
+                    }
+
+            if leader:
+                try:
+                    flight['result'] = func()
+                    return flight['result'], False
+                except BaseException as e:
+                    flight['error'] = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+                    flight['done'].set()
+
+            if job is not None:
+                job.leader = flight['job']
+            try:
+                while not flight['done'].wait(POLL_INTERVAL):
+                    if cancelled and cancelled():
+                        raise ConversionCancelled('Conversion cancelled')
+            finally:
+                if job is not None:
+                    job.leader = None
+            if isinstance(flight['error'], ConversionCancelled):
+                continue
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['result'], True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+flights = SingleFlight()
+
+def conversion_key(kind, input_path, options, sha256=None):
+    """Key identifying conversions that produce the same output"""
+    digest = sha256 or file_sha256(input_path)
+    return f"{kind}:{digest}:{json.dumps(options, sort_keys=True)}"
+
+def result_etag(key):
+    """Strong ETag for the result of a conversion key (without quotes)"""
+    return hashlib.sha256(key.encode()).hexdigest()[:40]
+
+# ==================== PROCESS CONTROL ====================
+# Converter subprocesses run in their own process group under memory and
+# CPU-time limits, so a timeout or cancellation kills the whole tree
+# (including LibreOffice's soffice.bin child), not just the direct child.
+# The memory limit is on resident memory, summed over the group and checked
+# while the command runs (Linux /proc). An address-space limit (ulimit -v)
+# would break LibreOffice, which reserves far more than it ever touches.
+# A spike shorter than POLL_INTERVAL can pass unnoticed.
+
+CONVERSION_TIMEOUT = int(os.environ.get('CONVERSION_TIMEOUT', 60))
+CONVERTER_MEMORY_LIMIT_MB = int(os.environ.get('CONVERTER_MEMORY_LIMIT_MB', 3072))
+CONVERTER_CPU_LIMIT_SECONDS = int(os.environ.get('CONVERTER_CPU_LIMIT_SECONDS', 120))
+# Each concurrent soffice gets its own reusable profile so a killed run
+# cannot leave a lock behind that blocks every later conversion
+SOFFICE_PROFILE_ROOT = os.environ.get(
+    'SOFFICE_PROFILE_ROOT', os.path.join(tempfile.gettempdir(), 'filecnvt-soffice')
+)
+# Prebuilt profile (`python filecnvt.py build-soffice-profile`) copied into
+# each pooled profile at startup, so no soffice builds its profile on first
+# use; empty to let LibreOffice build them
+SOFFICE_PROFILE_TEMPLATE = os.environ.get(
+    'SOFFICE_PROFILE_TEMPLATE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'soffice-profile')
+)
+SOFFICE_TEMPLATE_MARKER = 'filecnvt-template.json'
+# Parts of a profile that only matter to the soffice run that wrote them
+SOFFICE_VOLATILE_PATHS = ('.lock', 'user/temp', 'user/backup', 'user/crash', 'user/extensions/tmp')
+KILL_GRACE_SECONDS = 2
+KILL_POLL_INTERVAL = 0.05
+POLL_INTERVAL = 0.25
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# Worker processes write a job's progress to the queue at most this often
+PROGRESS_PUBLISH_INTERVAL = float(os.environ.get('PROGRESS_PUBLISH_INTERVAL', 1))
+
+class ConversionCancelled(Exception):
+    """Raised when a job is cancelled or its client disconnects"""
+
+class JobContext:
+    """Cancellation state and progress of one conversion"""
+
+    def __init__(self, job_id, client_socket=None, publish=None):
+        self.job_id = job_id
+        self.cancel_event = threading.Event()
+        self._socket = client_socket
+        self._progress = {'phase': 'starting', 'done': None, 'total': None, 'eta': None}
+        self._phase_started = time.time()
+        self._published = 0
+        # Called with the progress dict, throttled (worker mode)
+        self.publish = publish
+        # Job whose progress this one reports (coalesced requests)
+        self.leader = None
+
+    def report(self, phase, done=None, total=None):
+        """Record the current phase and, for page loops, how far it got"""
+        now = time.time()
+        changed = phase != self._progress['phase']
+        if changed:
+            self._phase_started = now
+        eta = None
+        if done and total:
+            eta = round((now - self._phase_started) / done * (total - done), 1)
+        self._progress = {'phase': phase, 'done': done, 'total': total, 'eta': eta}
+        if self.publish and (changed or done == total or now - self._published >= PROGRESS_PUBLISH_INTERVAL):
+            self._published = now
+            try:
+                self.publish(dict(self._progress))
+            except Exception as e:
+                logger.warning(f"Could not publish progress of job {self.job_id}: {e}")
+
+    def mirror(self, progress):
+        """Take over progress reported by the queue worker running this job"""
+        self._progress = dict(progress)
+
+    def progress(self):
+        leader = self.leader
+        return leader.progress() if leader is not None else dict(self._progress)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def client_gone(self):
+        """Peek at the client socket; an orderly EOF means it went away"""
+        if self._socket is None:
+            return False
+        try:
+            return self._socket.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except (OSError, ValueError, AttributeError):
+            return True
+
+    def is_cancelled(self):
+        if not self.cancel_event.is_set() and self.client_gone():
+            logger.info(f"Client for job {self.job_id} disconnected, cancelling")
+            self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Raise ConversionCancelled if the job should stop"""
+        if self.is_cancelled():
+            raise ConversionCancelled('Conversion cancelled')
+
+# Job of the conversion running in the current thread
+current_job = ContextVar('current_job', default=None)
+
+# Jobs that can be cancelled through DELETE /api/jobs/<job_id>
+active_jobs = {}
+active_jobs_lock = threading.Lock()
+
+def check_cancelled():
+    """Cooperative cancellation point for in-process converters"""
+    job = current_job.get()
+    if job:
+        job.check()
+
+def report_progress(phase, done=None, total=None):
+    """Progress point for converters: the phase, and pages done out of total"""
+    job = current_job.get()
+    if job:
+        job.report(phase, done, total)
+
+def _limited_command(cmd):
+    """Wrap a command so it runs under the configured rlimits (POSIX only)"""
+    if os.name == 'nt':
+        return cmd
+    if CONVERTER_CPU_LIMIT_SECONDS <= 0:
+        return cmd
+    # ulimit in a shell applies the limit before exec, without preexec_fn
+    return ['/bin/sh', '-c', f'ulimit -t {CONVERTER_CPU_LIMIT_SECONDS}; exec "$0" "$@"', *cmd]
+
+def _group_rss(pgid):
+    """Resident memory in bytes of every process in a process group, or None without /proc"""
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    total = 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                # Fields after the command name: state, ppid, pgrp, ... rss
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * PAGE_SIZE
+    return total
+
+def _kill_tree(proc):
+    """Terminate a converter and every process in its group"""
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], capture_output=True)
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    # The leader may have exited already; the rest of its group still gets
+    # the grace period to shut down before SIGKILL
+    deadline = time.monotonic() + KILL_GRACE_SECONDS
+    try:
+        proc.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        pass
+    while time.monotonic() < deadline:
+        try:
+            os.killpg(proc.pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(KILL_POLL_INTERVAL)
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        return
+    try:
+        proc.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        pass
+
+def run_command(cmd, timeout=CONVERSION_TIMEOUT):
+    """
+    Run a converter command in its own process group under resource limits.
+
+    Returns a CompletedProcess like subprocess.run. The whole process tree is
+    killed on timeout (raising subprocess.TimeoutExpired), when the current
+    job is cancelled (raising ConversionCancelled) or when it goes over the
+    memory limit (raising ConversionError).
+    """
+    job = current_job.get()
+    memory_limit = CONVERTER_MEMORY_LIMIT_MB * 1024 * 1024 if os.name != 'nt' else 0
+    if os.name == 'nt':
+        group_kwargs = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_kwargs = {'start_new_session': True}
+
+    # Output goes to files, not pipes: a daemon the command leaves behind
+    # (soffice.bin) would hold a pipe open and block reading until it exits
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(_limited_command(cmd), stdout=out, stderr=err, **group_kwargs)
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    proc.wait(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if job:
+                    job.check()
+                if time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if memory_limit > 0 and (_group_rss(proc.pid) or 0) > memory_limit:
+                    raise ConversionError(
+                        f'Conversion failed: {os.path.basename(cmd[0])} used more than '
+                        f'{CONVERTER_MEMORY_LIMIT_MB} MB of memory'
+                    )
+        finally:
+            # Reap anything the command left running in its group
+            _kill_tree(proc)
+
+        out.seek(0)
+        err.seek(0)
+        stdout = out.read().decode(errors='replace')
+        stderr = err.read().decode(errors='replace')
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+def wait_for_future(future, name, timeout=CONVERSION_TIMEOUT):
+    """
+    Wait for a process pool task like run_command waits for a command:
+    checking for cancellation while it runs and raising
+    subprocess.TimeoutExpired once `timeout` has passed.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return future.result(timeout=POLL_INTERVAL)
+        except FutureTimeoutError:
+            check_cancelled()
+            if time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(name, timeout)
+
+def _read_marker(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def install_soffice_profile(profile_dir, template=None):
+    """
+    Copy the profile template into profile_dir unless it already holds this
+    build of it. Returns False when there is no template to install.
+    """
+    template = SOFFICE_PROFILE_TEMPLATE if template is None else template
+    marker = _read_marker(os.path.join(template, SOFFICE_TEMPLATE_MARKER)) if template else None
+    if marker is None:
+        return False
+    if _read_marker(os.path.join(profile_dir, SOFFICE_TEMPLATE_MARKER)) == marker:
+        return True
+    # Copied beside the slot and swapped in, so processes sharing the root never see half a profile
+    staging = f'{profile_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.copytree(template, staging, symlinks=True)
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    try:
+        os.rename(staging, profile_dir)
+    except OSError:
+        # Another process installed it first
+        shutil.rmtree(staging, ignore_errors=True)
+    return True
+
+def build_soffice_profile(template_dir=None):
+    """
+    Build the LibreOffice profile template and the system font caches.
+
+    Runs soffice once on a Writer and a Calc document with a fresh profile,
+    drops the run's locks and temp files and stamps the result. Meant for
+    image builds: `python filecnvt.py build-soffice-profile`.
+    """
+    template_dir = os.path.abspath(template_dir or SOFFICE_PROFILE_TEMPLATE)
+    if shutil.which('fc-cache'):
+        # Run as root in an image build, this fills the shared system cache
+        subprocess.run(['fc-cache', '-f'], capture_output=True)
+
+    staging = f'{template_dir}.new'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.dirname(template_dir), exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix='filecnvt-template-') as tmp:
+        for name, content in (('writer.txt', 'LibreOffice profile template\n'), ('calc.csv', 'a,b\n1,2\n')):
+            path = os.path.join(tmp, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            soffice_convert(path, tmp, os.path.splitext(name)[0], 'pdf', profile_dir=staging)
+
+    for relative in SOFFICE_VOLATILE_PATHS:
+        path = os.path.join(staging, relative)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            cleanup_files(path)
+    with open(os.path.join(staging, SOFFICE_TEMPLATE_MARKER), 'w') as f:
+        json.dump({'built': datetime.now().isoformat(), 'id': uuid.uuid4().hex}, f)
+
+    shutil.rmtree(template_dir, ignore_errors=True)
+    os.rename(staging, template_dir)
+    return template_dir
+
+def init_soffice_profiles(count, root=None):
+    """(Re)create the pool of `count` LibreOffice profiles under `root`, installing the template"""
+    global soffice_profiles
+    root = root or SOFFICE_PROFILE_ROOT
+    pool = queue.Queue(maxsize=count)
+    for slot in range(count):
+        profile_dir = os.path.join(root, f'profile_{slot}')
+        try:
+            install_soffice_profile(profile_dir)
+        except OSError as e:
+            logger.warning(f"Could not install the LibreOffice profile template in {profile_dir}: {e}")
+        pool.put(profile_dir)
+    soffice_profiles = pool
+
+init_soffice_profiles(FAST_LANE_WORKERS + BULK_LANE_WORKERS)
+
+@contextmanager
+def soffice_profile():
+    """Check out a LibreOffice user profile for exclusive use"""
+    pool = soffice_profiles
+    profile_dir = pool.get()
+    try:
+        yield profile_dir
+    finally:
+        # A killed soffice leaves its profile lock behind
+        cleanup_files(os.path.join(profile_dir, '.lock'))
+        pool.put(profile_dir)
+
+# ==================== WORKER QUEUE ====================
+# With QUEUE_BACKEND=sqlite or redis the web tier only validates uploads:
+# each conversion is queued with its input in shared storage, and worker
+# processes (`python filecnvt.py worker`, on any number of nodes) run it
+# and store the result. Workers heartbeat running jobs; a job whose worker
+# stops heartbeating or that fails unexpectedly is retried up to
+# WORKER_MAX_ATTEMPTS times and then parked as 'dead' for inspection.
+# QUEUE_BACKEND=inline (default) converts inside the web process.
+
+QUEUE_BACKEND = os.environ.get('QUEUE_BACKEND', 'inline')
+QUEUE_DB = os.environ.get('QUEUE_DB', 'queue.sqlite3')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+WORKER_HEARTBEAT_SECONDS = float(os.environ.get('WORKER_HEARTBEAT_SECONDS', 5))
+WORKER_HEARTBEAT_TIMEOUT = float(os.environ.get('WORKER_HEARTBEAT_TIMEOUT', 30))
+WORKER_MAX_ATTEMPTS = int(os.environ.get('WORKER_MAX_ATTEMPTS', 3))
+QUEUE_POLL_INTERVAL = 0.5
+FINISHED_JOB_STATES = ('done', 'failed', 'cancelled', 'dead')
+
+def queue_score(cost, enqueued):
+    """
+    Claim order within a lane: earliest first, with cost counted as delay.
+
+    A job at FAST_LANE_MAX_COST yields to cheaper jobs queued up to
+    SCHEDULER_AGING_SECONDS after it, the queue's stand-in for the
+    in-process scheduler's aging.
+    """
+    return enqueued + cost * SCHEDULER_AGING_SECONDS / FAST_LANE_MAX_COST
+
+class SQLiteBroker:
+    """Job queue in a SQLite database, shared by workers on one host or volume"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._transaction() as db:
+            db.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                lane TEXT NOT NULL,
+                score REAL NOT NULL,
+                state TEXT NOT NULL,
+                heartbeat REAL,
+                cancel INTEGER NOT NULL DEFAULT 0,
+                updated REAL NOT NULL,
+                data TEXT NOT NULL
+            )''')
+            db.execute('CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (lane, state, score)')
+
+    @contextmanager
+    def _transaction(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('BEGIN IMMEDIATE')
+            yield db
+            db.execute('COMMIT')
+        except BaseException:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+    def _load(self, db, job_id):
+        row = db.execute('SELECT data, cancel FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        job['cancel'] = bool(row[1])
+        return job
+
+    def _store(self, db, job):
+        db.execute(
+            'INSERT OR REPLACE INTO jobs (job_id, lane, score, state, heartbeat, cancel, updated, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job['job_id'], job['lane'], job['score'], job['state'], job.get('heartbeat'),
+             int(job.get('cancel', False)), time.time(), json.dumps(job))
+        )
+
+    def enqueue(self, job):
+        """Add a new job; returns False if its id is already taken"""
+        with self._transaction() as db:
+            if self._load(db, job['job_id']) is not None:
+                return False
+            self._store(db, job)
+            return True
+
+    def get(self, job_id):
+        with self._transaction() as db:
+            return self._load(db, job_id)
+
+    def claim(self, lane, worker_id):
+        """Take the next queued job of a lane, or None"""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT job_id FROM jobs WHERE lane = ? AND state = 'queued' ORDER BY score LIMIT 1", (lane,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = self._load(db, row[0])
+            job.update(state='running', worker=worker_id, heartbeat=time.time(), attempts=job['attempts'] + 1)
+            self._store(db, job)
+            return job
+
+    def heartbeat(self, job_id, worker_id):
+        """Record that the worker is alive; returns False if it should stop the job"""
+        with self._transaction() as db:
+            job = self._load(db, job_id)
+            if job is None or job['state'] != 'running' or job['worker'] != worker_id or job['cancel']:
+                return False
+            job['heartbeat'] = time.time()
+            self._store(db, job)
+            return True
+
+    def update(self, job_id, worker_id=None, **fields):
+        """Change a job's fields; with worker_id, only if that worker still owns it"""
+        with self._transaction() as db:
+            job = self._load(db, job_id)
+            if job is None or (worker_id and job.get('worker') != worker_id):
+                return None
+            job.update(fields)
+            self._store(db, job)
+            return job
+
+    def cancel(self, job_id):
+        """Ask for a job to stop; queued jobs are dropped immediately"""
+        with self._transaction() as db:
+            job = self._load(db, job_id)
+            if job is None or job['state'] in FINISHED_JOB_STATES:
+                return False
+            job['cancel'] = True
+            if job['state'] == 'queued':
+                job.update(state='cancelled', error='Conversion cancelled')
+            self._store(db, job)
+            return True
+
+    def stale(self, cutoff):
+        """Running jobs whose last heartbeat is older than cutoff"""
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT job_id FROM jobs WHERE state = 'running' AND heartbeat < ?", (cutoff,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def dead(self):
+        with self._transaction() as db:
+            rows = db.execute("SELECT job_id FROM jobs WHERE state = 'dead' ORDER BY updated").fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, max_age):
+        """Forget finished jobs older than max_age seconds (dead jobs are kept)"""
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed', 'cancelled') AND updated < ?",
+                (time.time() - max_age,)
+            )
+
+class RedisBroker:
+    """Job queue in Redis, shared by workers on any number of nodes"""
+
+    def __init__(self, url, prefix='filecnvt'):
+        if redis is None:
+            raise RuntimeError('QUEUE_BACKEND=redis needs redis (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _name(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    def _save(self, job, pipe=None):
+        (pipe or self.client).set(self._name('job', job['job_id']), json.dumps(job))
+
+    def _locked(self, job_id):
+        return self.client.lock(self._name('lock', job_id), timeout=10, blocking_timeout=10)
+
+    def get(self, job_id):
+        data = self.client.get(self._name('job', job_id))
+        return json.loads(data) if data else None
+
+    def enqueue(self, job):
+        """Add a new job; returns False if its id is already taken"""
+        if not self.client.set(self._name('job', job['job_id']), json.dumps(job), nx=True):
+            return False
+        self.client.zadd(self._name('queue', job['lane']), {job['job_id']: job['score']})
+        return True
+
+    def claim(self, lane, worker_id):
+        """Take the next queued job of a lane, or None"""
+        while True:
+            popped = self.client.zpopmin(self._name('queue', lane))
+            if not popped:
+                return None
+            job_id = popped[0][0].decode()
+            with self._locked(job_id):
+                job = self.get(job_id)
+                if job is None or job['state'] != 'queued':
+                    continue
+                job.update(state='running', worker=worker_id, heartbeat=time.time(), attempts=job['attempts'] + 1)
+                with self.client.pipeline() as pipe:
+                    self._save(job, pipe)
+                    pipe.zadd(self._name('running'), {job_id: job['heartbeat']})
+                    pipe.execute()
+                return job
+
+    def heartbeat(self, job_id, worker_id):
+        """Record that the worker is alive; returns False if it should stop the job"""
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None or job['state'] != 'running' or job['worker'] != worker_id or job.get('cancel'):
+                return False
+            job['heartbeat'] = time.time()
+            with self.client.pipeline() as pipe:
+                self._save(job, pipe)
+                pipe.zadd(self._name('running'), {job_id: job['heartbeat']})
+                pipe.execute()
+            return True
+
+    def update(self, job_id, worker_id=None, **fields):
+        """Change a job's fields; with worker_id, only if that worker still owns it"""
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None or (worker_id and job.get('worker') != worker_id):
+                return None
+            job.update(fields)
+            with self.client.pipeline() as pipe:
+                self._save(job, pipe)
+                if job['state'] == 'queued':
+                    pipe.zadd(self._name('queue', job['lane']), {job_id: job['score']})
+                if job['state'] != 'running':
+                    pipe.zrem(self._name('running'), job_id)
+                if job['state'] == 'dead':
+                    pipe.zadd(self._name('dead'), {job_id: time.time()})
+                else:
+                    pipe.zrem(self._name('dead'), job_id)
+                if job['state'] in FINISHED_JOB_STATES:
+                    pipe.zadd(self._name('finished'), {job_id: time.time()})
+                pipe.execute()
+            return job
+
+    def cancel(self, job_id):
+        """Ask for a job to stop; queued jobs are dropped immediately"""
+        with self._locked(job_id):
+            job = self.get(job_id)
+            if job is None or job['state'] in FINISHED_JOB_STATES:
+                return False
+        fields = {'cancel': True}
+        if job['state'] == 'queued':
+            self.client.zrem(self._name('queue', job['lane']), job_id)
+            fields.update(state='cancelled', error='Conversion cancelled')
+        return self.update(job_id, **fields) is not None
+
+    def stale(self, cutoff):
+        """Running jobs whose last heartbeat is older than cutoff"""
+        return [job_id.decode() for job_id in self.client.zrangebyscore(self._name('running'), 0, cutoff)]
+
+    def dead(self):
+        return [job_id.decode() for job_id in self.client.zrange(self._name('dead'), 0, -1)]
+
+    def purge(self, max_age):
+        """Forget finished jobs older than max_age seconds (dead jobs are kept)"""
+        finished = self._name('finished')
+        for job_id in self.client.zrangebyscore(finished, 0, time.time() - max_age):
+            job = self.get(job_id.decode())
+            if job is None or job['state'] != 'dead':
+                self.client.delete(self._name('job', job_id.decode()))
+            self.client.zrem(finished, job_id)
+
+def create_broker():
+    """Job broker selected by QUEUE_BACKEND, or None to convert in-process"""
+    if QUEUE_BACKEND == 'inline':
+        return None
+    if QUEUE_BACKEND == 'sqlite':
+        return SQLiteBroker(QUEUE_DB)
+    if QUEUE_BACKEND == 'redis':
+        return RedisBroker(REDIS_URL)
+    raise RuntimeError(f"Unknown QUEUE_BACKEND '{QUEUE_BACKEND}' (use 'inline', 'sqlite' or 'redis')")
+
+broker = create_broker()
+
+def retry_job(job_id, error, worker_id=None):
+    """Requeue a job that failed unexpectedly, or park it as dead once out of attempts"""
+    job = broker.get(job_id)
+    if job is None or job['state'] != 'running':
+        return None
+    if job['attempts'] >= WORKER_MAX_ATTEMPTS:
+        logger.error(f"Job {job_id} failed {job['attempts']} times, moving to dead letters: {error}")
+        return broker.update(job_id, worker_id, state='dead', error=error, status=500)
+    logger.warning(f"Job {job_id} attempt {job['attempts']} failed, retrying: {error}")
+    return broker.update(job_id, worker_id, state='queued', worker=None, error=error)
+
+def run_queued(kind, job_id, input_path, filename, options, cost, etag=None):
+    """
+    Queue a validated conversion for the workers and wait for it.
+
+    Returns (result_key, download_name, lane) and raises the same
+    exceptions as an in-process conversion.
+    """
+    # Unique per request: a refused duplicate must not replace the queued job's input
+    input_key = f"inputs/{job_id}_{uuid.uuid4().hex[:8]}_{filename}"
+    storage.save(input_key, input_path)
+    lane = scheduler.lane_for(cost)
+    enqueued = time.time()
+    queued = broker.enqueue({
+        'job_id': job_id,
+        'kind': kind,
+        'lane': lane,
+        'cost': cost,
+        'score': queue_score(cost, enqueued),
+        'state': 'queued',
+        'attempts': 0,
+        'enqueued': enqueued,
+        'input_key': input_key,
+        'filename': filename,
+        'options': options,
+        'etag': etag
+    })
+    if not queued:
+        storage.delete(input_key)
+        raise JobIdConflict(f'Job {job_id} already exists')
+
+    job = current_job.get()
+    state = None
+    try:
+        while True:
+            state = broker.get(job_id)
+            if state is None or state['state'] in FINISHED_JOB_STATES:
+                break
+            if state['state'] == 'queued':
+                job.report('queued')
+            elif state.get('progress'):
+                job.mirror(state['progress'])
+            if job.is_cancelled():
+                broker.cancel(job_id)
+            elif state['state'] == 'queued' and time.time() - enqueued > SCHEDULER_QUEUE_TIMEOUT:
+                broker.cancel(job_id)
+                raise SchedulerBusy('Server busy, please retry later')
+            time.sleep(QUEUE_POLL_INTERVAL)
+    finally:
+        # Dead jobs keep their input so they can be retried from the dead letters
+        if state is None or state['state'] != 'dead':
+            storage.delete(input_key)
+
+    if state is None:
+        raise ConversionError('Job disappeared from the queue')
+    if state['state'] == 'done':
+        return state['result_key'], state['download_name'], lane
+    if state['state'] == 'cancelled':
+        raise ConversionCancelled('Conversion cancelled')
+    if state.get('status') == 400:
+        raise ValidationError(state['error'])
+    if state['state'] == 'dead':
+        raise ConversionError(f"Conversion failed after {state['attempts']} attempts: {state['error']}")
+    raise ConversionError(state['error'])
+
+def execute_job(job, worker_id):
+    """Run one claimed job on this worker, heartbeating until it finishes"""
+    job_id = job['job_id']
+    converter = CONVERTERS[job['kind']]
+    input_path = os.path.join(UPLOAD_FOLDER, f"{job_id}_{job['filename']}")
+    work_dir = os.path.join(OUTPUT_FOLDER, f"{job['kind']}_{job_id}")
+    context = JobContext(
+        job_id, publish=lambda progress: broker.update(job_id, worker_id, progress=progress)
+    )
+    token = current_job.set(context)
+    stop_heartbeat = threading.Event()
+
+    def heartbeat():
+        while not stop_heartbeat.wait(WORKER_HEARTBEAT_SECONDS):
+            try:
+                if not broker.heartbeat(job_id, worker_id):
+                    context.cancel()
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    threading.Thread(target=heartbeat, name=f'heartbeat-{job_id}', daemon=True).start()
+    try:
+        context.report('converting')
+        os.makedirs(work_dir, exist_ok=True)
+        storage.load(job['input_key'], input_path)
+        base_name = os.path.splitext(job['filename'])[0]
+        output_path = converter['function'](input_path, work_dir, base_name, **job['options'])
+        download_name = os.path.basename(output_path)
+        result_key = f"results/{job_id}_{download_name}"
+        storage.save(result_key, output_path)
+        broker.update(job_id, worker_id, state='done', result_key=result_key, download_name=download_name)
+        logger.info(f"Job {job_id} ({job['kind']}) done on attempt {job['attempts']}")
+    except ValidationError as e:
+        broker.update(job_id, worker_id, state='failed', error=str(e), status=400)
+    except ConversionCancelled as e:
+        broker.update(job_id, worker_id, state='cancelled', error=str(e), status=499)
+    except FileNotFoundError as e:
+        # Input gone: the API gave up on this job
+        broker.update(job_id, worker_id, state='failed', error=f'Input not found: {e}', status=500)
+    except subprocess.TimeoutExpired:
+        retry_job(job_id, 'Conversion timeout', worker_id)
+    except Exception as e:
+        retry_job(job_id, str(e) or type(e).__name__, worker_id)
+    finally:
+        stop_heartbeat.set()
+        current_job.reset(token)
+        cleanup_files(input_path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _worker_loop(lane, worker_id, stop):
+    while not stop.is_set():
+        try:
+            job = broker.claim(lane, worker_id)
+        except Exception as e:
+            logger.warning(f"Could not claim a job: {e}")
+            job = None
+        if job is None:
+            stop.wait(QUEUE_POLL_INTERVAL)
+            continue
+        execute_job(job, worker_id)
+
+def _maintenance_loop(stop):
+    """Requeue jobs of workers that stopped heartbeating and purge old jobs"""
+    while not stop.wait(WORKER_HEARTBEAT_SECONDS):
+        try:
+            for job_id in broker.stale(time.time() - WORKER_HEARTBEAT_TIMEOUT):
+                retry_job(job_id, 'Worker stopped responding')
+            broker.purge(RESULT_TTL)
+        except Exception as e:
+            logger.warning(f"Queue maintenance failed: {e}")
+
+def run_worker(stop=None):
+    """Serve queued conversions until `stop` is set, with the lanes' configured concurrency"""
+    if broker is None:
+        raise RuntimeError('Worker mode needs QUEUE_BACKEND=sqlite or redis')
+    stop = stop or threading.Event()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [threading.Thread(target=_maintenance_loop, args=(stop,), name='maintenance', daemon=True)]
+    for lane, count in (('fast', FAST_LANE_WORKERS), ('bulk', BULK_LANE_WORKERS)):
+        threads += [
+            threading.Thread(target=_worker_loop, args=(lane, worker_id, stop), name=f'{lane}-{n}', daemon=True)
+            for n in range(count)
+        ]
+    logger.info(f"Worker {worker_id} serving {QUEUE_BACKEND} queue: "
+                f"{FAST_LANE_WORKERS} fast, {BULK_LANE_WORKERS} bulk")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+# ==================== CONVERSION PIPELINE ====================
+
+class ConversionError(Exception):
+    """Raised by a converter when the backend fails to produce output"""
+
+class JobIdConflict(Exception):
+    """Raised when a client-chosen job id is already in use"""
+
+# Client-chosen ids double as the key to a job's progress, cancellation and
+# result, so they must be long enough not to be guessed (e.g. a random UUID)
+CLIENT_JOB_ID_PATTERN = r'[A-Za-z0-9_-]{16,64}'
+
+def new_job_id():
+    """Unique, time-ordered identifier for one conversion"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+def soffice_convert(input_path, work_dir, base_name, target, profile_dir=None,
+                    filter_name=None, filter_options=None):
+    """
+    Run LibreOffice headless and return the converted file.
+
+    filter_options (a dict in LibreOffice's JSON filter option format)
+    requires filter_name, the export filter to pass them to.
+    """
+    if profile_dir is None:
+        with soffice_profile() as profile_dir:
+            return soffice_convert(input_path, work_dir, base_name, target, profile_dir,
+                                   filter_name, filter_options)
+    
+    convert_to = target
+    if filter_name:
+        convert_to += f':{filter_name}'
+        if filter_options:
+            convert_to += f':{json.dumps(filter_options)}'
+    
+    cmd = [
+        'soffice',
+        f'-env:UserInstallation={Path(os.path.abspath(profile_dir)).as_uri()}',
+        '--headless',
+        '--convert-to', convert_to,
+        '--outdir', work_dir,
+        input_path
+    ]
+    
+    try:
+        result = run_command(cmd)
+    finally:
+        # Document lock LibreOffice leaves next to the input if killed
+        input_dir, input_file = os.path.split(input_path)
+        cleanup_files(os.path.join(input_dir, f'.~lock.{input_file}#'))
+    
+    if result.returncode != 0:
+        raise ConversionError(f'Conversion failed: {result.stderr}')
+    
+    # soffice names the output after the input file
+    input_stem = os.path.splitext(os.path.basename(input_path))[0]
+    output_path = os.path.join(work_dir, f"{input_stem}.{target}")
+    
+    if not os.path.exists(output_path):
+        raise ConversionError('Conversion failed: Output file not found')
+    
+    final_output = os.path.join(work_dir, f"{base_name}.{target}")
+    os.replace(output_path, final_output)
+    return final_output
+
+def start_job():
+    """
+    Register a cancellable job bound to the current request's client socket.
+
+    The client may choose the job id (X-Job-Id header) to follow or cancel
+    the conversion. The id is claimed in the same step that registers it,
+    and one that is running, queued or has a stored result is refused
+    rather than shared.
+    """
+    requested = request.headers.get('X-Job-Id')
+    if requested is not None and not re.fullmatch(CLIENT_JOB_ID_PATTERN, requested):
+        raise ValidationError('X-Job-Id must be 16 to 64 letters, digits, "-" or "_"')
+    client_socket = request.environ.get('gunicorn.socket') or request.environ.get('werkzeug.socket')
+    job = JobContext(requested or new_job_id(), client_socket)
+    with active_jobs_lock:
+        if job.job_id in active_jobs:
+            raise JobIdConflict(f'Job {job.job_id} already exists')
+        active_jobs[job.job_id] = job
+    if requested and ((broker is not None and broker.get(requested) is not None)
+                      or load_result_meta(requested) is not None):
+        with active_jobs_lock:
+            active_jobs.pop(requested, None)
+        raise JobIdConflict(f'Job {requested} already exists')
+    job.token = current_job.set(job)
+    return job
+
+def finish_job(job):
+    """Unregister a job started with start_job"""
+    current_job.reset(job.token)
+    with active_jobs_lock:
+        active_jobs.pop(job.job_id, None)
+
+def handle_conversion(kind):
+    """Validate the uploaded file, schedule the conversion and send the result"""
+    converter = CONVERTERS[kind]
+    input_path = None
+    work_dir = None
+    job = None
+    limit_mb = upload_limit_mb(kind)
+    limit_request_body(limit_mb)
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
+        # Refuse clients with nothing left before reading their upload
+        rate_limit()
         
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+        # Input is a multipart file, a completed chunked upload or inline text
+        upload = None
+        text = None
+        files = []
+        upload_id = request.form.get('upload_id')
+        text_field = converter.get('text_field')
+        if upload_id:
+            upload = load_upload(upload_id)
+            if upload is None:
+                return jsonify({'error': 'Upload not found'}), 404
+            if upload['status'] != 'complete':
+                return jsonify({'error': 'Upload is not complete'}), 409
+            if upload['size'] > limit_mb * 1024 * 1024:
+                return upload_too_large(limit_mb)
+            original_name = upload['filename']
+        elif text_field and request.form.get(text_field) and 'file' not in request.files:
+            text = request.form[text_field]
+            original_name = f"document.{converter['extensions'][0].lstrip('.')}"
+        else:
+            if 'file' not in request.files:
+                return jsonify({'error': 'No file provided'}), 400
+            
+            file = request.files['file']
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+            original_name = file.filename
+            # Converters taking several files get them as one ZIP bundle
+            files = request.files.getlist('file') if converter.get('max_files') else []
+            if len(files) > 1:
+                if len(files) > converter['max_files']:
+                    return jsonify({'error': f"At most {converter['max_files']} files can be sent"}), 400
+                if not all(f.filename.lower().endswith('.pdf') for f in files):
+                    return jsonify({'error': converter['invalid_type_message']}), 400
+                original_name = f"{os.path.splitext(file.filename)[0]}_merged.zip"
         
-        if not allowed_file(file.filename) or not file.filename.lower().endswith(('.doc', '.docx')):
-            return jsonify({'error': 'Invalid file type. Please upload .doc or .docx'}), 400
+        if not allowed_file(original_name) or not original_name.lower().endswith(converter['extensions']):
+            return jsonify({'error': converter['invalid_type_message']}), 400
         
         # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        # Convert using LibreOffice
-        output_dir = os.path.join(OUTPUT_FOLDER, f"word_pdf_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        filename = secure_filename(original_name)
+        job = start_job()
+        job_id = job.job_id
+        # Files are named per request, not per job id, so nothing on disk is shared
+        file_id = f"{job_id}_{uuid.uuid4().hex[:8]}"
+        input_path = os.path.join(UPLOAD_FOLDER, f"{file_id}_{filename}")
+        if upload:
+            try:
+                link_upload(upload, input_path)
+            except FileNotFoundError:
+                return jsonify({'error': 'Upload has expired'}), 404
+        elif text is not None:
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        elif len(files) > 1:
+            # Stored, not deflated: PDFs are already compressed
+            with zipfile.ZipFile(input_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as bundle:
+                for number, f in enumerate(files, 1):
+                    with bundle.open(f"{number:04d}_{secure_filename(f.filename) or 'file.pdf'}", 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(f.stream, dst)
+        else:
+            file.save(input_path)
         
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
+        input_info, error = validate_upload(input_path, filename)
+        if error:
+            return error
+        if input_info['size'] > limit_mb * 1024 * 1024:
+            return upload_too_large(limit_mb)
         
-        # Find output PDF
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.pdf")
+        options = converter['options'](request.form, input_info) if 'options' in converter else {}
+        cost = estimate_cost(kind, input_info)
         
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
+        def convert():
+            nonlocal work_dir
+            if broker is not None:
+                return run_queued(kind, job_id, input_path, filename, options, cost, etag)
+            
+            base_name = os.path.splitext(filename)[0]
+            work_dir = os.path.join(OUTPUT_FOLDER, f"{kind}_{file_id}")
+            os.makedirs(work_dir, exist_ok=True)
+            report_progress('queued')
+            with scheduler.slot(cost, client_key(), cancelled=job.is_cancelled) as lane:
+                report_progress('converting')
+                output_path = converter['function'](input_path, work_dir, base_name, **options)
+            
+            # Store the result under a unique key and deliver it from storage
+            download_name = os.path.basename(output_path)
+            result_key = f"results/{file_id}_{download_name}"
+            storage.save(result_key, output_path)
+            return result_key, download_name, lane
         
-        # Move to outputs with unique name
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pdf")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
+        flight_key = conversion_key(kind, input_path, options, upload['sha256'] if upload else None)
+        etag = result_etag(flight_key)
+        # The client already holds this exact result
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         
-        cleanup_files(input_path)
+        rate_limit(cost)
+        if COALESCE_REQUESTS:
+            (result_key, download_name, lane), shared = flights.run(flight_key, convert, job.is_cancelled)
+        else:
+            (result_key, download_name, lane), shared = convert(), False
+        # Saved before the job is unregistered so progress streams see it finish
+        save_result_meta(job_id, {
+            'result_key': result_key,
+            'download_name': download_name,
+            'etag': etag,
+            'lane': lane
+        })
+        finish_job(job)
+        job = None
+        expire_storage()
         
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pdf")
+        response = storage.send(result_key, download_name, etag)
+        response.headers['X-Conversion-Lane'] = lane
+        response.headers['X-Job-Id'] = job_id
+        if shared:
+            response.headers['X-Conversion-Coalesced'] = '1'
+        return response
     
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        return upload_too_large(limit_mb)
+    except RateLimited as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except JobIdConflict as e:
+        return jsonify({'error': str(e)}), 409
+    except SchedulerBusy as e:
+        return jsonify({'error': str(e)}), 503
+    except ConversionCancelled as e:
+        return jsonify({'error': str(e)}), 499
+    except ConversionError as e:
+        return jsonify({'error': str(e)}), 500
     except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
         return jsonify({'error': 'Conversion timeout'}), 500
     except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"Word to PDF error: {str(e)}")
+        logger.error(f"{converter['label']} error: {str(e)}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        if job:
+            finish_job(job)
+        cleanup_files(input_path)
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+# ==================== WORD → PDF ====================
+def convert_word_to_pdf(input_path, work_dir, base_name):
+    """Convert Word document to PDF using LibreOffice"""
+    return soffice_convert(input_path, work_dir, base_name, 'pdf')
+
+@app.route('/api/convert/word-to-pdf', methods=['POST'])
+def word_to_pdf():
+    """Convert Word document to PDF using LibreOffice"""
+    return handle_conversion('word-to-pdf')
 
 # ==================== EXCEL → PDF ====================
+# Rendering can be limited to chosen sheets and print areas, and scaled to
+# the page width, so the work follows what the user wants rather than the
+# size of the workbook. For .xlsx files this is done by patching a copy of
+# the workbook XML (hidden sheets and print areas are skipped by LibreOffice).
+
+PRINT_AREA_PATTERN = re.compile(r'\$?([A-Za-z]{1,3})\$?(\d+):\$?([A-Za-z]{1,3})\$?(\d+)')
+# Worksheet elements that must follow pageMargins/pageSetup
+WORKSHEET_TAIL_ELEMENTS = (
+    'headerFooter', 'rowBreaks', 'colBreaks', 'customProperties', 'cellWatches',
+    'ignoredErrors', 'smartTags', 'drawing', 'legacyDrawing', 'legacyDrawingHF',
+    'drawingHF', 'picture', 'oleObjects', 'controls', 'webPublishItems',
+    'tableParts', 'extLst'
+)
+
+def excel_options(form, input_info):
+    """Read Excel → PDF rendering options from a request form"""
+    options = {}
+    if form.get('sheets'):
+        options['sheets'] = [s.strip() for s in form['sheets'].split(',') if s.strip()]
+        # Only the selected sheets are rendered
+        input_info['pages'] = len(options['sheets'])
+    if form.get('print_area'):
+        options['print_area'] = form['print_area'].strip()
+    if form.get('fit'):
+        options['fit'] = form['fit']
+    if options and input_info['extension'] != 'xlsx' and set(options) - {'fit'}:
+        raise ValidationError('Sheet and print area selection require an .xlsx file')
+    if options.get('print_area') and not PRINT_AREA_PATTERN.fullmatch(options['print_area']):
+        raise ValidationError('print_area must be a cell range such as A1:H50')
+    if options.get('fit') not in (None, 'width', 'page'):
+        raise ValidationError("fit must be 'width' or 'page'")
+    return options
+
+def _set_attribute(tag, name, value):
+    """Set (or with value None remove) an attribute on an XML start tag string"""
+    tag = re.sub(rf'\s{name}="[^"]*"', '', tag)
+    if value is None:
+        return tag
+    end = '/>' if tag.endswith('/>') else '>'
+    return f'{tag[:-len(end)]} {name}="{value}"{end}'
+
+def _select_sheets(names, sheets):
+    """Resolve sheet names or 1-based indexes to sheet positions"""
+    lowered = [n.lower() for n in names]
+    selected = []
+    for sheet in sheets:
+        if sheet.isdigit() and 1 <= int(sheet) <= len(names):
+            selected.append(int(sheet) - 1)
+        elif sheet.lower() in lowered:
+            selected.append(lowered.index(sheet.lower()))
+        else:
+            raise ValidationError(f'Sheet not found: {sheet}')
+    return sorted(set(selected))
+
+def _fit_sheet_to_width(xml):
+    """Patch one worksheet part so it prints one page wide"""
+    # The sheet's data can be huge: only touch the head and the tail
+    data_start = re.search(rb'<(\w+:)?sheetData\b', xml)
+    data_end = xml.rfind(b'sheetData>') + len(b'sheetData>')
+    if not data_start or data_end < len(b'sheetData>'):
+        return xml
+    prefix = (data_start.group(1) or b'').decode()
+    head = xml[:data_start.start()].decode('utf-8')
+    body = xml[data_start.start():data_end]
+    tail = xml[data_end:].decode('utf-8')
+
+    setup_pr = f'<{prefix}pageSetUpPr fitToPage="1"/>'
+    sheet_pr = re.search(rf'<{prefix}sheetPr\b[^>]*?(/?)>', head)
+    if re.search(rf'<{prefix}pageSetUpPr\b[^>]*/>', head):
+        head = re.sub(rf'<{prefix}pageSetUpPr\b[^>]*/>',
+                      lambda m: _set_attribute(m.group(0), 'fitToPage', '1'), head)
+    elif sheet_pr and sheet_pr.group(1):
+        head = head.replace(sheet_pr.group(0), sheet_pr.group(0)[:-2] + f'>{setup_pr}</{prefix}sheetPr>', 1)
+    elif sheet_pr:
+        head = head.replace(f'</{prefix}sheetPr>', f'{setup_pr}</{prefix}sheetPr>', 1)
+    else:
+        root = re.search(rf'<{prefix}worksheet\b[^>]*>', head)
+        head = head[:root.end()] + f'<{prefix}sheetPr>{setup_pr}</{prefix}sheetPr>' + head[root.end():]
+
+    page_setup = re.search(rf'<{prefix}pageSetup\b[^>]*/>', tail)
+    if page_setup:
+        tag = _set_attribute(page_setup.group(0), 'fitToWidth', '1')
+        tag = _set_attribute(tag, 'fitToHeight', '0')
+        tail = tail.replace(page_setup.group(0), tag, 1)
+    else:
+        setup = f'<{prefix}pageSetup fitToWidth="1" fitToHeight="0"/>'
+        margins = re.search(rf'<{prefix}pageMargins\b[^>]*/>', tail)
+        if margins:
+            tail = tail[:margins.end()] + setup + tail[margins.end():]
+        else:
+            setup = (f'<{prefix}pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" '
+                     f'header="0.3" footer="0.3"/>' + setup)
+            later = [m.start() for m in (
+                re.search(rf'<{prefix}{name}\b', tail) for name in WORKSHEET_TAIL_ELEMENTS
+            ) if m]
+            position = min(later) if later else tail.rindex('</')
+            tail = tail[:position] + setup + tail[position:]
+
+    return head.encode('utf-8') + body + tail.encode('utf-8')
+
+def prepare_workbook(input_path, output_path, sheets=None, print_area=None, fit=None):
+    """Write a copy of an .xlsx that prints only the requested sheets and area"""
+    with zipfile.ZipFile(input_path) as src:
+        workbook = src.read('xl/workbook.xml').decode('utf-8')
+        rels = src.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+
+        sheet_tags = re.findall(r'<(?:\w+:)?sheet\s[^>]*>', workbook)
+        names = [html.unescape(re.search(r'\sname="([^"]*)"', t).group(1)) for t in sheet_tags]
+        if sheets:
+            selected = _select_sheets(names, sheets)
+            # Hide every sheet that was not asked for
+            for index, tag in enumerate(sheet_tags):
+                state = None if index in selected else 'hidden'
+                workbook = workbook.replace(tag, _set_attribute(tag, 'state', state), 1)
+            workbook = re.sub(r'activeTab="\d+"', f'activeTab="{selected[0]}"', workbook)
+        else:
+            selected = [i for i, tag in enumerate(sheet_tags) if not re.search(r'\sstate="(very)?[hH]idden"', tag)]
+
+        if print_area:
+            prefix = re.match(r'<(\w+:)?', sheet_tags[0]).group(1) or ''
+            first_col, first_row, last_col, last_row = PRINT_AREA_PATTERN.fullmatch(print_area).groups()
+            area = f'${first_col.upper()}${first_row}:${last_col.upper()}${last_row}'
+            names_xml = ''.join(
+                f'<{prefix}definedName name="_xlnm.Print_Area" localSheetId="{i}">'
+                f"'{html.escape(names[i].replace(chr(39), chr(39) * 2), quote=False)}'!{area}"
+                f'</{prefix}definedName>'
+                for i in selected
+            )
+            # Replace any print areas the selected sheets already had
+            for i in selected:
+                workbook = re.sub(
+                    rf'<{prefix}definedName\b(?=[^>]*name="_xlnm.Print_Area")(?=[^>]*localSheetId="{i}")'
+                    rf'[^>]*>.*?</{prefix}definedName>', '', workbook
+                )
+            if re.search(rf'<{prefix}definedNames\s*>', workbook):
+                workbook = re.sub(rf'<{prefix}definedNames\s*>', lambda m: m.group(0) + names_xml, workbook, count=1)
+            elif re.search(rf'<{prefix}definedNames\s*/>', workbook):
+                workbook = re.sub(rf'<{prefix}definedNames\s*/>',
+                                  f'<{prefix}definedNames>{names_xml}</{prefix}definedNames>', workbook, count=1)
+            else:
+                workbook = workbook.replace(
+                    f'</{prefix}sheets>',
+                    f'</{prefix}sheets><{prefix}definedNames>{names_xml}</{prefix}definedNames>', 1
+                )
+
+        # Worksheet parts that need fit-to-width page setup
+        fit_parts = set()
+        if fit == 'width':
+            targets = {
+                re.search(r'\sId="([^"]+)"', rel).group(1): re.search(r'\sTarget="([^"]+)"', rel).group(1)
+                for rel in re.findall(r'<Relationship\b[^>]*>', rels)
+            }
+            for i in selected:
+                rel_id = re.search(r'\s\w+:id="([^"]+)"', sheet_tags[i]).group(1)
+                target = targets[rel_id].lstrip('/')
+                fit_parts.add(target if target.startswith('xl/') else f'xl/{target}')
+
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename == 'xl/workbook.xml':
+                    dst.writestr(item, workbook.encode('utf-8'))
+                elif item.filename in fit_parts:
+                    dst.writestr(item, _fit_sheet_to_width(src.read(item)))
+                elif item.filename.startswith('xl/calcChain'):
+                    # Cell references may now be hidden; let LibreOffice rebuild it
+                    continue
+                else:
+                    with src.open(item) as data, dst.open(item, 'w') as out:
+                        shutil.copyfileobj(data, out, STREAM_BLOCK_SIZE)
+
+def convert_excel_to_pdf(input_path, work_dir, base_name, sheets=None, print_area=None, fit=None):
+    """Convert Excel document to PDF using LibreOffice"""
+    prepared_path = None
+    if sheets or print_area or fit == 'width':
+        prepared_path = os.path.join(work_dir, f"prepared_{os.path.basename(input_path)}")
+        prepare_workbook(input_path, prepared_path, sheets, print_area, fit)
+    
+    filter_options = None
+    if fit == 'page':
+        # Each sheet is rendered onto a single page
+        filter_options = {'SinglePageSheets': {'type': 'boolean', 'value': 'true'}}
+    
+    try:
+        return soffice_convert(prepared_path or input_path, work_dir, base_name, 'pdf',
+                               filter_name='calc_pdf_Export', filter_options=filter_options)
+    finally:
+        cleanup_files(prepared_path)
+
 @app.route('/api/convert/excel-to-pdf', methods=['POST'])
 def excel_to_pdf():
     """Convert Excel document to PDF using LibreOffice"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith(('.xls', '.xlsx')):
-            return jsonify({'error': 'Invalid file type. Please upload .xls or .xlsx'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        output_dir = os.path.join(OUTPUT_FOLDER, f"excel_pdf_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.pdf")
-        
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
-        
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pdf")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pdf")
-    
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"Excel to PDF error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return handle_conversion('excel-to-pdf')
 
 # ==================== POWERPOINT → PDF ====================
+def convert_powerpoint_to_pdf(input_path, work_dir, base_name):
+    """Convert PowerPoint presentation to PDF using LibreOffice"""
+    return soffice_convert(input_path, work_dir, base_name, 'pdf')
+
 @app.route('/api/convert/powerpoint-to-pdf', methods=['POST'])
 def powerpoint_to_pdf():
     """Convert PowerPoint presentation to PDF using LibreOffice"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith(('.ppt', '.pptx')):
-            return jsonify({'error': 'Invalid file type. Please upload .ppt or .pptx'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        output_dir = os.path.join(OUTPUT_FOLDER, f"pptx_pdf_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.pdf")
-        
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
-        
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pdf")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pdf")
-    
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PowerPoint to PDF error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return handle_conversion('powerpoint-to-pdf')
 
 # ==================== JPG → PDF ====================
+# The web UI shrinks photos in the browser before uploading them: images
+# larger than IMAGE_UPLOAD_MAX_EDGE pixels are downscaled, and every image is
+# re-encoded without its EXIF metadata (after applying its orientation).
+
+#
+# Huge images are never decoded whole at full size. Plain 8-bit PNGs (gray,
+# RGB or palette, no transparency) have their compressed rows copied into
+# the PDF chunk by chunk without decoding them. JPEGs larger than
+# IMAGE_PDF_MAX_EDGE are decoded at 1/2, 1/4 or 1/8 scale (draft mode) and
+# then resized. Anything else is decoded within the pixel budget
+# (IMAGE_MAX_MEGAPIXELS, checked when the upload is sniffed) and reduced in
+# one box-filter pass before transparency is flattened.
+# Downscaling keeps the page size; only the image's resolution drops.
+
+# A4 width at 300 dpi
+IMAGE_UPLOAD_MAX_EDGE = int(os.environ.get('IMAGE_UPLOAD_MAX_EDGE', 2480))
+IMAGE_UPLOAD_QUALITY = float(os.environ.get('IMAGE_UPLOAD_QUALITY', 0.9))
+# Longest image edge embedded when decoding (A4 width at 600 dpi)
+IMAGE_PDF_MAX_EDGE = int(os.environ.get('IMAGE_PDF_MAX_EDGE', 4960))
+# Pixels per inch of the page; sets the page size from the image size
+IMAGE_PDF_RESOLUTION = 100.0
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_COPY_CHUNK_BYTES = 1024 * 1024
+
+def png_layout(path):
+    """Read a PNG's header and IDAT chunk positions, or None if its rows cannot be copied as they are"""
+    layout = {'idat': [], 'palette': b''}
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IHDR':
+                ihdr = f.read(length)
+                (layout['width'], layout['height'], layout['bit_depth'],
+                 layout['color_type'], _, _, interlace) = struct.unpack('>IIBBBBB', ihdr[:13])
+                f.seek(4, os.SEEK_CUR)
+                if interlace:
+                    return None
+            elif chunk_type == b'PLTE':
+                layout['palette'] = f.read(length)
+                f.seek(4, os.SEEK_CUR)
+            elif chunk_type in (b'tRNS', b'eXIf'):
+                # Transparency has to be flattened and orientation applied
+                return None
+            elif chunk_type == b'IDAT':
+                layout['idat'].append((f.tell(), length))
+                f.seek(length + 4, os.SEEK_CUR)
+            elif chunk_type == b'IEND':
+                break
+            else:
+                f.seek(length + 4, os.SEEK_CUR)
+    if (layout['color_type'], layout['bit_depth']) not in ((0, 8), (2, 8)) and layout['color_type'] != 3:
+        return None
+    return layout if layout['idat'] else None
+
+def write_png_pdf(input_path, layout, output_path):
+    """Write a one-page PDF embedding a PNG's compressed rows unchanged"""
+    width, height = layout['width'], layout['height']
+    if layout['color_type'] == 3:
+        colors = 1
+        color_space = f"[/Indexed /DeviceRGB {len(layout['palette']) // 3 - 1} <{layout['palette'].hex()}>]"
+    else:
+        colors = 3 if layout['color_type'] == 2 else 1
+        color_space = '/DeviceRGB' if colors == 3 else '/DeviceGray'
+    page_width = width * 72 / IMAGE_PDF_RESOLUTION
+    page_height = height * 72 / IMAGE_PDF_RESOLUTION
+    content = f'q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q'.encode()
+    data_length = sum(length for _, length in layout['idat'])
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] '
+         f'/Resources << /XObject << /Im0 5 0 R >> >> /Contents 4 0 R >>').encode(),
+        b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+        None
+    ]
+    image_header = (
+        f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace {color_space} "
+        f"/BitsPerComponent {layout['bit_depth']} /Filter /FlateDecode "
+        f"/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent {layout['bit_depth']} /Columns {width} >> "
+        f"/Length {data_length} >>\nstream\n"
+    ).encode()
+
+    offsets = []
+    with open(output_path, 'wb') as out, open(input_path, 'rb') as src:
+        out.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        for number, body in enumerate(objects, 1):
+            offsets.append(out.tell())
+            out.write(b'%d 0 obj\n' % number)
+            if body is None:
+                out.write(image_header)
+                for offset, length in layout['idat']:
+                    check_cancelled()
+                    src.seek(offset)
+                    while length:
+                        block = src.read(min(length, PNG_COPY_CHUNK_BYTES))
+                        if not block:
+                            raise ConversionError('PNG image data is truncated')
+                        out.write(block)
+                        length -= len(block)
+                out.write(b'\nendstream')
+            else:
+                out.write(body)
+            out.write(b'\nendobj\n')
+        xref = out.tell()
+        out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            out.write(b'%010d 00000 n \n' % offset)
+        out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return output_path
+
+def flatten_alpha(image):
+    """Composite a transparent image onto white, in one vectorised paste"""
+    if (image.mode == 'P' and 'transparency' in image.info) or image.mode in ('LA', 'PA'):
+        image = image.convert('RGBA')
+    if image.mode != 'RGBA':
+        return image if image.mode == 'RGB' else image.convert('RGB')
+    flat = Image.new('RGB', image.size, 'white')
+    flat.paste(image, mask=image.getchannel('A'))
+    return flat
+
+def reduce_in_strips(image, factor, rows=256):
+    """Flatten and shrink a decoded image a strip at a time, never copying it at full size"""
+    reduced = Image.new('RGB', (math.ceil(image.width / factor), math.ceil(image.height / factor)), 'white')
+    step = rows * factor
+    for top in range(0, image.height, step):
+        strip = image.crop((0, top, image.width, min(top + step, image.height)))
+        reduced.paste(flatten_alpha(strip).reduce(factor), (0, top // factor))
+    # Keep the source's EXIF so exif_transpose still finds its orientation
+    exif = image.getexif()
+    if exif:
+        reduced.info['exif'] = exif.tobytes()
+    return reduced
+
+def convert_jpg_to_pdf(input_path, work_dir, base_name):
+    """Convert JPG/PNG image to PDF using PIL"""
+    output_path = os.path.join(work_dir, f"{base_name}.pdf")
+    layout = png_layout(input_path)
+    if layout is not None:
+        return write_png_pdf(input_path, layout, output_path)
+
+    with Image.open(input_path) as image:
+        width = image.width
+        scale = max(image.size) / IMAGE_PDF_MAX_EDGE
+        if scale > 1 and image.format == 'JPEG':
+            size = (max(1, round(image.width / scale)), max(1, round(image.height / scale)))
+            # Decodes straight at the smallest 1/2, 1/4 or 1/8 scale still above size
+            image.draft('RGB', size)
+            reduced = image.resize(size, Image.LANCZOS)
+        elif scale > 1:
+            reduced = reduce_in_strips(image, math.ceil(scale))
+        else:
+            reduced = image
+        resolution = IMAGE_PDF_RESOLUTION * reduced.width / width
+        # Photos are often stored sideways with an EXIF orientation tag
+        ImageOps.exif_transpose(reduced, in_place=True)
+        rgb_image = flatten_alpha(reduced)
+        rgb_image.save(output_path, 'PDF', resolution=resolution)
+    return output_path
+
 @app.route('/api/convert/jpg-to-pdf', methods=['POST'])
 def jpg_to_pdf():
     """Convert JPG/PNG image to PDF using PIL"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            ext = file.filename.rsplit('.', 1)[1].lower()
-            if ext not in ['jpg', 'jpeg', 'png']:
-                return jsonify({'error': 'Invalid file type. Please upload .jpg, .jpeg, or .png'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        # Convert image to PDF
-        image = Image.open(input_path)
-        rgb_image = image.convert('RGB')
-        
-        base_name = os.path.splitext(filename)[0]
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pdf")
-        rgb_image.save(final_output, 'PDF', resolution=100.0)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pdf")
-    
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"JPG to PDF error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return handle_conversion('jpg-to-pdf')
 
 # ==================== HTML → PDF ====================
+# engine=weasyprint (pip install weasyprint) renders in a pool of long-lived
+# worker processes (html_render.py): no LibreOffice start-up per document,
+# modern CSS, and stylesheets, fonts and images fetched over http(s) are
+# cached across requests. engine=soffice keeps LibreOffice Writer/Web.
+# Besides .html files the route takes a ZIP bundle (index.html with its
+# CSS, fonts and images) or raw HTML in an `html` form field.
+
+HTML_PDF_ENGINE = os.environ.get('HTML_PDF_ENGINE', 'weasyprint')
+HTML_PDF_ENGINES = ('weasyprint', 'soffice')
+HTML_RENDER_WORKERS = int(os.environ.get('HTML_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+
+if HTML_PDF_ENGINE not in HTML_PDF_ENGINES:
+    raise RuntimeError(f"Unknown HTML_PDF_ENGINE '{HTML_PDF_ENGINE}' (use 'weasyprint' or 'soffice')")
+if HTML_PDF_ENGINE == 'weasyprint' and html_render.weasyprint is None:
+    logger.warning("HTML_PDF_ENGINE is 'weasyprint' but WeasyPrint cannot be loaded: HTML → PDF fails "
+                   "unless engine=soffice is requested (or HTML_PDF_ENGINE=soffice is set)")
+
+_html_pool = None
+_html_pool_lock = threading.Lock()
+
+def html_pool():
+    """Process pool for WeasyPrint rendering, created on first use"""
+    global _html_pool
+    with _html_pool_lock:
+        if _html_pool is None:
+            # spawn: workers only import html_render, never this module
+            _html_pool = ProcessPoolExecutor(
+                max_workers=HTML_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _html_pool
+
+def _reset_html_pool(pool):
+    """Drop a pool whose worker died so the next render starts a fresh one"""
+    global _html_pool
+    with _html_pool_lock:
+        if _html_pool is pool:
+            _html_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def html_pdf_engine(engine=None):
+    """
+    Engine to render with: the one asked for, else HTML_PDF_ENGINE.
+
+    An unavailable engine is an error, never a silent switch: a 400 when the
+    client asked for it, a server error when it is the configured default.
+    """
+    if engine is None:
+        if HTML_PDF_ENGINE == 'weasyprint' and html_render.weasyprint is None:
+            raise ConversionError("WeasyPrint is not available on this server (HTML_PDF_ENGINE is 'weasyprint')")
+        return HTML_PDF_ENGINE
+    if engine not in HTML_PDF_ENGINES:
+        raise ValidationError("engine must be 'weasyprint' or 'soffice'")
+    if engine == 'weasyprint' and html_render.weasyprint is None:
+        raise ValidationError('WeasyPrint is not available on this server; use engine=soffice')
+    return engine
+
+def html_pdf_options(form, input_info):
+    """Read HTML → PDF options from a request form"""
+    engine = form.get('engine')
+    if engine:
+        html_pdf_engine(engine)
+    return {'engine': engine} if engine else {}
+
+def extract_html_bundle(bundle_path, dest_dir):
+    """Unpack a ZIP bundle checked by sniff_file and return its HTML entry point"""
+    dest_dir = os.path.realpath(dest_dir)
+    with zipfile.ZipFile(bundle_path) as bundle:
+        members = [member for member in bundle.infolist() if not member.is_dir()]
+        index = bundle_index([member.filename for member in members])
+        if index is None:
+            raise ValidationError('Bundle has no index.html')
+        for member in members:
+            target = os.path.realpath(os.path.join(dest_dir, member.filename))
+            if os.path.commonpath([target, dest_dir]) != dest_dir:
+                raise ValidationError(f'Bundle entry outside the bundle: {member.filename}')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with bundle.open(member) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+    return os.path.join(dest_dir, index)
+
+def render_html_to_pdf(html_path, output_path):
+    """Render with WeasyPrint in the pool, honouring cancellation and the conversion timeout"""
+    pool = html_pool()
+    future = pool.submit(html_render.render_pdf, os.path.abspath(html_path), os.path.abspath(output_path))
+    try:
+        stats = wait_for_future(future, 'weasyprint')
+    except BrokenProcessPool:
+        _reset_html_pool(pool)
+        raise ConversionError('Conversion failed: HTML renderer crashed')
+    finally:
+        future.cancel()
+    logger.debug(f"HTML resource cache: {stats}")
+    return output_path
+
+def convert_html_to_pdf(input_path, work_dir, base_name, engine=None):
+    """Convert an HTML file or ZIP bundle to PDF using WeasyPrint (or LibreOffice)"""
+    engine = html_pdf_engine(engine)
+    # Either engine resolves relative links against the document's
+    # directory, so it gets one of its own: never the shared upload folder
+    document_dir = os.path.join(work_dir, 'document')
+    os.makedirs(document_dir)
+    if input_path.lower().endswith('.zip'):
+        html_path = extract_html_bundle(input_path, document_dir)
+    else:
+        html_path = os.path.join(document_dir, os.path.basename(input_path))
+        shutil.copyfile(input_path, html_path)
+    if engine == 'soffice':
+        return soffice_convert(html_path, work_dir, base_name, 'pdf')
+    return render_html_to_pdf(html_path, os.path.join(work_dir, f"{base_name}.pdf"))
+
 @app.route('/api/convert/html-to-pdf', methods=['POST'])
 def html_to_pdf():
-    """Convert HTML file to PDF using LibreOffice"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith(('.html', '.htm')):
-            return jsonify({'error': 'Invalid file type. Please upload .html or .htm'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        output_dir = os.path.join(OUTPUT_FOLDER, f"html_pdf_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'pdf',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.pdf")
-        
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
-        
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pdf")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pdf")
-    
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"HTML to PDF error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    """Convert HTML (a file, ZIP bundle or `html` form field) to PDF"""
+    return handle_conversion('html-to-pdf')
 
 # ==================== PDF → WORD ====================
-@app.route('/api/convert/pdf-to-word', methods=['POST'])
-def pdf_to_word():
+def convert_pdf_to_word(input_path, work_dir, base_name):
     """Convert PDF to Word document using pdf2docx"""
+    output_path = os.path.join(work_dir, f"{base_name}.docx")
+    
+    cv = pdf2docx.Converter(input_path)
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Invalid file type. Please upload .pdf'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        base_name = os.path.splitext(filename)[0]
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.docx")
-        
-        # Convert PDF to DOCX
-        cv = pdf2docx.Converter(input_path)
-        cv.convert(final_output)
+        # pdf2docx's own steps, with pages parsed one at a time so progress
+        # is reported and a cancelled job stops early
+        settings = cv.default_settings
+        report_progress('analyzing')
+        cv.load_pages().parse_document(**settings)
+        pages = [page for page in cv.pages if not page.skip_parsing]
+        for done, page in enumerate(pages):
+            check_cancelled()
+            report_progress('parsing', done, len(pages))
+            try:
+                page.parse(**settings)
+            except Exception as e:
+                if not settings['ignore_page_error']:
+                    raise ConversionError(f'Error when parsing page {page.id + 1}: {e}')
+                logger.warning(f"Skipping page {page.id + 1} of {base_name}: {e}")
+        check_cancelled()
+        report_progress('writing')
+        cv.make_docx(output_path, **settings)
+    finally:
         cv.close()
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.docx")
-    
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PDF to Word error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return output_path
+
+@app.route('/api/convert/pdf-to-word', methods=['POST'])
+def pdf_to_word():
+    """Convert PDF to Word document using pdf2docx"""
+    return handle_conversion('pdf-to-word')
 
 # ==================== PDF → EXCEL ====================
+# The native engine detects tables page by page with PyMuPDF (installed with
+# pdf2docx) in a process pool and streams rows into a write-only workbook,
+# so memory stays flat on huge reports. engine=soffice keeps the old
+# LibreOffice path.
+
+PDF_EXCEL_ENGINE = os.environ.get('PDF_EXCEL_ENGINE', 'native')
+PDF_TABLE_WORKERS = int(os.environ.get('PDF_TABLE_WORKERS', min(4, os.cpu_count() or 1)))
+PDF_TABLE_PAGES_PER_TASK = 8
+NUMBER_PATTERN = re.compile(r'-?\d+(\.\d+)?')
+# Excel keeps 15 significant digits; longer numbers stay text
+EXCEL_MAX_DIGITS = 15
+
+_table_pool = None
+_table_pool_lock = threading.Lock()
+
+def table_pool():
+    """Process pool for table detection, created on first use"""
+    global _table_pool
+    with _table_pool_lock:
+        if _table_pool is None:
+            # spawn: workers only import pdf_tables, never this module
+            _table_pool = ProcessPoolExecutor(
+                max_workers=PDF_TABLE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _table_pool
+
+def pdf_excel_options(form, input_info):
+    """Read PDF → Excel options from a request form"""
+    engine = form.get('engine')
+    if engine and engine not in ('native', 'soffice'):
+        raise ValidationError("engine must be 'native' or 'soffice'")
+    return {'engine': engine} if engine else {}
+
+def _excel_cell(value):
+    """Turn an extracted cell into a worksheet value"""
+    if value is None:
+        return None
+    value = ILLEGAL_CHARACTERS_RE.sub('', value.strip())
+    if not NUMBER_PATTERN.fullmatch(value):
+        return value
+    if len(value.lstrip('-').replace('.', '').lstrip('0')) > EXCEL_MAX_DIGITS:
+        return value
+    # Only when the number prints back as the same text: "007" and "1.10" stay strings
+    number = float(value) if '.' in value else int(value)
+    return number if repr(number) == value else value
+
+def _map_pages(func, input_path, page_count):
+    """Run a pdf_tables function over page batches, yielding results in page order"""
+    batches = [
+        range(start, min(start + PDF_TABLE_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_TABLE_PAGES_PER_TASK)
+    ]
+    if len(batches) <= 1 or PDF_TABLE_WORKERS <= 1:
+        for batch in batches:
+            check_cancelled()
+            report_progress('extracting', batch.start, page_count)
+            yield from func(input_path, batch)
+        report_progress('extracting', page_count, page_count)
+        return
+
+    # Only a window of one batch per worker plus one is submitted, so
+    # finished results never pile up ahead of the workbook writer
+    pool = table_pool()
+    input_path = os.path.abspath(input_path)
+    remaining = iter(batches)
+    pending = deque((batch, pool.submit(func, input_path, batch))
+                    for batch in itertools.islice(remaining, PDF_TABLE_WORKERS + 1))
+    try:
+        while pending:
+            batch, future = pending.popleft()
+            report_progress('extracting', batch.start, page_count)
+            results = wait_for_future(future, 'table extraction')
+            next_batch = next(remaining, None)
+            if next_batch is not None:
+                pending.append((next_batch, pool.submit(func, input_path, next_batch)))
+            yield from results
+        report_progress('extracting', page_count, page_count)
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+def extract_tables_to_xlsx(input_path, output_path):
+    """Write every table found in a PDF to a workbook, one sheet per page"""
+    with pymupdf.open(input_path) as doc:
+        page_count = doc.page_count
+
+    workbook = openpyxl.Workbook(write_only=True)
+    tables_found = 0
+    for page_number, tables in _map_pages(pdf_tables.extract_page_tables, input_path, page_count):
+        if not tables:
+            continue
+        sheet = workbook.create_sheet(f'Page {page_number + 1}')
+        for index, rows in enumerate(tables):
+            if index:
+                sheet.append([])
+            for row in rows:
+                sheet.append([_excel_cell(value) for value in row])
+        tables_found += len(tables)
+
+    if not tables_found:
+        # No ruled tables: keep the text, one line per row
+        sheet = workbook.create_sheet('Text')
+        for _, rows in _map_pages(pdf_tables.extract_page_text_rows, input_path, page_count):
+            for row in rows:
+                sheet.append([_excel_cell(value) for value in row])
+
+    workbook.save(output_path)
+    return output_path
+
+def convert_pdf_to_excel(input_path, work_dir, base_name, engine=None):
+    """Convert PDF to Excel by extracting its tables (or with LibreOffice)"""
+    engine = engine or PDF_EXCEL_ENGINE
+    if engine == 'soffice' or openpyxl is None:
+        return soffice_convert(input_path, work_dir, base_name, 'xlsx')
+    return extract_tables_to_xlsx(input_path, os.path.join(work_dir, f"{base_name}.xlsx"))
+
 @app.route('/api/convert/pdf-to-excel', methods=['POST'])
 def pdf_to_excel():
-    """Convert PDF to Excel using LibreOffice (works for PDFs with tables)"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Invalid file type. Please upload .pdf'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        output_dir = os.path.join(OUTPUT_FOLDER, f"pdf_excel_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # LibreOffice can convert PDF to various formats including Calc (Excel)
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'xlsx',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
+    """Convert PDF to Excel by extracting its tables (or with LibreOffice)"""
+    return handle_conversion('pdf-to-excel')
+
+# ==================== POPPLER RENDERING ====================
+# Pages are rendered by pdftoppm or pdftocairo straight to JPEG files. A run
+# of pages is split between up to PDF_RENDER_THREADS processes, each started
+# through run_command: its own process group, the converter rlimits, and
+# the tree killed on timeout or when the job is cancelled.
+
+PDF_RENDER_THREADS = int(os.environ.get('PDF_RENDER_THREADS', min(4, os.cpu_count() or 1)))
+POPPLER_PAGE_PATTERN = re.compile(r'-(\d+)\.jpg$')
+
+def _poppler_command(renderer, pdf_path, prefix, first, last, dpi=None, size=None, quality=None):
+    cmd = [renderer, '-jpeg', '-f', str(first), '-l', str(last)]
+    if quality:
+        cmd += ['-jpegopt', f'quality={quality}']
+    if size:
+        cmd += ['-scale-to', str(size)]
+    else:
+        cmd += ['-r', str(dpi or 150)]
+    return cmd + [pdf_path, prefix]
+
+def render_pdf_images(pdf_path, output_dir, first, last, renderer='pdftoppm', dpi=None, size=None, quality=None):
+    """
+    Render pages first..last to JPEG files in output_dir, at `dpi` or scaled
+    to `size` pixels on the longest side. Returns the paths in page order.
+    """
+    count = last - first + 1
+    processes = max(1, min(PDF_RENDER_THREADS, count))
+    chunks = []
+    start = first
+    for index in range(processes):
+        end = start + count // processes + (1 if index < count % processes else 0) - 1
+        chunks.append((start, end, os.path.join(output_dir, f'{renderer}-{start}')))
+        start = end + 1
+
+    commands = [_poppler_command(renderer, pdf_path, prefix, start, end, dpi, size, quality)
+                for start, end, prefix in chunks]
+    if len(commands) == 1:
+        results = [run_command(commands[0])]
+    else:
+        # Each thread copies the caller's context so run_command sees its job
+        with ThreadPoolExecutor(max_workers=len(commands)) as pool:
+            futures = [pool.submit(copy_context().run, run_command, cmd) for cmd in commands]
+            results = [future.result() for future in futures]
+    for result in results:
         if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.xlsx")
-        
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
-        
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.xlsx")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.xlsx")
-    
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PDF to Excel error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+            raise ConversionError(f'Rendering failed: {result.stderr.strip()}')
+
+    # poppler pads page numbers to a width that depends on its version and
+    # the page count, so files are matched by prefix and parsed
+    rendered = {}
+    prefix = f'{renderer}-'
+    for entry in os.listdir(output_dir):
+        match = POPPLER_PAGE_PATTERN.search(entry)
+        if match and entry.startswith(prefix):
+            rendered[int(match.group(1))] = os.path.join(output_dir, entry)
+    missing = [page for page in range(first, last + 1) if page not in rendered]
+    if missing:
+        raise ConversionError(f'Rendering failed: no image for page {missing[0]}')
+    return [rendered[page] for page in range(first, last + 1)]
 
 # ==================== PDF → POWERPOINT ====================
+# engine=images renders every page with poppler (in PDF_RENDER_THREADS
+# pdftoppm processes) and writes the deck directly: one full-bleed picture
+# slide per page, each JPEG streamed into the ZIP and deleted as it goes.
+# engine=soffice keeps the LibreOffice path, whose slides stay editable.
+
+PDF_PPTX_ENGINE = os.environ.get('PDF_PPTX_ENGINE', 'soffice')
+PDF_PPTX_DPI = int(os.environ.get('PDF_PPTX_DPI', 150))
+PDF_PPTX_MAX_DPI = 300
+EMU_PER_POINT = 12700
+# PowerPoint rejects slides outside 1in..56in on either side
+SLIDE_MIN_EMU = 914400
+SLIDE_MAX_EMU = 51206400
+
+PPTX_NS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+           'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+           'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+PPTX_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PPTX_EMPTY_TREE = ('<p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+                   '<p:grpSpPr/></p:spTree>')
+
+PPTX_THEME = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="Office Theme">'
+    '<a:themeElements><a:clrScheme name="Office">'
+    '<a:dk1><a:sysClr val="windowText" lastClr="000000"/></a:dk1>'
+    '<a:lt1><a:sysClr val="window" lastClr="FFFFFF"/></a:lt1>'
+    '<a:dk2><a:srgbClr val="1F497D"/></a:dk2><a:lt2><a:srgbClr val="EEECE1"/></a:lt2>'
+    '<a:accent1><a:srgbClr val="4F81BD"/></a:accent1><a:accent2><a:srgbClr val="C0504D"/></a:accent2>'
+    '<a:accent3><a:srgbClr val="9BBB59"/></a:accent3><a:accent4><a:srgbClr val="8064A2"/></a:accent4>'
+    '<a:accent5><a:srgbClr val="4BACC6"/></a:accent5><a:accent6><a:srgbClr val="F79646"/></a:accent6>'
+    '<a:hlink><a:srgbClr val="0000FF"/></a:hlink><a:folHlink><a:srgbClr val="800080"/></a:folHlink>'
+    '</a:clrScheme><a:fontScheme name="Office">'
+    '<a:majorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+    '<a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont>'
+    '</a:fontScheme><a:fmtScheme name="Office">'
+    '<a:fillStyleLst>' + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 + '</a:fillStyleLst>'
+    '<a:lnStyleLst>' + '<a:ln w="9525"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>' * 3 + '</a:lnStyleLst>'
+    '<a:effectStyleLst>' + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 + '</a:effectStyleLst>'
+    '<a:bgFillStyleLst>' + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 + '</a:bgFillStyleLst>'
+    '</a:fmtScheme></a:themeElements></a:theme>'
+)
+
+PPTX_SLIDE_MASTER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<p:sldMaster {PPTX_NS}><p:cSld><p:bg><p:bgRef idx="1001"><a:schemeClr val="bg1"/></p:bgRef></p:bg>'
+    f'{PPTX_EMPTY_TREE}</p:cSld>'
+    '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" accent3="accent3" '
+    'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"/>'
+    '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst></p:sldMaster>'
+)
+
+PPTX_SLIDE_LAYOUT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<p:sldLayout {PPTX_NS} type="blank" preserve="1"><p:cSld name="Blank">{PPTX_EMPTY_TREE}</p:cSld>'
+    '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>'
+)
+
+def pdf_pptx_options(form, input_info):
+    """Read PDF → PowerPoint options from a request form"""
+    options = {}
+    engine = form.get('engine')
+    if engine:
+        if engine not in ('images', 'soffice'):
+            raise ValidationError("engine must be 'images' or 'soffice'")
+        options['engine'] = engine
+    dpi = form.get('dpi')
+    if dpi:
+        if not dpi.isdigit() or not 36 <= int(dpi) <= PDF_PPTX_MAX_DPI:
+            raise ValidationError(f'dpi must be a number from 36 to {PDF_PPTX_MAX_DPI}')
+        options['dpi'] = int(dpi)
+    return options
+
+def _relationships(targets):
+    """Build a .rels part from (type, target) pairs numbered rId1.."""
+    items = ''.join(
+        f'<Relationship Id="rId{index}" Type="{PPTX_REL}/{kind}" Target="{target}"/>'
+        for index, (kind, target) in enumerate(targets, 1)
+    )
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{items}</Relationships>')
+
+def _slide_xml(slide_cx, slide_cy, image_cx, image_cy):
+    """A slide holding one picture, scaled to fit and centred"""
+    scale = min(slide_cx / image_cx, slide_cy / image_cy)
+    cx, cy = int(image_cx * scale), int(image_cy * scale)
+    x, y = (slide_cx - cx) // 2, (slide_cy - cy) // 2
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<p:sld {PPTX_NS}><p:cSld><p:spTree>'
+            '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+            '<p:pic><p:nvPicPr><p:cNvPr id="2" name="Page"/><p:cNvPicPr><a:picLocks noChangeAspect="1"/>'
+            '</p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+            '<p:blipFill><a:blip r:embed="rId2"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            f'<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+            '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>')
+
+def write_image_pptx(image_paths, output_path, slide_size):
+    """Write a PPTX with one picture slide per JPEG, deleting each image once stored"""
+    slide_cx, slide_cy = (
+        min(max(int(side * EMU_PER_POINT), SLIDE_MIN_EMU), SLIDE_MAX_EMU) for side in slide_size
+    )
+    count = len(image_paths)
+    slide_ids = ''.join(f'<p:sldId id="{255 + n}" r:id="rId{n + 1}"/>' for n in range(1, count + 1))
+    slide_types = ''.join(
+        f'<Override PartName="/ppt/slides/slide{n}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>'
+        for n in range(1, count + 1)
+    )
+    parts = {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Default Extension="jpeg" ContentType="image/jpeg"/>'
+            '<Override PartName="/ppt/presentation.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"/>'
+            '<Override PartName="/ppt/slideMasters/slideMaster1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.presentationml.slideMaster+xml"/>'
+            '<Override PartName="/ppt/slideLayouts/slideLayout1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.presentationml.slideLayout+xml"/>'
+            '<Override PartName="/ppt/theme/theme1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.theme+xml"/>'
+            f'{slide_types}</Types>'
+        ),
+        '_rels/.rels': _relationships([('officeDocument', 'ppt/presentation.xml')]),
+        'ppt/presentation.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<p:presentation {PPTX_NS}>'
+            '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+            f'<p:sldIdLst>{slide_ids}</p:sldIdLst>'
+            f'<p:sldSz cx="{slide_cx}" cy="{slide_cy}"/><p:notesSz cx="6858000" cy="9144000"/>'
+            '</p:presentation>'
+        ),
+        'ppt/_rels/presentation.xml.rels': _relationships(
+            [('slideMaster', 'slideMasters/slideMaster1.xml')]
+            + [('slide', f'slides/slide{n}.xml') for n in range(1, count + 1)]
+            + [('theme', 'theme/theme1.xml')]
+        ),
+        'ppt/slideMasters/slideMaster1.xml': PPTX_SLIDE_MASTER,
+        'ppt/slideMasters/_rels/slideMaster1.xml.rels': _relationships(
+            [('slideLayout', '../slideLayouts/slideLayout1.xml'), ('theme', '../theme/theme1.xml')]
+        ),
+        'ppt/slideLayouts/slideLayout1.xml': PPTX_SLIDE_LAYOUT,
+        'ppt/slideLayouts/_rels/slideLayout1.xml.rels': _relationships(
+            [('slideMaster', '../slideMasters/slideMaster1.xml')]
+        ),
+        'ppt/theme/theme1.xml': PPTX_THEME
+    }
+
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as pptx:
+        for name, xml in parts.items():
+            pptx.writestr(name, xml)
+        for n, image_path in enumerate(image_paths, 1):
+            check_cancelled()
+            with Image.open(image_path) as image:
+                image_cx, image_cy = image.size
+            pptx.writestr(f'ppt/slides/slide{n}.xml', _slide_xml(slide_cx, slide_cy, image_cx, image_cy))
+            pptx.writestr(f'ppt/slides/_rels/slide{n}.xml.rels', _relationships(
+                [('slideLayout', '../slideLayouts/slideLayout1.xml'), ('image', f'../media/image{n}.jpeg')]
+            ))
+            # JPEG does not compress further; store it and skip the deflate pass
+            pptx.write(image_path, f'ppt/media/image{n}.jpeg', compress_type=zipfile.ZIP_STORED)
+            os.remove(image_path)
+    return output_path
+
+def render_pdf_to_pptx(input_path, work_dir, base_name, dpi=None):
+    """Render every PDF page to an image slide"""
+    with pymupdf.open(input_path) as doc:
+        if not doc.page_count:
+            raise ConversionError('No pages found in PDF')
+        first_page = doc[0].rect
+        page_count = doc.page_count
+
+    render_dir = os.path.join(work_dir, 'pages')
+    os.makedirs(render_dir, exist_ok=True)
+    image_paths = []
+    # One page per render thread at a time, reporting progress between batches
+    for first in range(1, page_count + 1, PDF_RENDER_THREADS):
+        check_cancelled()
+        report_progress('rendering', first - 1, page_count)
+        last = min(first + PDF_RENDER_THREADS - 1, page_count)
+        image_paths += render_pdf_images(input_path, render_dir, first, last, dpi=dpi or PDF_PPTX_DPI)
+    check_cancelled()
+    if not image_paths:
+        raise ConversionError('No pages found in PDF')
+    report_progress('writing')
+
+    output_path = write_image_pptx(
+        image_paths, os.path.join(work_dir, f"{base_name}.pptx"), (first_page.width, first_page.height)
+    )
+    shutil.rmtree(render_dir, ignore_errors=True)
+    return output_path
+
+def convert_pdf_to_powerpoint(input_path, work_dir, base_name, engine=None, dpi=None):
+    """Convert PDF to PowerPoint using LibreOffice (or as one image per slide)"""
+    engine = engine or PDF_PPTX_ENGINE
+    if engine == 'images':
+        return render_pdf_to_pptx(input_path, work_dir, base_name, dpi=dpi)
+    return soffice_convert(input_path, work_dir, base_name, 'pptx')
+
 @app.route('/api/convert/pdf-to-powerpoint', methods=['POST'])
 def pdf_to_powerpoint():
-    """Convert PDF to PowerPoint using LibreOffice"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Invalid file type. Please upload .pdf'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        output_dir = os.path.join(OUTPUT_FOLDER, f"pdf_pptx_{timestamp}")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # LibreOffice can convert PDF to PowerPoint
-        cmd = [
-            'soffice',
-            '--headless',
-            '--convert-to', 'pptx',
-            '--outdir', output_dir,
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        base_name = os.path.splitext(filename)[0]
-        output_path = os.path.join(output_dir, f"{base_name}.pptx")
-        
-        if not os.path.exists(output_path):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
-        
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.pptx")
-        shutil.move(output_path, final_output)
-        shutil.rmtree(output_dir, ignore_errors=True)
-        
-        cleanup_files(input_path)
-        
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}.pptx")
-    
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PDF to PowerPoint error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    """Convert PDF to PowerPoint using LibreOffice (or as one image per slide)"""
+    return handle_conversion('pdf-to-powerpoint')
 
 # ==================== PDF → JPG ====================
+# The renderer writes JPEGs straight into the job's directory and each file
+# is streamed into the ZIP (stored, JPEG does not compress further) and
+# deleted, so pages never pass through Python as pixels. pdftoppm and
+# pdftocairo run PDF_RENDER_THREADS processes per batch; Ghostscript renders
+# a batch in one process with as many rendering threads.
+
+PDF_JPG_RENDERERS = ('pdftoppm', 'pdftocairo', 'gs')
+PDF_JPG_RENDERER = os.environ.get('PDF_JPG_RENDERER', 'pdftoppm')
+PDF_JPG_DPI = int(os.environ.get('PDF_JPG_DPI', 300))
+PDF_JPG_QUALITY = int(os.environ.get('PDF_JPG_QUALITY', 95))
+
+def pdf_jpg_options(form, input_info):
+    """Read PDF → JPG options from a request form"""
+    options = {}
+    renderer = form.get('renderer')
+    if renderer:
+        if renderer not in PDF_JPG_RENDERERS:
+            raise ValidationError(f"renderer must be one of: {', '.join(PDF_JPG_RENDERERS)}")
+        options['renderer'] = renderer
+    return options
+
+def _gs_render(input_path, render_dir, first, last, dpi, quality):
+    """Render pages first..last to JPEGs with Ghostscript; returns their paths in page order"""
+    pattern = os.path.join(render_dir, f"gs-{first}-%d.jpg")
+    cmd = [
+        'gswin64c' if os.name == 'nt' else 'gs',
+        '-dBATCH',
+        '-dNOPAUSE',
+        '-dSAFER',
+        '-dQUIET',
+        '-sDEVICE=jpeg',
+        f'-r{dpi}',
+        f'-dJPEGQ={quality}',
+        '-dTextAlphaBits=4',
+        '-dGraphicsAlphaBits=4',
+        f'-dNumRenderingThreads={PDF_RENDER_THREADS}',
+        f'-dFirstPage={first}',
+        f'-dLastPage={last}',
+        f'-sOutputFile={pattern}',
+        input_path
+    ]
+    result = run_command(cmd)
+    if result.returncode != 0:
+        raise ConversionError(f'Conversion failed: {result.stderr}')
+    paths = [pattern % index for index in range(1, last - first + 2)]
+    if not all(os.path.exists(path) for path in paths):
+        raise ConversionError('Conversion failed: Output file not found')
+    return paths
+
+def render_pdf_jpegs(input_path, render_dir, first, last, renderer=None, dpi=None, quality=None):
+    """Render pages first..last to JPEG files in render_dir; returns their paths in page order"""
+    renderer = renderer or PDF_JPG_RENDERER
+    dpi = dpi or PDF_JPG_DPI
+    quality = quality or PDF_JPG_QUALITY
+    if renderer == 'gs':
+        return _gs_render(input_path, render_dir, first, last, dpi, quality)
+    return render_pdf_images(input_path, render_dir, first, last, renderer, dpi=dpi, quality=quality)
+
+def convert_pdf_to_jpg(input_path, work_dir, base_name, renderer=None):
+    """Convert PDF to JPG images with poppler or Ghostscript"""
+    with pymupdf.open(input_path) as doc:
+        page_count = doc.page_count
+    if not page_count:
+        raise ConversionError('No pages found in PDF')
+
+    render_dir = os.path.join(work_dir, 'pages')
+    os.makedirs(render_dir, exist_ok=True)
+    report_progress('rendering', 0, page_count)
+    if page_count == 1:
+        output_path = os.path.join(work_dir, f"{base_name}.jpg")
+        os.replace(render_pdf_jpegs(input_path, render_dir, 1, 1, renderer)[0], output_path)
+        report_progress('rendering', 1, 1)
+        shutil.rmtree(render_dir, ignore_errors=True)
+        return output_path
+
+    # Multiple pages: create ZIP, one batch of pages on disk at a time
+    output_path = os.path.join(work_dir, f"{base_name}.zip")
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED) as zipf:
+        for first in range(1, page_count + 1, PDF_RENDER_THREADS):
+            check_cancelled()
+            last = min(first + PDF_RENDER_THREADS - 1, page_count)
+            paths = render_pdf_jpegs(input_path, render_dir, first, last, renderer)
+            for page, image_path in zip(range(first, last + 1), paths):
+                zipf.write(image_path, f"{base_name}_page_{page}.jpg")
+                os.remove(image_path)
+            report_progress('rendering', last, page_count)
+    shutil.rmtree(render_dir, ignore_errors=True)
+    return output_path
+
 @app.route('/api/convert/pdf-to-jpg', methods=['POST'])
 def pdf_to_jpg():
-    """Convert PDF to JPG images using pdf2image"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename) or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Invalid file type. Please upload .pdf'}), 400
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
-        file.save(input_path)
-        
-        # Convert PDF pages to images
-        images = convert_from_path(input_path, dpi=300)
-        
-        if not images:
-            cleanup_files(input_path)
-            return jsonify({'error': 'No pages found in PDF'}), 500
-        
-        # If single page, return single JPG; if multiple pages, create ZIP
-        base_name = os.path.splitext(filename)[0]
-        
-        if len(images) == 1:
-            # Single page - return JPG
-            final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.jpg")
-            images[0].save(final_output, 'JPEG', quality=95)
-            cleanup_files(input_path)
-            return send_file(final_output, as_attachment=True, download_name=f"{base_name}.jpg")
-        else:
-            # Multiple pages - create ZIP
-            zip_path = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for i, img in enumerate(images, 1):
-                    img_path = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}_page_{i}.jpg")
-                    img.save(img_path, 'JPEG', quality=95)
-                    zipf.write(img_path, f"{base_name}_page_{i}.jpg")
-                    os.remove(img_path)
-            
-            cleanup_files(input_path)
-            return send_file(zip_path, as_attachment=True, download_name=f"{base_name}.zip")
-    
-    except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PDF to JPG error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    """Convert PDF to JPG images with poppler or Ghostscript"""
+    return handle_conversion('pdf-to-jpg')
 
 # ==================== PDF → PDF/A ====================
+def convert_pdf_to_pdfa(input_path, work_dir, base_name):
+    """Convert PDF to PDF/A format using Ghostscript"""
+    output_path = os.path.join(work_dir, f"{base_name}_pdfa.pdf")
+    
+    # Convert to PDF/A-1b using Ghostscript
+    cmd = [
+        'gswin64c' if os.name == 'nt' else 'gs',
+        '-dPDFA=1',
+        '-dBATCH',
+        '-dNOPAUSE',
+        '-dUseCIEColor',
+        '-sProcessColorModel=DeviceRGB',
+        '-sDEVICE=pdfwrite',
+        '-sPDFACompatibilityPolicy=1',
+        f'-sOutputFile={output_path}',
+        input_path
+    ]
+    
+    result = run_command(cmd)
+    
+    if result.returncode != 0:
+        raise ConversionError(f'Conversion failed: {result.stderr}')
+    
+    if not os.path.exists(output_path):
+        raise ConversionError('Conversion failed: Output file not found')
+    return output_path
+
 @app.route('/api/convert/pdf-to-pdfa', methods=['POST'])
 def pdf_to_pdfa():
     """Convert PDF to PDF/A format using Ghostscript"""
+    return handle_conversion('pdf-to-pdfa')
+
+# ==================== OFFICE → JPG ====================
+# Thumbnails and per-slide images straight from Word, Excel and PowerPoint
+# files. The office → PDF step runs once per distinct file (keyed by content
+# hash) and its PDF is cached, so asking again for other sizes or pages only
+# costs the poppler render.
+
+OFFICE_IMAGE_SIZE = int(os.environ.get('OFFICE_IMAGE_SIZE', 1280))
+OFFICE_IMAGE_MAX_SIZE = 4096
+OFFICE_IMAGE_QUALITY = 85
+PDF_CACHE_TTL = int(os.environ.get('PDF_CACHE_TTL', 24 * 3600))
+PAGE_RANGE_PATTERN = re.compile(r'(\d+)(?:\s*-\s*(\d+))?')
+
+def parse_page_ranges(spec):
+    """Parse '1,3-5' into [(1, 1), (3, 5)] (1-based, inclusive)"""
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = PAGE_RANGE_PATTERN.fullmatch(part)
+        if not match:
+            raise ValidationError(f'Invalid page range: {part}')
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first:
+            raise ValidationError(f'Invalid page range: {part}')
+        ranges.append((first, last))
+    return ranges
+
+def office_image_options(form, input_info):
+    """Read office → image options from a request form"""
+    options = {}
+    size = form.get('size')
+    if size:
+        if not size.isdigit() or not 16 <= int(size) <= OFFICE_IMAGE_MAX_SIZE:
+            raise ValidationError(f'size must be a number of pixels from 16 to {OFFICE_IMAGE_MAX_SIZE}')
+        options['size'] = int(size)
+    pages = parse_page_ranges(form.get('pages', ''))
+    if pages:
+        options['pages'] = pages
+    return options
+
+def cached_pdf(input_path, work_dir):
+    """Fetch the cached PDF rendering of an office file into work_dir, converting it on a miss"""
+    digest = file_sha256(input_path)
+    cache_key = f"pdf-cache/{digest}.pdf"
+    pdf_path = os.path.join(work_dir, f"{digest}.pdf")
+    try:
+        storage.load(cache_key, pdf_path)
+        storage.touch(cache_key)
+        logger.info(f"PDF cache hit for {digest[:12]}")
+        return pdf_path
+    except FileNotFoundError:
+        pass
+
+    kind = conversion_chain(os.path.basename(input_path), 'pdf')[0]
+    converted = CONVERTERS[kind]['function'](input_path, work_dir, digest)
+    check_cancelled()
+    cache_copy = os.path.join(work_dir, f"{digest}.cache.pdf")
+    shutil.copyfile(converted, cache_copy)
+    storage.save(cache_key, cache_copy)
+    return converted
+
+def _page_runs(pages):
+    """Group sorted page numbers into contiguous (first, last) runs"""
+    for _, run in itertools.groupby(enumerate(pages), lambda item: item[1] - item[0]):
+        run = [page for _, page in run]
+        yield run[0], run[-1]
+
+def render_pdf_pages(pdf_path, work_dir, base_name, size, ranges=None):
+    """Render the selected pages to JPEGs no larger than `size` pixels; returns one JPG or a ZIP"""
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+    if not page_count:
+        raise ConversionError('No pages found in document')
+    ranges = ranges or [(1, page_count)]
+    pages = sorted({
+        page for first, last in ranges if first <= page_count
+        for page in range(first, min(last, page_count) + 1)
+    })
+    if not pages:
+        raise ValidationError(f'The document has only {page_count} page(s)')
+
+    render_dir = os.path.join(work_dir, 'pages')
+    os.makedirs(render_dir, exist_ok=True)
+    images = []
+    # Runs are split into one page per render thread to report progress
+    batches = [
+        (start, min(start + PDF_RENDER_THREADS - 1, last))
+        for first, last in _page_runs(pages)
+        for start in range(first, last + 1, PDF_RENDER_THREADS)
+    ]
+    for first, last in batches:
+        check_cancelled()
+        report_progress('rendering', len(images), len(pages))
+        paths = render_pdf_images(pdf_path, render_dir, first, last, size=size, quality=OFFICE_IMAGE_QUALITY)
+        images.extend(zip(range(first, last + 1), paths))
+    check_cancelled()
+    report_progress('rendering', len(images), len(pages))
+
+    if len(images) == 1:
+        output_path = os.path.join(work_dir, f"{base_name}.jpg")
+        os.replace(images[0][1], output_path)
+    else:
+        output_path = os.path.join(work_dir, f"{base_name}.zip")
+        with zipfile.ZipFile(output_path, 'w') as zipf:
+            for page, image_path in images:
+                zipf.write(image_path, f"{base_name}_page_{page}.jpg")
+                os.remove(image_path)
+    shutil.rmtree(render_dir, ignore_errors=True)
+    return output_path
+
+def convert_office_to_jpg(input_path, work_dir, base_name, size=None, pages=None):
+    """Convert Word, Excel or PowerPoint pages to JPG images through a cached PDF"""
+    pdf_path = cached_pdf(input_path, work_dir)
+    return render_pdf_pages(pdf_path, work_dir, base_name, size or OFFICE_IMAGE_SIZE, pages)
+
+@app.route('/api/convert/office-to-jpg', methods=['POST'])
+def office_to_jpg():
+    """Convert Word, Excel or PowerPoint pages to JPG images through a cached PDF"""
+    return handle_conversion('office-to-jpg')
+
+# ==================== PDF MERGE / SPLIT / EXTRACT ====================
+# Page operations copy PDF objects with PyMuPDF; nothing is re-rendered.
+# Pages are copied in batches of PDF_PAGES_PER_SAVE: each batch is appended
+# to the output file as an incremental update and both documents are closed
+# again, so memory stays flat on thousand-page documents. The price is
+# size: each batch copies the fonts and images its pages share, so an
+# output written in N batches can hold N copies of them.
+# PDF_COMPACT_OUTPUT=1 merges the duplicates afterwards (a garbage=4 save:
+# small memory, but seconds per thousand pages). Merge takes several `file`
+# fields (or one ZIP of PDFs, merged in name order); split writes its ZIP
+# one part at a time. The ZIP is stored like any other result rather than
+# streamed, so it gets the same ETag, Range and job download handling.
+
+PDF_PAGES_PER_SAVE = int(os.environ.get('PDF_PAGES_PER_SAVE', 200))
+PDF_COMPACT_OUTPUT = os.environ.get('PDF_COMPACT_OUTPUT', '0') == '1'
+PDF_MERGE_MAX_FILES = int(os.environ.get('PDF_MERGE_MAX_FILES', 100))
+
+def pdf_page_count(path):
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+def write_pages(output_path, runs, report=True):
+    """Copy page runs [(pdf_path, first, last), ...] (1-based, inclusive) into a new PDF"""
+    batches = [
+        (path, start, min(start + PDF_PAGES_PER_SAVE - 1, last))
+        for path, first, last in runs
+        for start in range(first, last + 1, PDF_PAGES_PER_SAVE)
+    ]
+    total = sum(last - first + 1 for _, first, last in batches)
+    done = 0
+    for index, (path, first, last) in enumerate(batches):
+        check_cancelled()
+        with pymupdf.open(path) as source:
+            output = pymupdf.open(output_path) if index else pymupdf.open()
+            try:
+                output.insert_pdf(source, from_page=first - 1, to_page=last - 1)
+                if index:
+                    output.saveIncr()
+                else:
+                    output.save(output_path)
+            finally:
+                output.close()
+        done += last - first + 1
+        if report:
+            report_progress('copying', done, total)
+
+    if PDF_COMPACT_OUTPUT and len(batches) > 1:
+        check_cancelled()
+        if report:
+            report_progress('compacting')
+        compact_path = f"{output_path}.compact"
+        with pymupdf.open(output_path) as output:
+            output.save(compact_path, garbage=4)
+        os.replace(compact_path, output_path)
+    return output_path
+
+def merge_inputs(input_path, work_dir):
+    """PDFs to merge: the input itself, or the PDFs in a ZIP in name order"""
+    if not input_path.lower().endswith('.zip'):
+        return [input_path]
+    input_dir = os.path.join(work_dir, 'inputs')
+    os.makedirs(input_dir, exist_ok=True)
+    paths = []
+    with zipfile.ZipFile(input_path) as bundle:
+        members = sorted(
+            (member for member in bundle.infolist()
+             if not member.is_dir() and not member.filename.startswith('__MACOSX/')
+             and not os.path.basename(member.filename).startswith('.')),
+            key=lambda member: member.filename
+        )
+        if len(members) > PDF_MERGE_MAX_FILES:
+            raise ValidationError(f'At most {PDF_MERGE_MAX_FILES} files can be merged')
+        for number, member in enumerate(members, 1):
+            name = os.path.basename(member.filename)
+            if not name.lower().endswith('.pdf'):
+                raise ValidationError(f'{name} is not a PDF')
+            # Unpacked under a generated name, never the member's own path
+            path = os.path.join(input_dir, f'{number:04d}.pdf')
+            with bundle.open(member) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            try:
+                sniff_file(path, name)
+            except ValidationError as e:
+                raise ValidationError(f'{name}: {e}')
+            paths.append(path)
+    if not paths:
+        raise ValidationError('No PDF files to merge')
+    return paths
+
+def merge_pdfs(input_path, work_dir, base_name):
+    """Concatenate PDFs into one"""
+    runs = [(path, 1, pdf_page_count(path)) for path in merge_inputs(input_path, work_dir)]
+    return write_pages(os.path.join(work_dir, f"{base_name}.pdf"), [run for run in runs if run[2]])
+
+def pdf_split_options(form, input_info):
+    """Read PDF split options: page ranges, one file each, or a fixed number of pages per file"""
+    ranges = parse_page_ranges(form.get('ranges', ''))
+    every = form.get('every')
+    if ranges and every:
+        raise ValidationError('Pass either ranges or every, not both')
+    if every:
+        if not every.isdigit() or int(every) < 1:
+            raise ValidationError('every must be a number of pages')
+        return {'every': int(every)}
+    return {'ranges': ranges} if ranges else {}
+
+def split_pdf(input_path, work_dir, base_name, ranges=None, every=None):
+    """Split a PDF into parts (one per page by default), returned as a ZIP"""
+    page_count = pdf_page_count(input_path)
+    if ranges:
+        parts = [(first, min(last, page_count)) for first, last in ranges if first <= page_count]
+    else:
+        every = every or 1
+        parts = [(start, min(start + every - 1, page_count)) for start in range(1, page_count + 1, every)]
+    parts = list(dict.fromkeys(tuple(part) for part in parts))
+    if not parts:
+        raise ValidationError(f'The document has only {page_count} page(s)')
+
+    output_path = os.path.join(work_dir, f"{base_name}.zip")
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for number, (first, last) in enumerate(parts):
+            report_progress('splitting', number, len(parts))
+            name = f"{base_name}_page_{first}.pdf" if first == last else f"{base_name}_pages_{first}-{last}.pdf"
+            part_path = write_pages(os.path.join(work_dir, name), [(input_path, first, last)], report=False)
+            archive.write(part_path, name)
+            os.remove(part_path)
+    report_progress('splitting', len(parts), len(parts))
+    return output_path
+
+def pdf_extract_options(form, input_info):
+    """Read the pages to extract, e.g. '1,3-5', in output order"""
+    pages = parse_page_ranges(form.get('pages', ''))
+    if not pages:
+        raise ValidationError('pages is required, e.g. 1,3-5')
+    return {'pages': pages}
+
+def extract_pdf_pages(input_path, work_dir, base_name, pages=None):
+    """Copy the selected pages, in the order given, into a new PDF"""
+    page_count = pdf_page_count(input_path)
+    runs = [
+        (input_path, first, min(last, page_count))
+        for first, last in pages or [(1, page_count)] if first <= page_count
+    ]
+    if not runs:
+        raise ValidationError(f'The document has only {page_count} page(s)')
+    return write_pages(os.path.join(work_dir, f"{base_name}_pages.pdf"), runs)
+
+@app.route('/api/convert/pdf-merge', methods=['POST'])
+def pdf_merge():
+    """Merge several PDFs (repeated `file` fields or a ZIP of PDFs) into one"""
+    return handle_conversion('pdf-merge')
+
+@app.route('/api/convert/pdf-split', methods=['POST'])
+def pdf_split():
+    """Split a PDF into a ZIP of parts"""
+    return handle_conversion('pdf-split')
+
+@app.route('/api/convert/pdf-extract', methods=['POST'])
+def pdf_extract():
+    """Extract pages of a PDF into a new PDF"""
+    return handle_conversion('pdf-extract')
+
+# ==================== CONVERTER REGISTRY ====================
+# target is the output format name used by the library API and CLI;
+# options (optional) parses per-request converter keyword arguments from the
+# form; cost_per_page is the relative cost of one input page, used by the scheduler;
+# max_upload_mb (optional) is a per-kind upload limit below MAX_UPLOAD_MB;
+# client_image (optional) asks the web UI to shrink images before uploading;
+# text_field (optional) is a form field that can carry the document inline;
+# max_files (optional) lets one request send several files, bundled into a ZIP;
+# operation marks page operations, which the library API and CLI do not chain
+CONVERTERS = {
+    'word-to-pdf': {
+        'function': convert_word_to_pdf,
+        'target': 'pdf',
+        'label': 'Word to PDF',
+        'extensions': ('.doc', '.docx'),
+        'invalid_type_message': 'Invalid file type. Please upload .doc or .docx',
+        'cost_per_page': 1.0
+    },
+    'excel-to-pdf': {
+        'function': convert_excel_to_pdf,
+        'options': excel_options,
+        'target': 'pdf',
+        'label': 'Excel to PDF',
+        'extensions': ('.xls', '.xlsx'),
+        'invalid_type_message': 'Invalid file type. Please upload .xls or .xlsx',
+        'cost_per_page': 2.0
+    },
+    'powerpoint-to-pdf': {
+        'function': convert_powerpoint_to_pdf,
+        'target': 'pdf',
+        'label': 'PowerPoint to PDF',
+        'extensions': ('.ppt', '.pptx'),
+        'invalid_type_message': 'Invalid file type. Please upload .ppt or .pptx',
+        'cost_per_page': 1.5
+    },
+    'jpg-to-pdf': {
+        'function': convert_jpg_to_pdf,
+        'target': 'pdf',
+        'label': 'JPG to PDF',
+        'extensions': ('.jpg', '.jpeg', '.png'),
+        'invalid_type_message': 'Invalid file type. Please upload .jpg, .jpeg, or .png',
+        'max_upload_mb': 50,
+        'client_image': {'max_edge': IMAGE_UPLOAD_MAX_EDGE, 'quality': IMAGE_UPLOAD_QUALITY},
+        'cost_per_page': 0.5
+    },
+    'html-to-pdf': {
+        'function': convert_html_to_pdf,
+        'target': 'pdf',
+        'label': 'HTML to PDF',
+        'extensions': ('.html', '.htm', '.zip'),
+        'invalid_type_message': 'Invalid file type. Please upload .html, .htm or a .zip bundle',
+        'options': html_pdf_options,
+        'text_field': 'html',
+        'max_upload_mb': 10,
+        'cost_per_page': 1.0
+    },
+    'pdf-to-word': {
+        'function': convert_pdf_to_word,
+        'target': 'docx',
+        'label': 'PDF to Word',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload .pdf',
+        'cost_per_page': 3.0
+    },
+    'pdf-to-excel': {
+        'function': convert_pdf_to_excel,
+        'options': pdf_excel_options,
+        'target': 'xlsx',
+        'label': 'PDF to Excel',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload .pdf',
+        'cost_per_page': 2.0
+    },
+    'pdf-to-powerpoint': {
+        'function': convert_pdf_to_powerpoint,
+        'options': pdf_pptx_options,
+        'target': 'pptx',
+        'label': 'PDF to PowerPoint',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload .pdf',
+        'cost_per_page': 2.0
+    },
+    'pdf-to-jpg': {
+        'function': convert_pdf_to_jpg,
+        'options': pdf_jpg_options,
+        'target': 'jpg',
+        'label': 'PDF to JPG',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload .pdf',
+        'cost_per_page': 1.5
+    },
+    'pdf-to-pdfa': {
+        'function': convert_pdf_to_pdfa,
+        'target': 'pdfa',
+        'label': 'PDF to PDF/A',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload .pdf',
+        'cost_per_page': 0.5
+    },
+    'office-to-jpg': {
+        'function': convert_office_to_jpg,
+        'options': office_image_options,
+        'target': 'jpg',
+        'label': 'Office to JPG',
+        'extensions': ('.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'),
+        'invalid_type_message': 'Invalid file type. Please upload a Word, Excel or PowerPoint file',
+        'cost_per_page': 1.5
+    },
+    'pdf-merge': {
+        'function': merge_pdfs,
+        'target': 'pdf',
+        'label': 'Merge PDF',
+        'extensions': ('.pdf', '.zip'),
+        'invalid_type_message': 'Invalid file type. Please upload PDF files or a ZIP of PDFs',
+        'max_files': PDF_MERGE_MAX_FILES,
+        'operation': True,
+        'cost_per_page': 0.05
+    },
+    'pdf-split': {
+        'function': split_pdf,
+        'options': pdf_split_options,
+        'target': 'zip',
+        'label': 'Split PDF',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload a PDF file',
+        'operation': True,
+        'cost_per_page': 0.05
+    },
+    'pdf-extract': {
+        'function': extract_pdf_pages,
+        'options': pdf_extract_options,
+        'target': 'pdf',
+        'label': 'Extract PDF pages',
+        'extensions': ('.pdf',),
+        'invalid_type_message': 'Invalid file type. Please upload a PDF file',
+        'operation': True,
+        'cost_per_page': 0.05
+    }
+}
+
+# ==================== LIBRARY API ====================
+# The converters can be used without Flask, e.g. for bulk offline jobs:
+#
+#     from app import convert_file
+#     convert_file('report.docx', 'pdfa', 'out/')
+
+def conversion_chain(filename, target):
+    """
+    Converter kinds to run, in order, to turn `filename` into `target`.
+
+    Office, image and HTML inputs reach PDF-derived targets (e.g. 'pdfa',
+    'jpg') through an intermediate PDF. Returns [] if there is no route.
+    """
+    name = filename.lower()
+    for kind, converter in CONVERTERS.items():
+        if converter.get('operation'):
+            continue
+        if converter['target'] == target and name.endswith(converter['extensions']):
+            return [kind]
+    # A PDF has no route through an intermediate PDF
+    if target != 'pdf' and not name.endswith('.pdf'):
+        to_pdf = conversion_chain(filename, 'pdf')
+        from_pdf = conversion_chain('intermediate.pdf', target)
+        if to_pdf and from_pdf:
+            return to_pdf + from_pdf
+    return []
+
+def convert_file(input_path, target, output_dir, base_name=None, **options):
+    """
+    Convert a file outside of a request and return the output path.
+
+    Uses the same validation and backends as the HTTP routes and raises
+    ValidationError or ConversionError on failure. Keyword options (e.g.
+    sheets=['Summary'] for Excel) go to the first converter in the chain.
+    """
+    filename = os.path.basename(input_path)
+    chain = conversion_chain(filename, target)
+    if not chain:
+        raise ValidationError(f'Cannot convert {filename} to {target}')
+    sniff_file(input_path, filename)
+
+    base_name = base_name or os.path.splitext(filename)[0]
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='.filecnvt-', dir=output_dir)
+    try:
+        current = input_path
+        for step, kind in enumerate(chain):
+            current = CONVERTERS[kind]['function'](current, work_dir, base_name, **(options if step == 0 else {}))
+        output_path = os.path.join(output_dir, os.path.basename(current))
+        os.replace(current, output_path)
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# ==================== RESUMABLE UPLOADS ====================
+# Large files can be uploaded in chunks: create a session, PUT chunks at
+# their offsets (resuming after a dropped connection), then complete it with
+# a checksum. Completed uploads are kept in storage by content hash and can
+# be fed to any /api/convert/* route as `upload_id`, so retries cost no
+# re-upload. Sessions in progress live in UPLOAD_FOLDER.
+
+UPLOAD_SESSION_FOLDER = os.path.join(UPLOAD_FOLDER, 'sessions')
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 3600))
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+os.makedirs(UPLOAD_SESSION_FOLDER, exist_ok=True)
+
+upload_locks = {}
+upload_locks_lock = threading.Lock()
+
+def _upload_lock(upload_id):
+    with upload_locks_lock:
+        return upload_locks.setdefault(upload_id, threading.Lock())
+
+def _upload_meta_path(upload_id):
+    return os.path.join(UPLOAD_SESSION_FOLDER, f"{upload_id}.json")
+
+def _upload_data_path(upload_id):
+    return os.path.join(UPLOAD_SESSION_FOLDER, f"{upload_id}.part")
+
+def _blob_key(sha256):
+    return f"blobs/{sha256}"
+
+def save_upload(upload):
+    """Persist upload session metadata atomically"""
+    meta_path = _upload_meta_path(upload['upload_id'])
+    with open(f"{meta_path}.tmp", 'w') as f:
+        json.dump(upload, f)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+def load_upload(upload_id):
+    """Load an upload session, or None if it does not exist"""
+    if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+        return None
+    try:
+        with open(_upload_meta_path(upload_id)) as f:
+            upload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if upload['status'] == 'uploading':
+        data_path = _upload_data_path(upload_id)
+        upload['offset'] = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+    return upload
+
+def file_sha256(path):
+    """Hash a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def expire_uploads():
+    """Remove upload sessions that have not been touched for the TTL"""
+    cutoff = time.time() - UPLOAD_SESSION_TTL
+    for entry in os.scandir(UPLOAD_SESSION_FOLDER):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def link_upload(upload, dest_path):
+    """Fetch a completed upload's content to dest_path (a hard link on local storage)"""
+    blob_key = _blob_key(upload['sha256'])
+    storage.load(blob_key, dest_path)
+    storage.touch(blob_key)
+
+def _upload_response(upload, status=200):
+    response = jsonify(upload)
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload['offset'])
+    return response
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload session"""
+    data = request.get_json(silent=True) or {}
+    original_name = data.get('filename') or ''
+    size = data.get('size')
+    sha256 = (data.get('sha256') or '').lower() or None
+
+    if not allowed_file(original_name):
+        return jsonify({'error': 'Invalid file type'}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({'error': 'A positive integer size is required'}), 400
+    if size > MAX_UPLOAD_MB * 1024 * 1024:
+        return upload_too_large(MAX_UPLOAD_MB)
+    if sha256 and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return jsonify({'error': 'sha256 must be a hex SHA-256 digest'}), 400
+
+    expire_uploads()
+    expire_storage()
+
+    upload = {
+        'upload_id': uuid.uuid4().hex,
+        'filename': secure_filename(original_name),
+        'size': size,
+        'offset': 0,
+        'sha256': sha256,
+        'status': 'uploading',
+        'chunk_size': UPLOAD_CHUNK_SIZE
+    }
+
+    # The same content was uploaded before: nothing to transfer
+    if sha256 and storage.size(_blob_key(sha256)) == size:
+        storage.touch(_blob_key(sha256))
+        upload.update({'status': 'complete', 'offset': size})
+    else:
+        open(_upload_data_path(upload['upload_id']), 'wb').close()
+
+    save_upload(upload)
+    return _upload_response(upload, 201)
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'HEAD'])
+def upload_status(upload_id):
+    """Report how many bytes of an upload the server has"""
+    upload = load_upload(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return _upload_response(upload)
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT', 'PATCH'])
+def upload_chunk(upload_id):
+    """
+    Append a chunk at the offset given by the Upload-Offset header.
+
+    Bytes the server already has are skipped, so re-sending a chunk after a
+    lost response is harmless. A gap returns 409 with the current offset.
+    """
+    with _upload_lock(upload_id):
+        upload = load_upload(upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if upload['status'] != 'uploading':
+            return _upload_response(upload)
+
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return jsonify({'error': 'Upload-Offset header is required'}), 400
+
+        current = upload['offset']
+        if offset < 0 or offset > current:
+            return _upload_response(upload, 409)
+
+        stream = request.stream
+        skip = current - offset
+        written = 0
+        with open(_upload_data_path(upload_id), 'ab') as f:
+            while True:
+                block = stream.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                if skip:
+                    dropped = min(skip, len(block))
+                    block = block[dropped:]
+                    skip -= dropped
+                if current + written + len(block) > upload['size']:
+                    f.truncate(current + written)
+                    return jsonify({'error': 'Chunk exceeds the declared upload size'}), 400
+                f.write(block)
+                written += len(block)
+
+        upload['offset'] = current + written
+        return _upload_response(upload)
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Verify an upload's checksum and make it available for conversion"""
+    with _upload_lock(upload_id):
+        upload = load_upload(upload_id)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if upload['status'] == 'complete':
+            return _upload_response(upload)
+        if upload['offset'] != upload['size']:
+            return _upload_response(upload, 409)
+
+        data = request.get_json(silent=True) or {}
+        expected = (data.get('sha256') or upload['sha256'] or '').lower()
+        data_path = _upload_data_path(upload_id)
+        actual = file_sha256(data_path)
+        if expected and expected != actual:
+            # Corrupt transfer; start over rather than keep bad bytes
+            open(data_path, 'wb').close()
+            upload['offset'] = 0
+            save_upload(upload)
+            return jsonify({'error': 'Checksum mismatch, upload restarted', 'sha256': actual}), 422
+
+        if storage.size(_blob_key(actual)) is not None:
+            cleanup_files(data_path)
+            storage.touch(_blob_key(actual))
+        else:
+            storage.save(_blob_key(actual), data_path)
+
+        upload.update({'sha256': actual, 'status': 'complete'})
+        save_upload(upload)
+        return _upload_response(upload)
+
+# ==================== JOBS ====================
+# Clients that pick their own job id (X-Job-Id) can follow a conversion
+# while its POST is still running: GET /api/jobs/<id>/events streams the
+# phase and page progress reported by the converters as Server-Sent Events.
+
+PROGRESS_STREAM_INTERVAL = 0.5
+PROGRESS_KEEPALIVE_SECONDS = 15
+# How long a progress stream waits for a job that has not started yet
+PROGRESS_STREAM_WAIT = float(os.environ.get('PROGRESS_STREAM_WAIT', 30))
+
+def job_progress(job_id):
+    """State and progress of a job running here or in the queue, or None"""
+    with active_jobs_lock:
+        job = active_jobs.get(job_id)
+    if job is not None:
+        progress = job.progress()
+        return dict(progress, state='queued' if progress['phase'] == 'queued' else 'running')
+    queued = broker.get(job_id) if broker is not None else None
+    if queued is not None:
+        progress = queued.get('progress') or {}
+        if queued['state'] == 'queued':
+            progress = {'phase': 'queued'}
+        return dict(progress, state=queued['state'], error=queued.get('error'))
+    if load_result_meta(job_id) is not None:
+        return {'state': 'done'}
+    return None
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the state of a conversion"""
+    if broker is not None:
+        job = broker.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({
+            'job_id': job_id,
+            'kind': job['kind'],
+            'lane': job['lane'],
+            'state': job['state'],
+            'attempts': job['attempts'],
+            'worker': job.get('worker'),
+            'error': job.get('error'),
+            'progress': job.get('progress')
+        })
+    with active_jobs_lock:
+        job = active_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job_id': job_id, 'state': 'running', 'progress': job.progress()})
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream a job's progress as Server-Sent Events until it finishes"""
+    if not re.fullmatch(r'[A-Za-z0-9_-]{1,64}', job_id):
+        return jsonify({'error': 'Job not found'}), 404
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    def stream():
+        yield 'retry: 2000\n\n'
+        last = None
+        seen = sent = time.time()
+        while True:
+            now = time.time()
+            status = job_progress(job_id)
+            if status is None:
+                # Not started yet (the upload may still be in flight), or gone
+                if now - seen > PROGRESS_STREAM_WAIT:
+                    return
+            elif status['state'] in FINISHED_JOB_STATES:
+                if status['state'] == 'done':
+                    yield event('done', {'state': 'done', 'result': f'/api/jobs/{job_id}/result'})
+                else:
+                    yield event('failed', status)
+                return
+            else:
+                seen = now
+                if status != last:
+                    last = status
+                    sent = now
+                    yield event('progress', status)
+            if now - sent >= PROGRESS_KEEPALIVE_SECONDS:
+                sent = now
+                yield ': keepalive\n\n'
+            time.sleep(PROGRESS_STREAM_INTERVAL)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a conversion, killing its converter processes"""
+    with active_jobs_lock:
+        job = active_jobs.get(job_id)
+    # In worker mode the job may be waited on by another web instance
+    queued = broker is not None and broker.cancel(job_id)
+    if job is None and not queued:
+        return jsonify({'error': 'Job not found'}), 404
+    if job:
+        job.cancel()
+    return jsonify({'job_id': job_id, 'status': 'cancelling'}), 202
+
+def save_result_meta(job_id, meta):
+    """Remember where a job's result is stored, for GET /api/jobs/<job_id>/result"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', dir=OUTPUT_FOLDER, delete=False) as f:
+        json.dump(meta, f)
+    storage.save(f"jobs/{job_id}.json", f.name)
+
+def load_result_meta(job_id):
+    """Result location of a finished job, or None"""
+    if re.fullmatch(r'[A-Za-z0-9_-]{1,64}', job_id):
+        meta_path = os.path.join(OUTPUT_FOLDER, f"{uuid.uuid4().hex}.json")
+        try:
+            storage.load(f"jobs/{job_id}.json", meta_path)
+            with open(meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+        finally:
+            cleanup_files(meta_path)
+    # Jobs requeued from the dead letters finish without a waiting request
+    job = broker.get(job_id) if broker is not None else None
+    if job and job['state'] == 'done':
+        return job
+    return None
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET', 'HEAD'])
+def job_result(job_id):
+    """Download the result of a finished conversion; supports If-None-Match and Range"""
+    meta = load_result_meta(job_id)
+    if meta is None:
+        return jsonify({'error': 'Result not found'}), 404
+    if storage.size(meta['result_key']) is None:
+        return jsonify({'error': 'Result has expired'}), 404
+    response = storage.send(meta['result_key'], meta['download_name'], meta.get('etag'))
+    response.headers['X-Job-Id'] = job_id
+    return response
+
+# ==================== VALIDATE ====================
+@app.route('/api/validate', methods=['POST'])
+def validate():
+    """Sniff an upload without converting it and report its cost hints"""
+    input_path = None
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -558,138 +3938,438 @@ def pdf_to_pdfa():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not allowed_file(file.filename) or not file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'Invalid file type. Please upload .pdf'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type'}), 400
         
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_path = os.path.join(UPLOAD_FOLDER, f"{timestamp}_{filename}")
+        input_path = os.path.join(UPLOAD_FOLDER, f"validate_{new_job_id()}_{filename}")
         file.save(input_path)
         
-        base_name = os.path.splitext(filename)[0]
-        final_output = os.path.join(OUTPUT_FOLDER, f"{timestamp}_{base_name}_pdfa.pdf")
-        
-        # Convert to PDF/A-1b using Ghostscript
-        cmd = [
-            'gswin64c' if os.name == 'nt' else 'gs',
-            '-dPDFA=1',
-            '-dBATCH',
-            '-dNOPAUSE',
-            '-dUseCIEColor',
-            '-sProcessColorModel=DeviceRGB',
-            '-sDEVICE=pdfwrite',
-            '-sPDFACompatibilityPolicy=1',
-            f'-sOutputFile={final_output}',
-            input_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            cleanup_files(input_path)
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        if not os.path.exists(final_output):
-            cleanup_files(input_path)
-            return jsonify({'error': 'Conversion failed: Output file not found'}), 500
+        input_info, error = validate_upload(input_path, filename)
+        if error:
+            return error
         
-        cleanup_files(input_path)
+        kind = request.form.get('kind')
+        if kind in CONVERTERS:
+            cost = estimate_cost(kind, input_info)
+            input_info.update({'cost': round(cost, 2), 'lane': scheduler.lane_for(cost)})
         
-        return send_file(final_output, as_attachment=True, download_name=f"{base_name}_pdfa.pdf")
+        return jsonify({'valid': True, **input_info})
     
-    except subprocess.TimeoutExpired:
-        cleanup_files(input_path)
-        return jsonify({'error': 'Conversion timeout'}), 500
     except Exception as e:
-        cleanup_files(input_path)
-        logger.error(f"PDF to PDF/A error: {str(e)}")
+        logger.error(f"Validate error: {str(e)}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        cleanup_files(input_path)
+
+# ==================== STATIC ASSETS ====================
+# `python filecnvt.py build-assets` copies the static files to static/dist
+# under content-hashed names (css/style.3f2a1b9c0d1e.css) with gzip and
+# brotli variants, and lists them in static/dist/manifest.json. Templates
+# link assets through asset_url(): fingerprinted URLs under /assets/ are
+# served precompressed and cached for a year as immutable. Without a build
+# the plain /static/ URLs are used.
+
+ASSET_DIR = os.path.join(app.static_folder, 'dist')
+ASSET_MANIFEST = os.path.join(ASSET_DIR, 'manifest.json')
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_ASSETS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Smaller files gain nothing from compression
+ASSET_COMPRESS_MIN_BYTES = 256
+
+def build_assets(static_dir=None, dist_dir=None):
+    """Fingerprint and precompress every static file; returns the manifest"""
+    static_dir = os.path.abspath(static_dir or app.static_folder)
+    dist_dir = os.path.abspath(dist_dir or ASSET_DIR)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            filename = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            stem, ext = os.path.splitext(filename)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            output_path = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(data)
+            if ext in COMPRESSIBLE_ASSETS and len(data) >= ASSET_COMPRESS_MIN_BYTES:
+                with open(f"{output_path}.gz", 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(f"{output_path}.br", 'wb') as f:
+                        f.write(brotli.compress(data, quality=11))
+            manifest[filename] = hashed
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_asset_manifest():
+    try:
+        with open(ASSET_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+asset_manifest = load_asset_manifest()
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file, fingerprinted when the assets have been built"""
+    hashed = asset_manifest.get(filename)
+    # In debug mode edited files are served as they are, without a rebuild
+    if hashed is None or app.debug:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=hashed)
+
+@app.route('/assets/<path:filename>', methods=['GET', 'HEAD'])
+def asset(filename):
+    """Serve a fingerprinted asset, precompressed if the client accepts it"""
+    path = safe_join(ASSET_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({'error': 'Not found'}), 404
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if name in request.accept_encodings and os.path.isfile(path + suffix):
+            path += suffix
+            encoding = name
+            break
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 # ==================== FRONTEND ROUTES ====================
+# Pages only change with a deploy, so each is rendered once per process and
+# served with an ETag; PAGE_CACHE_CONTROL lets browsers and CDNs reuse them.
+# In debug mode (FLASK_DEBUG=1) they are rendered on every request.
+
+PAGE_CACHE_CONTROL = os.environ.get('PAGE_CACHE_CONTROL', 'public, max-age=300')
+
+CONVERTER_PAGES = {
+    'word-to-pdf': {
+        'title': 'WORD → PDF Converter',
+        'description': 'Convert Word documents to PDF format',
+        'supported_formats': '.doc, .docx',
+        'accept_types': '.doc,.docx'
+    },
+    'excel-to-pdf': {
+        'title': 'EXCEL → PDF Converter',
+        'description': 'Convert Excel spreadsheets to PDF format',
+        'supported_formats': '.xls, .xlsx',
+        'accept_types': '.xls,.xlsx'
+    },
+    'powerpoint-to-pdf': {
+        'title': 'POWERPOINT → PDF Converter',
+        'description': 'Convert PowerPoint presentations to PDF format',
+        'supported_formats': '.ppt, .pptx',
+        'accept_types': '.ppt,.pptx'
+    },
+    'jpg-to-pdf': {
+        'title': 'JPG → PDF Converter',
+        'description': 'Convert JPG/PNG images to PDF documents',
+        'supported_formats': '.jpg, .jpeg, .png',
+        'accept_types': '.jpg,.jpeg,.png'
+    },
+    'html-to-pdf': {
+        'title': 'HTML → PDF Converter',
+        'description': 'Convert HTML pages, or ZIP bundles of a page and its assets, to PDF documents',
+        'supported_formats': '.html, .htm, .zip (index.html with its CSS, fonts and images)',
+        'accept_types': '.html,.htm,.zip'
+    },
+    'pdf-to-word': {
+        'title': 'PDF → WORD Converter',
+        'description': 'Convert PDF documents to Word format',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'pdf-to-excel': {
+        'title': 'PDF → EXCEL Converter',
+        'description': 'Convert PDF documents to Excel format',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'pdf-to-powerpoint': {
+        'title': 'PDF → POWERPOINT Converter',
+        'description': 'Convert PDF documents to PowerPoint format',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'pdf-to-jpg': {
+        'title': 'PDF → JPG Converter',
+        'description': 'Convert PDF pages to JPG images',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'pdf-to-pdfa': {
+        'title': 'PDF → PDF/A Converter',
+        'description': 'Convert PDF to PDF/A archive format',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'office-to-jpg': {
+        'title': 'OFFICE → JPG Converter',
+        'description': 'Export Word pages, Excel sheets or PowerPoint slides as JPG images',
+        'supported_formats': '.doc, .docx, .xls, .xlsx, .ppt, .pptx',
+        'accept_types': '.doc,.docx,.xls,.xlsx,.ppt,.pptx'
+    },
+    'pdf-merge': {
+        'title': 'MERGE PDF',
+        'description': 'Combine several PDF files into one document',
+        'supported_formats': '.pdf (several files), .zip of PDFs',
+        'accept_types': '.pdf,.zip'
+    },
+    'pdf-split': {
+        'title': 'SPLIT PDF',
+        'description': 'Split a PDF into single pages or page ranges',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    },
+    'pdf-extract': {
+        'title': 'EXTRACT PDF PAGES',
+        'description': 'Copy selected pages of a PDF into a new document',
+        'supported_formats': '.pdf',
+        'accept_types': '.pdf'
+    }
+}
+
+page_cache = {}
+
+def cached_page(key, template, **context):
+    """Render a template once and serve it with an ETag and Cache-Control"""
+    page = page_cache.get(key)
+    if page is None or app.debug:
+        body = render_template(template, **context)
+        page = page_cache[key] = (body, hashlib.sha256(body.encode()).hexdigest()[:16])
+    response = app.response_class(page[0], mimetype='text/html')
+    response.set_etag(page[1])
+    response.headers['Cache-Control'] = PAGE_CACHE_CONTROL
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Homepage"""
-    return render_template('index.html')
+    return cached_page('index', 'index.html')
 
 # Converter pages
 @app.route('/<converter_type>.html')
 def converter_page(converter_type):
     """Serve converter pages"""
-    converter_configs = {
-        'word-to-pdf': {
-            'title': 'WORD → PDF Converter',
-            'description': 'Convert Word documents to PDF format',
-            'supported_formats': '.doc, .docx',
-            'accept_types': '.doc,.docx'
-        },
-        'excel-to-pdf': {
-            'title': 'EXCEL → PDF Converter',
-            'description': 'Convert Excel spreadsheets to PDF format',
-            'supported_formats': '.xls, .xlsx',
-            'accept_types': '.xls,.xlsx'
-        },
-        'powerpoint-to-pdf': {
-            'title': 'POWERPOINT → PDF Converter',
-            'description': 'Convert PowerPoint presentations to PDF format',
-            'supported_formats': '.ppt, .pptx',
-            'accept_types': '.ppt,.pptx'
-        },
-        'jpg-to-pdf': {
-            'title': 'JPG → PDF Converter',
-            'description': 'Convert JPG/PNG images to PDF documents',
-            'supported_formats': '.jpg, .jpeg, .png',
-            'accept_types': '.jpg,.jpeg,.png'
-        },
-        'html-to-pdf': {
-            'title': 'HTML → PDF Converter',
-            'description': 'Convert HTML files to PDF documents',
-            'supported_formats': '.html, .htm',
-            'accept_types': '.html,.htm'
-        },
-        'pdf-to-word': {
-            'title': 'PDF → WORD Converter',
-            'description': 'Convert PDF documents to Word format',
-            'supported_formats': '.pdf',
-            'accept_types': '.pdf'
-        },
-        'pdf-to-excel': {
-            'title': 'PDF → EXCEL Converter',
-            'description': 'Convert PDF documents to Excel format',
-            'supported_formats': '.pdf',
-            'accept_types': '.pdf'
-        },
-        'pdf-to-powerpoint': {
-            'title': 'PDF → POWERPOINT Converter',
-            'description': 'Convert PDF documents to PowerPoint format',
-            'supported_formats': '.pdf',
-            'accept_types': '.pdf'
-        },
-        'pdf-to-jpg': {
-            'title': 'PDF → JPG Converter',
-            'description': 'Convert PDF pages to JPG images',
-            'supported_formats': '.pdf',
-            'accept_types': '.pdf'
-        },
-        'pdf-to-pdfa': {
-            'title': 'PDF → PDF/A Converter',
-            'description': 'Convert PDF to PDF/A archive format',
-            'supported_formats': '.pdf',
-            'accept_types': '.pdf'
-        }
-    }
-    
-    config = converter_configs.get(converter_type)
+    config = CONVERTER_PAGES.get(converter_type)
     if config:
-        return render_template('converter.html', **config)
+        return cached_page(converter_type, 'converter.html', converter_type=converter_type,
+                           limits=upload_limits(converter_type), **config)
     else:
-        return render_template('index.html')
+        return cached_page('index', 'index.html')
+
+# ==================== WARM-UP & READINESS ====================
+# When the server starts (python app.py, or gunicorn through
+# gunicorn.conf.py) a tiny document is pushed through every backend so that
+# LibreOffice profiles, font caches and lazy imports are built before real
+# traffic arrives. Importing the module starts nothing; other servers get
+# warm-up on the first health or readiness probe. /api/ready reports ready
+# once the backends in WARMUP_REQUIRED_BACKENDS are available. Backends that
+# failed are probed again, backing off from WARMUP_RETRY_SECONDS.
+
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') == '1'
+WARMUP_REQUIRED_BACKENDS = tuple(
+    name.strip() for name in os.environ.get('WARMUP_REQUIRED_BACKENDS', 'pil,pdftoppm,soffice').split(',')
+    if name.strip()
+)
+# 0 disables retries
+WARMUP_RETRY_SECONDS = int(os.environ.get('WARMUP_RETRY_SECONDS', 30))
+WARMUP_RETRY_MAX_SECONDS = 600
+
+warmup_state = {
+    'status': 'pending',
+    'started': None,
+    'finished': None,
+    'attempts': 0,
+    'required': list(WARMUP_REQUIRED_BACKENDS),
+    'backends': {},
+    'soffice_profiles': {}
+}
+# Guards warmup_state: the warm-up thread writes it while probes read it
+_warmup_state_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+def _warm(name, func, record):
+    """Run one warm-up step, recording availability and duration"""
+    start = time.monotonic()
+    try:
+        result = func()
+        with _warmup_state_lock:
+            record[name] = {'available': True, 'seconds': round(time.monotonic() - start, 2)}
+        return result
+    except Exception as e:
+        with _warmup_state_lock:
+            record[name] = {'available': False, 'seconds': round(time.monotonic() - start, 2), 'error': str(e)}
+        logger.warning(f"Warm-up of {name} failed: {e}")
+        return None
+
+def _needs_warming(name):
+    with _warmup_state_lock:
+        return not warmup_state['backends'].get(name, {}).get('available')
+
+def warmup_snapshot():
+    """Copy of warmup_state that is safe to serialise while warm-up runs"""
+    with _warmup_state_lock:
+        return copy.deepcopy(warmup_state)
+
+def run_warmup():
+    """Run a tiny conversion through each backend not yet available and prime caches"""
+    with _warmup_state_lock:
+        if warmup_state['finished'] is None:
+            warmup_state['status'] = 'warming'
+            warmup_state['started'] = datetime.now().isoformat()
+        warmup_state['attempts'] += 1
+    backends = warmup_state['backends']
+
+    with tempfile.TemporaryDirectory(prefix='filecnvt-warmup-') as tmp:
+        image_path = os.path.join(tmp, 'warmup.png')
+        Image.new('RGB', (64, 64), 'white').save(image_path)
+
+        # The PDF and DOCX made here feed the later steps, so they are
+        # produced on every pass
+        pdf_path = _warm('pil', lambda: convert_jpg_to_pdf(image_path, tmp, 'warmup'), backends)
+        if shutil.which('fc-cache') and _needs_warming('fontconfig'):
+            _warm('fontconfig', lambda: run_command(['fc-cache']), backends)
+        docx_path = None
+        if pdf_path:
+            if _needs_warming('pdftoppm'):
+                _warm('pdftoppm', lambda: render_pdf_images(pdf_path, tmp, 1, 1, dpi=10), backends)
+            if _needs_warming('pdf2docx') or _needs_warming('soffice'):
+                docx_path = _warm('pdf2docx', lambda: convert_pdf_to_word(pdf_path, tmp, 'warmup'), backends)
+            if _needs_warming('gs'):
+                _warm('gs', lambda: convert_pdf_to_pdfa(pdf_path, tmp, 'warmup'), backends)
+        if html_render.weasyprint is not None and _needs_warming('weasyprint'):
+            # One warm-up task per pool worker so each has imported WeasyPrint
+            _warm('weasyprint', lambda: [
+                future.result(timeout=CONVERSION_TIMEOUT)
+                for future in [html_pool().submit(html_render.warm_up) for _ in range(HTML_RENDER_WORKERS)]
+            ], backends)
+
+        # Build every pooled LibreOffice profile, not just the first one used
+        if docx_path and _needs_warming('soffice'):
+            pool = soffice_profiles
+            profiles = [pool.get() for _ in range(pool.maxsize)]
+            try:
+                for profile_dir in profiles:
+                    out_dir = tempfile.mkdtemp(dir=tmp)
+                    _warm(
+                        os.path.basename(profile_dir),
+                        lambda: soffice_convert(docx_path, out_dir, 'warmup', 'pdf', profile_dir),
+                        warmup_state['soffice_profiles']
+                    )
+            finally:
+                for profile_dir in profiles:
+                    pool.put(profile_dir)
+            template = bool(SOFFICE_PROFILE_TEMPLATE) and os.path.isfile(
+                os.path.join(SOFFICE_PROFILE_TEMPLATE, SOFFICE_TEMPLATE_MARKER)
+            )
+            with _warmup_state_lock:
+                warmed = [p['available'] for p in warmup_state['soffice_profiles'].values()]
+                backends['soffice'] = {
+                    'available': any(warmed),
+                    'warm_profiles': sum(warmed),
+                    'profiles': len(warmed),
+                    'template': template
+                }
+
+    with _warmup_state_lock:
+        warmup_state['finished'] = datetime.now().isoformat()
+        warmup_state['status'] = 'done'
+        available = [name for name, backend in backends.items() if backend['available']]
+    logger.info(f"Warm-up finished: {', '.join(available)}")
+
+def failed_backends():
+    """Backends that failed warm-up, plus required ones it never reached"""
+    with _warmup_state_lock:
+        backends = warmup_state['backends']
+        failed = {name for name, backend in backends.items() if not backend['available']}
+        return sorted(failed | {name for name in WARMUP_REQUIRED_BACKENDS if name not in backends})
+
+def is_ready():
+    """Ready once warm-up finished with every required backend available"""
+    if not WARMUP_ENABLED:
+        return True
+    with _warmup_state_lock:
+        backends = warmup_state['backends']
+        return warmup_state['finished'] is not None and all(
+            backends.get(name, {}).get('available') for name in WARMUP_REQUIRED_BACKENDS
+        )
+
+def backend_availability():
+    """Which converter executables are installed"""
+    return {
+        'soffice': shutil.which('soffice') is not None,
+        'gs': shutil.which('gswin64c' if os.name == 'nt' else 'gs') is not None,
+        'pdftoppm': shutil.which('pdftoppm') is not None,
+        'weasyprint': html_render.weasyprint is not None
+    }
+
+def _warmup_loop():
+    run_warmup()
+    delay = WARMUP_RETRY_SECONDS
+    while delay > 0 and failed_backends():
+        time.sleep(delay)
+        logger.info(f"Retrying warm-up of {', '.join(failed_backends())}")
+        run_warmup()
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+def start_warmup():
+    """Start warm-up (once per process) in the background so the server can answer liveness probes"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup_loop, name='warmup', daemon=True)
+            _warmup_thread.start()
 
 # ==================== HEALTH CHECK ====================
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({'status': 'ok', 'message': 'File Converter API is running'})
+    """Liveness check; also reports readiness, backends and warm-up status"""
+    if WARMUP_ENABLED:
+        start_warmup()
+    return jsonify({
+        'status': 'ok',
+        'message': 'File Converter API is running',
+        'ready': is_ready(),
+        'backends': backend_availability(),
+        'html_pdf_engine': {
+            'default': HTML_PDF_ENGINE,
+            'available': HTML_PDF_ENGINE != 'weasyprint' or html_render.weasyprint is not None
+        },
+        'warmup': warmup_snapshot(),
+        'scheduler': scheduler.stats(),
+        'storage': STORAGE_BACKEND,
+        'queue': QUEUE_BACKEND
+    })
 
-if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 503 until the required backends have warmed up"""
+    if WARMUP_ENABLED:
+        start_warmup()
+    ready = is_ready()
+    return jsonify({
+        'status': 'ready' if ready else 'warming',
+        'failed': failed_backends(),
+        'warmup': warmup_snapshot()
+    }), 200 if ready else 503
 
+if __name__ == '__main__':
+    # Debug mode (reloader, unfingerprinted assets, pages rendered per
+    # request) only when asked for; deployments run gunicorn
+    debug = os.environ.get('FLASK_DEBUG', '0') == '1'
+    # The reloader's parent process only watches files; its child serves
+    if WARMUP_ENABLED and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_warmup()
+    app.run(debug=debug, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,291 @@
+"""
+File Converter benchmarks
+Compare conversion backends on generated inputs
+
+Usage:
+    python bench.py pdf-to-excel --pages 100
+    python bench.py pdf-to-powerpoint --pages 100
+    python bench.py html-to-pdf --pages 20
+    python bench.py jpg-to-pdf --megapixels 100
+    python bench.py pdf-to-jpg --pages 20
+    python bench.py cold-start
+"""
+
+import os
+import sys
+import time
+import atexit
+import shutil
+import argparse
+import multiprocessing
+import resource
+import subprocess
+import tempfile
+import zipfile
+
+os.environ.setdefault('WARMUP_ENABLED', '0')
+_scratch = tempfile.mkdtemp(prefix='filecnvt-bench-')
+atexit.register(shutil.rmtree, _scratch, True)
+os.environ.setdefault('UPLOAD_FOLDER', os.path.join(_scratch, 'uploads'))
+os.environ.setdefault('OUTPUT_FOLDER', os.path.join(_scratch, 'outputs'))
+os.environ.setdefault('STORAGE_ROOT', os.path.join(_scratch, 'storage'))
+
+import app as converter  # noqa: E402
+from app import pymupdf, Image  # noqa: E402
+from pdf2image import convert_from_path  # noqa: E402
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its finished children, in MB"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / scale
+
+def timed(label, func, repeat):
+    """Run func `repeat` times and print the best and mean wall time"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            print(f"{label:<28} failed: {str(e).strip()[:80]}")
+            return None
+        times.append(time.perf_counter() - start)
+    print(f"{label:<28} best {min(times):8.3f}s   mean {sum(times) / len(times):8.3f}s   "
+          f"peak RSS {peak_rss_mb():7.1f} MB")
+    return min(times)
+
+def make_table_pdf(path, pages, rows=30, cols=6):
+    """Generate a PDF with one ruled table per page"""
+    doc = pymupdf.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        for r in range(rows):
+            for c in range(cols):
+                x0, y0 = 40 + c * 85, 40 + r * 24
+                page.draw_rect(pymupdf.Rect(x0, y0, x0 + 85, y0 + 24))
+                text = f'Column {c + 1}' if r == 0 else str(page_number * rows * cols + r * cols + c)
+                page.insert_text((x0 + 4, y0 + 16), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def bench_pdf_to_excel(args, work_dir):
+    """Native table extraction vs LibreOffice for PDF → Excel"""
+    pdf_path = os.path.join(work_dir, 'tables.pdf')
+    make_table_pdf(pdf_path, args.pages)
+    print(f"PDF → Excel, {args.pages} pages with one 30x6 table each")
+    for engine in ('native', 'soffice'):
+        out_dir = tempfile.mkdtemp(dir=work_dir)
+        timed(engine, lambda: converter.convert_pdf_to_excel(pdf_path, out_dir, 'tables', engine=engine), args.repeat)
+
+def bench_pdf_to_powerpoint(args, work_dir):
+    """Image slides vs LibreOffice for PDF → PowerPoint"""
+    pdf_path = os.path.join(work_dir, 'deck.pdf')
+    make_table_pdf(pdf_path, args.pages)
+    print(f"PDF → PowerPoint, {args.pages} pages")
+    for engine in ('images', 'soffice'):
+        out_dir = tempfile.mkdtemp(dir=work_dir)
+        timed(engine, lambda: converter.convert_pdf_to_powerpoint(pdf_path, out_dir, 'deck', engine=engine), args.repeat)
+
+HTML_STYLESHEET = """
+body { font-family: sans-serif; margin: 0; }
+section { page-break-after: always; display: grid; grid-template-columns: 1fr 2fr; gap: 12px; }
+.card { display: flex; flex-direction: column; border: 1px solid #ccc; border-radius: 6px; padding: 8px; }
+table { border-collapse: collapse; width: 100%; }
+td, th { border: 1px solid #999; padding: 2px 6px; }
+tr:nth-child(even) { background: #f4f4f4; }
+"""
+
+def make_html_bundle(path, pages):
+    """Generate a ZIP bundle: index.html with a grid, cards and a table per page, plus its stylesheet"""
+    sections = []
+    for page in range(pages):
+        rows = ''.join(
+            f'<tr><td>{page * 40 + row}</td><td>Item {row}</td><td>{row * 3.5:.2f}</td></tr>' for row in range(40)
+        )
+        sections.append(
+            f'<section><div class="card"><h2>Page {page + 1}</h2><p>{"Lorem ipsum dolor sit amet. " * 20}</p></div>'
+            f'<div class="card"><table><tr><th>#</th><th>Name</th><th>Price</th></tr>{rows}</table></div></section>'
+        )
+    with zipfile.ZipFile(path, 'w') as bundle:
+        bundle.writestr('index.html', '<html><head><link rel="stylesheet" href="style.css"></head>'
+                                      f'<body>{"".join(sections)}</body></html>')
+        bundle.writestr('style.css', HTML_STYLESHEET)
+
+def bench_html_to_pdf(args, work_dir):
+    """WeasyPrint worker pool vs LibreOffice for HTML → PDF"""
+    bundle_path = os.path.join(work_dir, 'report.zip')
+    make_html_bundle(bundle_path, args.pages)
+    print(f"HTML → PDF, {args.pages} pages with a grid layout and a 40-row table each")
+    engines = ['soffice']
+    if converter.html_render.weasyprint is None:
+        print('weasyprint                   not installed (pip install weasyprint)')
+    else:
+        engines.insert(0, 'weasyprint')
+        # The first render also starts the pool worker; report it on its own
+        out_dir = tempfile.mkdtemp(dir=work_dir)
+        timed('weasyprint (cold pool)',
+              lambda: converter.convert_html_to_pdf(bundle_path, out_dir, 'report', engine='weasyprint'), 1)
+    for engine in engines:
+        def run():
+            out_dir = tempfile.mkdtemp(dir=work_dir)
+            converter.convert_html_to_pdf(bundle_path, out_dir, 'report', engine=engine)
+        timed(engine, run, args.repeat)
+
+def _child_peak(func, conn):
+    func()
+    conn.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def child_peak_rss_mb(func):
+    """Run func in a forked child and return the child's peak resident memory in MB"""
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.get_context('fork').Process(target=_child_peak, args=(func, child))
+    process.start()
+    peak = parent.recv() if parent.poll(600) else 0
+    process.join()
+    return peak / scale
+
+def make_large_image(path, megapixels, mode):
+    """Generate a gradient image of about `megapixels` in `mode`, saved by extension"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    bands = [gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gradient.transpose(Image.Transpose.FLIP_TOP_BOTTOM)]
+    if mode == 'RGBA':
+        bands.append(gradient.transpose(Image.Transpose.ROTATE_180))
+    Image.merge(mode, bands).save(path)
+
+def legacy_jpg_to_pdf(input_path, output_path):
+    """The old path: decode the whole image and save it"""
+    Image.open(input_path).convert('RGB').save(output_path, 'PDF', resolution=100.0)
+
+def bench_jpg_to_pdf(args, work_dir):
+    """Peak memory of the bounded image path vs decoding whole images for JPG → PDF"""
+    print(f"JPG/PNG → PDF, {args.megapixels} megapixel images, peak RSS of a forked child")
+    print(f"{'baseline (app imported)':<28} peak RSS {child_peak_rss_mb(lambda: None):7.1f} MB")
+    for name, mode in (('photo.jpg', 'RGB'), ('scan.png', 'RGB'), ('overlay.png', 'RGBA')):
+        input_path = os.path.join(work_dir, name)
+        child_peak_rss_mb(lambda: make_large_image(input_path, args.megapixels, mode))
+        try:
+            converter.sniff_file(input_path, name)
+        except converter.ValidationError as e:
+            print(f"{name + ' bounded':<28} rejected: {e}")
+            continue
+        for label, func in (
+            ('bounded', lambda: converter.convert_jpg_to_pdf(input_path, work_dir, 'bounded')),
+            ('whole image', lambda: legacy_jpg_to_pdf(input_path, os.path.join(work_dir, 'whole.pdf')))
+        ):
+            start = time.perf_counter()
+            peak = child_peak_rss_mb(func)
+            print(f"{name + ' ' + label:<28} {time.perf_counter() - start:8.3f}s   peak RSS {peak:7.1f} MB")
+
+def legacy_pdf_to_jpg(input_path, output_path):
+    """The old path: poppler PPM pages decoded by PIL and re-encoded one at a time"""
+    with pymupdf.open(input_path) as doc:
+        page_count = doc.page_count
+    with zipfile.ZipFile(output_path, 'w') as zipf:
+        for page in range(1, page_count + 1):
+            image = convert_from_path(input_path, dpi=converter.PDF_JPG_DPI, first_page=page, last_page=page)[0]
+            image_path = f"{output_path}_{page}.jpg"
+            image.save(image_path, 'JPEG', quality=converter.PDF_JPG_QUALITY)
+            zipf.write(image_path, f"page_{page}.jpg")
+            os.remove(image_path)
+
+def bench_pdf_to_jpg(args, work_dir):
+    """Direct JPEG output from each renderer vs the PIL round-trip for PDF → JPG"""
+    pdf_path = os.path.join(work_dir, 'pages.pdf')
+    make_table_pdf(pdf_path, args.pages)
+    print(f"PDF → JPG, {args.pages} pages at {converter.PDF_JPG_DPI} dpi, "
+          f"{converter.PDF_RENDER_THREADS} render threads, peak RSS of a forked child")
+    runs = [
+        (renderer, lambda out_dir, renderer=renderer: converter.convert_pdf_to_jpg(pdf_path, out_dir, 'pages', renderer=renderer))
+        for renderer in converter.PDF_JPG_RENDERERS
+    ]
+    runs.append(('PIL round-trip', lambda out_dir: legacy_pdf_to_jpg(pdf_path, os.path.join(out_dir, 'pages.zip'))))
+    for label, func in runs:
+        times = []
+        peak = 0
+        for _ in range(args.repeat):
+            out_dir = tempfile.mkdtemp(dir=work_dir)
+            start = time.perf_counter()
+            peak = max(peak, child_peak_rss_mb(lambda: func(out_dir)))
+            zip_path = os.path.join(out_dir, 'pages.zip')
+            if not os.path.exists(zip_path):
+                print(f"{label:<28} failed")
+                break
+            times.append(time.perf_counter() - start)
+        if times:
+            print(f"{label:<28} best {min(times):8.3f}s   mean {sum(times) / len(times):8.3f}s   "
+                  f"peak RSS {peak:7.1f} MB   ZIP {os.path.getsize(zip_path) / 1e6:6.1f} MB")
+
+# Run in a fresh interpreter: time the app import (which installs the
+# profile template) and the first LibreOffice conversion
+COLD_START_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.convert_word_to_pdf(sys.argv[1], sys.argv[2], 'cold')
+print(imported - start, time.perf_counter() - imported)
+'''
+
+def bench_cold_start(args, work_dir):
+    """Process start to first Word → PDF conversion, with and without the prebuilt LibreOffice profile"""
+    import docx
+    docx_path = os.path.join(work_dir, 'letter.docx')
+    document = docx.Document()
+    for _ in range(args.pages):
+        document.add_paragraph('Lorem ipsum dolor sit amet. ' * 12)
+    document.save(docx_path)
+
+    start = time.perf_counter()
+    try:
+        template_dir = converter.build_soffice_profile(os.path.join(work_dir, 'soffice-profile'))
+    except Exception as e:
+        print(f"{'build template':<28} failed: {str(e).strip()[:80]}")
+        return
+    print(f"Cold start to first Word → PDF ({args.pages} paragraphs), fresh process and profile directory each run")
+    print(f"{'build template':<28} {time.perf_counter() - start:8.3f}s")
+    for label, template in (('no template', ''), ('prebuilt template', template_dir)):
+        runs = []
+        for _ in range(args.repeat):
+            env = dict(os.environ, WARMUP_ENABLED='0', SOFFICE_PROFILE_TEMPLATE=template,
+                       SOFFICE_PROFILE_ROOT=tempfile.mkdtemp(dir=work_dir))
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT, docx_path, tempfile.mkdtemp(dir=work_dir)],
+                                    env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{label:<28} failed: {result.stderr.strip().splitlines()[-1][:80]}")
+                break
+            import_seconds, convert_seconds = map(float, result.stdout.split()[-2:])
+            runs.append((time.perf_counter() - start, import_seconds, convert_seconds))
+        if runs:
+            total, import_seconds, convert_seconds = min(runs)
+            print(f"{label:<28} best {total:8.3f}s   import {import_seconds:6.3f}s   first conversion {convert_seconds:6.3f}s")
+
+BENCHMARKS = {
+    'pdf-to-excel': bench_pdf_to_excel,
+    'pdf-to-powerpoint': bench_pdf_to_powerpoint,
+    'html-to-pdf': bench_html_to_pdf,
+    'jpg-to-pdf': bench_jpg_to_pdf,
+    'pdf-to-jpg': bench_pdf_to_jpg,
+    'cold-start': bench_cold_start
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bench', description='File Converter benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--pages', type=int, default=50, help='Pages in generated documents')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per backend')
+    parser.add_argument('--megapixels', type=int, default=100, help='Size of generated images')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='filecnvt-bench-') as work_dir:
+        BENCHMARKS[args.benchmark](args, work_dir)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
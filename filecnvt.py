@@ -0,0 +1,300 @@
+"""
+File Converter command line interface
+Bulk offline conversion using the same backends as the web API
+
+Usage:
+    python filecnvt.py convert --to pdf --jobs 16 src/ dst/
+    QUEUE_BACKEND=redis python filecnvt.py worker
+    python filecnvt.py build-assets
+    python filecnvt.py build-soffice-profile
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import signal
+import threading
+import argparse
+import tempfile
+import itertools
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# The CLI does not serve requests: skip the server warm-up and keep the
+# API's upload/output/storage folders out of the caller's working directory
+os.environ.setdefault('WARMUP_ENABLED', '0')
+SCRATCH_STORAGE = 'STORAGE_ROOT' not in os.environ
+if not all(name in os.environ for name in ('UPLOAD_FOLDER', 'OUTPUT_FOLDER', 'STORAGE_ROOT')):
+    # Worker processes inherit these variables and share the parent's folder
+    _scratch = tempfile.mkdtemp(prefix='filecnvt-cli-')
+    atexit.register(shutil.rmtree, _scratch, True)
+    os.environ.setdefault('UPLOAD_FOLDER', os.path.join(_scratch, 'uploads'))
+    os.environ.setdefault('OUTPUT_FOLDER', os.path.join(_scratch, 'outputs'))
+    os.environ.setdefault('STORAGE_ROOT', os.path.join(_scratch, 'storage'))
+
+import app as converter  # noqa: E402
+
+MANIFEST_NAME = '.filecnvt-manifest.json'
+MANIFEST_SAVE_EVERY = 500
+
+def find_sources(src, target):
+    """Yield (source path, path relative to src, output base name) for every convertible file"""
+    if os.path.isfile(src):
+        name = os.path.basename(src)
+        yield src, name, os.path.splitext(name)[0]
+        return
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        names = [
+            name for name in sorted(files)
+            if converter.allowed_file(name) and converter.conversion_chain(name, target)
+        ]
+        # a.doc and a.docx would both write a.pdf: files sharing a stem keep
+        # their extension in the output name (a.doc.pdf, a.docx.pdf)
+        stems = Counter(os.path.splitext(name)[0].lower() for name in names)
+        for name in names:
+            path = os.path.join(root, name)
+            stem = os.path.splitext(name)[0]
+            yield path, os.path.relpath(path, src), name if stems[stem.lower()] > 1 else stem
+
+def load_manifest(dst):
+    """Load the record of previous conversions into dst"""
+    try:
+        with open(os.path.join(dst, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(dst, manifest):
+    """Write the manifest atomically"""
+    path = os.path.join(dst, MANIFEST_NAME)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+def is_up_to_date(path, entry, dst, check):
+    """Decide from the manifest entry whether a source needs converting again"""
+    if not entry or not os.path.exists(os.path.join(dst, entry['output'])):
+        return False
+    if check == 'hash':
+        return entry.get('sha256') == converter.file_sha256(path)
+    stat = os.stat(path)
+    output_mtime = os.path.getmtime(os.path.join(dst, entry['output']))
+    return entry.get('size') == stat.st_size and output_mtime >= stat.st_mtime
+
+def _init_worker(slots):
+    """Give each worker process its own LibreOffice profile"""
+    slot = slots.get()
+    converter.init_soffice_profiles(1, os.path.join(converter.SOFFICE_PROFILE_ROOT, f'cli_{slot}'))
+
+def _convert_one(path, rel, base_name, target, dst, want_hash):
+    """Convert one file in a worker process and describe the result"""
+    start = time.monotonic()
+    output_dir = os.path.join(dst, os.path.dirname(rel))
+    try:
+        output_path = converter.convert_file(path, target, output_dir, base_name)
+        stat = os.stat(path)
+        return {
+            'rel': rel,
+            'ok': True,
+            'seconds': time.monotonic() - start,
+            'bytes': stat.st_size,
+            'entry': {
+                'output': os.path.relpath(output_path, dst),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': converter.file_sha256(path) if want_hash else None
+            }
+        }
+    except Exception as e:
+        return {'rel': rel, 'ok': False, 'seconds': time.monotonic() - start, 'error': str(e)}
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def cmd_convert(args):
+    """Convert a file or directory tree in parallel"""
+    dst = os.path.abspath(args.dst)
+    os.makedirs(dst, exist_ok=True)
+    manifest = {} if args.force else load_manifest(dst)
+
+    skipped = 0
+    def pending_sources():
+        nonlocal skipped
+        for path, rel, base_name in find_sources(args.src, args.to):
+            if not args.force and is_up_to_date(path, manifest.get(rel), dst, args.check):
+                skipped += 1
+            else:
+                yield path, rel, base_name
+
+    # The tree is walked as the pool drains, so nothing waits for a full scan
+    sources = pending_sources()
+    first = next(sources, None)
+    if first is None:
+        print(f"Nothing to convert, {skipped} up to date")
+        return 0
+    print(f"Converting with {args.jobs} jobs")
+
+    slots = multiprocessing.Manager().Queue()
+    for slot in range(args.jobs):
+        slots.put(slot)
+
+    converted, failed, total_bytes, latencies = 0, 0, 0, []
+    start = time.monotonic()
+    def record(result):
+        nonlocal converted, failed, total_bytes
+        latencies.append(result['seconds'])
+        if result['ok']:
+            converted += 1
+            total_bytes += result['bytes']
+            manifest[result['rel']] = result['entry']
+            if args.verbose:
+                print(f"OK   {result['rel']} ({result['seconds']:.2f}s)")
+        else:
+            failed += 1
+            print(f"FAIL {result['rel']}: {result['error'].strip()}", file=sys.stderr)
+
+        done = len(latencies)
+        if done % MANIFEST_SAVE_EVERY == 0:
+            save_manifest(dst, manifest)
+            elapsed = time.monotonic() - start
+            print(f"... {done} converted or failed, {skipped} up to date ({done / elapsed:.1f} files/s)")
+
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(slots,)) as pool:
+        # A bounded window of submitted files, not one future per file up front
+        window = set()
+        for path, rel, base_name in itertools.chain([first], sources):
+            window.add(pool.submit(_convert_one, path, rel, base_name, args.to, dst, args.check == 'hash'))
+            if len(window) >= args.jobs * 2:
+                finished, window = wait(window, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future.result())
+        for future in wait(window).done:
+            record(future.result())
+
+    save_manifest(dst, manifest)
+    elapsed = time.monotonic() - start
+    print(
+        f"Converted {converted}, failed {failed}, skipped {skipped} in {elapsed:.1f}s\n"
+        f"Throughput: {len(latencies) / elapsed:.2f} files/s, "
+        f"{total_bytes / (1024 * 1024) / elapsed:.2f} MB/s input\n"
+        f"Per-file latency: p50 {percentile(latencies, 50):.2f}s, "
+        f"p95 {percentile(latencies, 95):.2f}s, max {max(latencies):.2f}s"
+    )
+    return 1 if failed else 0
+
+def cmd_worker(args):
+    """Serve conversions queued by the web tier"""
+    if converter.broker is None:
+        print('Worker mode needs QUEUE_BACKEND=sqlite or redis', file=sys.stderr)
+        return 2
+    if converter.STORAGE_BACKEND == 'local' and SCRATCH_STORAGE:
+        print('Set STORAGE_ROOT to the web tier\'s storage directory (or use STORAGE_BACKEND=s3)',
+              file=sys.stderr)
+        return 2
+    if not args.no_warmup:
+        converter.run_warmup()
+        if not converter.is_ready():
+            print(f"Warning: some backends are unavailable: {converter.backend_availability()}",
+                  file=sys.stderr)
+
+    stop = threading.Event()
+    def request_stop(signum, frame):
+        print('Stopping after running jobs finish...', file=sys.stderr)
+        stop.set()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    converter.run_worker(stop)
+    return 0
+
+def cmd_dead_letters(args):
+    """List jobs that ran out of attempts, or put them back on the queue"""
+    broker = converter.broker
+    if broker is None:
+        print('Dead letters need QUEUE_BACKEND=sqlite or redis', file=sys.stderr)
+        return 2
+    if args.retry:
+        status = 0
+        for job_id in args.retry:
+            job = broker.get(job_id)
+            if job is None or job['state'] != 'dead':
+                print(f"{job_id}: not a dead job", file=sys.stderr)
+                status = 1
+                continue
+            broker.update(job_id, state='queued', attempts=0, worker=None, error=None, cancel=False,
+                          score=converter.queue_score(job['cost'], time.time()))
+            print(f"{job_id}: requeued")
+        return status
+    for job_id in broker.dead():
+        job = broker.get(job_id)
+        if job:
+            print(f"{job_id}  {job['kind']:<18} {job['attempts']} attempts  {job.get('error') or ''}")
+    return 0
+
+def cmd_build_assets(args):
+    """Write fingerprinted, precompressed static assets for the web UI"""
+    manifest = converter.build_assets(args.static_dir, args.dist_dir)
+    dist_dir = args.dist_dir or converter.ASSET_DIR
+    print(f"Built {len(manifest)} assets in {dist_dir}"
+          + ('' if converter.brotli else ' (gzip only: pip install brotli for .br variants)'))
+    return 0
+
+def cmd_build_soffice_profile(args):
+    """Build the LibreOffice profile template and font caches"""
+    start = time.monotonic()
+    template_dir = converter.build_soffice_profile(args.output)
+    print(f"Built the LibreOffice profile template in {template_dir} ({time.monotonic() - start:.1f}s)")
+    return 0
+
+def build_parser():
+    """Command line definition"""
+    parser = argparse.ArgumentParser(prog='filecnvt', description='All-in-One File Converter')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='Convert a file or a directory tree')
+    convert.add_argument('src', help='Source file or directory')
+    convert.add_argument('dst', help='Destination directory (the source tree is mirrored)')
+    convert.add_argument('--to', required=True,
+                         choices=sorted({c['target'] for c in converter.CONVERTERS.values() if not c.get('operation')}),
+                         help='Output format')
+    convert.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                         help='Parallel conversions (default: CPU count)')
+    convert.add_argument('--check', choices=['mtime', 'hash'], default='mtime',
+                         help='How to decide an existing output is up to date')
+    convert.add_argument('--force', action='store_true', help='Convert even if up to date')
+    convert.add_argument('--verbose', '-v', action='store_true', help='Print every converted file')
+    convert.set_defaults(func=cmd_convert)
+
+    worker = commands.add_parser('worker', help='Run queued conversions (QUEUE_BACKEND=sqlite or redis)')
+    worker.add_argument('--no-warmup', action='store_true', help='Skip the backend warm-up')
+    worker.set_defaults(func=cmd_worker)
+
+    dead = commands.add_parser('dead-letters', help='List failed queued jobs')
+    dead.add_argument('--retry', nargs='+', metavar='JOB_ID', help='Put these dead jobs back on the queue')
+    dead.set_defaults(func=cmd_dead_letters)
+
+    assets = commands.add_parser('build-assets', help='Fingerprint and precompress the static files')
+    assets.add_argument('--static-dir', help='Static files to build (default: the app\'s static folder)')
+    assets.add_argument('--dist-dir', help='Output directory (default: static/dist)')
+    assets.set_defaults(func=cmd_build_assets)
+
+    profile = commands.add_parser('build-soffice-profile',
+                                  help='Prebuild the LibreOffice profile template and font caches')
+    profile.add_argument('--output', help='Template directory (default: SOFFICE_PROFILE_TEMPLATE)')
+    profile.set_defaults(func=cmd_build_soffice_profile)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings picked up from the working directory
+Serves the converter the way the Docker image runs it and starts backend
+warm-up in each worker once the app is loaded
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+# One process by default: scheduler lanes, rate limits and running jobs are
+# kept per process, so more workers multiply the conversion slots
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Threads serve uploads, progress streams and downloads while conversions run
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+def post_worker_init(worker):
+    import app as converter
+    if converter.WARMUP_ENABLED:
+        converter.start_warmup()
@@ -0,0 +1,188 @@
+"""
+HTML → PDF rendering workers (WeasyPrint)
+Kept free of Flask and converter imports so process pool workers start fast;
+each worker keeps a cache of fetched stylesheets, fonts and images
+"""
+
+import os
+import time
+import socket
+import ipaddress
+import threading
+import http.client
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+try:
+    import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+except (ImportError, OSError):  # OSError: Pango is not installed
+    weasyprint = None
+    URLFetcher = object
+
+HTML_RESOURCE_CACHE_BYTES = int(os.environ.get('HTML_RESOURCE_CACHE_MB', 64)) * 1024 * 1024
+HTML_RESOURCE_TTL = int(os.environ.get('HTML_RESOURCE_TTL', 3600))
+HTML_FETCH_TIMEOUT = int(os.environ.get('HTML_FETCH_TIMEOUT', 10))
+# 0 keeps documents from loading anything but their own bundle
+HTML_REMOTE_RESOURCES = os.environ.get('HTML_REMOTE_RESOURCES', '1') == '1'
+# Larger resources are fetched every time rather than cached
+MAX_CACHED_RESOURCE_BYTES = 8 * 1024 * 1024
+
+class ResourceCache:
+    """Fetched resources by URL, least recently used dropped beyond a byte budget"""
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or time.monotonic() - entry['stored'] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return entry
+
+    def put(self, url, final_url, body, headers, status):
+        if len(body) > MAX_CACHED_RESOURCE_BYTES:
+            return
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old:
+                self.size -= len(old['body'])
+            self._entries[url] = {
+                'url': final_url, 'body': body, 'headers': headers,
+                'status': status, 'stored': time.monotonic()
+            }
+            self.size += len(body)
+            while self.size > self.max_bytes and self._entries:
+                _, entry = self._entries.popitem(last=False)
+                self.size -= len(entry['body'])
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+resources = ResourceCache(HTML_RESOURCE_CACHE_BYTES, HTML_RESOURCE_TTL)
+
+def _public_address(host, port):
+    """
+    Resolve a host once and return one of its addresses, or None unless
+    every address it resolves to is publicly routable
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError:
+        return None
+    addresses = [info[4][0] for info in infos]
+    if not addresses or not all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses):
+        return None
+    return addresses[0]
+
+class PinnedHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to an address resolved and checked beforehand, so DNS cannot change it"""
+
+    def __init__(self, host, address, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+class PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection to a checked address; the certificate is still verified against the host name"""
+
+    def __init__(self, host, address, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+class CachingURLFetcher(URLFetcher):
+    """
+    URL fetcher for untrusted documents.
+
+    Files are only readable inside the document's own directory (its
+    bundle), remote resources must be on public hosts, and http(s)
+    responses are served from the worker's resource cache. Remote hosts are
+    resolved once: the request goes to the address that was checked.
+    """
+
+    def __init__(self, base_dir):
+        super().__init__(
+            timeout=HTML_FETCH_TIMEOUT,
+            allowed_protocols=('file', 'data', 'http', 'https') if HTML_REMOTE_RESOURCES else ('file', 'data'),
+            # A redirect could point a public URL at an internal host
+            allow_redirects=False
+        )
+        self.base_dir = os.path.realpath(base_dir)
+
+    def fetch(self, url, headers=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        # The http(s) branch below bypasses URLFetcher's own protocol check
+        if scheme in ('http', 'https') and not HTML_REMOTE_RESOURCES:
+            raise ValueError(f'Remote resources are disabled: {url}')
+        if scheme == 'file':
+            path = os.path.realpath(url2pathname(parts.path))
+            if os.path.commonpath([path, self.base_dir]) != self.base_dir:
+                raise ValueError(f'File outside the document bundle: {url}')
+        elif scheme in ('http', 'https'):
+            cached = resources.get(url)
+            if cached is not None:
+                return URLFetcherResponse(cached['url'], cached['body'], cached['headers'], cached['status'])
+            port = parts.port or (443 if scheme == 'https' else 80)
+            address = _public_address(parts.hostname or '', port)
+            if address is None:
+                raise ValueError(f'Host is not public: {url}')
+            body, response_headers, status = self._fetch_pinned(url, parts, address, port)
+            resources.put(url, url, body, response_headers, status)
+            return URLFetcherResponse(url, body, response_headers, status)
+        return super().fetch(url, headers)
+
+    def _fetch_pinned(self, url, parts, address, port):
+        """GET a URL from an already checked address; redirects and errors are not followed"""
+        connection_class = PinnedHTTPSConnection if parts.scheme.lower() == 'https' else PinnedHTTPConnection
+        connection = connection_class(parts.hostname, address, port=port, timeout=HTML_FETCH_TIMEOUT)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        try:
+            connection.request('GET', target, headers={
+                'User-Agent': f'WeasyPrint {weasyprint.__version__}',
+                'Accept-Encoding': 'identity'
+            })
+            response = connection.getresponse()
+            body = response.read()
+            status = response.status
+            response_headers = dict(response.getheaders())
+        finally:
+            connection.close()
+        if not 200 <= status < 300:
+            raise ValueError(f'HTTP {status} for {url}')
+        return body, response_headers, status
+
+def render_pdf(html_path, output_path):
+    """Render an HTML file (and the assets next to it) to a PDF; returns cache stats"""
+    if weasyprint is None:
+        raise RuntimeError('WeasyPrint is not installed')
+    fetcher = CachingURLFetcher(os.path.dirname(os.path.abspath(html_path)))
+    document = weasyprint.HTML(filename=html_path, url_fetcher=fetcher)
+    document.write_pdf(output_path, font_config=FontConfiguration())
+    return resources.stats()
+
+def warm_up():
+    """Import and initialise WeasyPrint in a pool worker"""
+    if weasyprint is None:
+        raise RuntimeError('WeasyPrint is not installed')
+    weasyprint.HTML(string='<p>warm-up</p>').write_pdf()
+    return True
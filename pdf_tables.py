@@ -0,0 +1,45 @@
+"""
+PDF table extraction workers
+Kept free of Flask and converter imports so process pool workers start fast;
+each function handles one batch of pages and returns a plain list of
+(page_number, ...) pairs, which pickles back to the parent in one piece
+"""
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF < 1.24.3 only ships the fitz name
+    import fitz as pymupdf
+
+def extract_page_tables(pdf_path, page_numbers):
+    """
+    Detect tables on the given (0-based) pages.
+
+    Returns a list of (page_number, tables) where each table is a list of
+    rows and each row a list of cell strings (None for empty cells).
+    """
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        for number in page_numbers:
+            page = doc[number]
+            tables = [table.extract() for table in page.find_tables().tables]
+            results.append((number, tables))
+    return results
+
+def extract_page_text_rows(pdf_path, page_numbers):
+    """
+    Fallback for PDFs without ruled tables: one row per text line, with
+    cells split on the gaps between text spans.
+
+    Returns a list of (page_number, rows) with rows as lists of cell strings.
+    """
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        for number in page_numbers:
+            rows = []
+            for block in doc[number].get_text('dict')['blocks']:
+                for line in block.get('lines', []):
+                    cells = [span['text'].strip() for span in line['spans'] if span['text'].strip()]
+                    if cells:
+                        rows.append(cells)
+            results.append((number, rows))
+    return results
@@ -0,0 +1,436 @@
+"""
+File Converter soak test
+Replay a mixed conversion workload for hours and fail when memory, file
+descriptors, child processes, temp files or latency keep growing
+
+Usage:
+    python soak.py --duration 4h --concurrency 4
+    python soak.py --url http://localhost:5000 --pid 1234 --temp-dir /app/outputs --duration 8h
+
+Without --url the app is served in this process, so its RSS, descriptors and
+children (soffice, gs, render pools) are sampled directly. Process sampling
+reads /proc and needs Linux.
+"""
+
+import os
+import sys
+import json
+import logging
+import time
+import uuid
+import atexit
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+# Served in-process: keep the app's folders in a scratch directory (inside
+# the temp dir, so they count towards its size), let the load through, and
+# expire results well within the default warm-up so they do not read as a leak
+os.environ.setdefault('WARMUP_ENABLED', '0')
+os.environ.setdefault('RATE_LIMIT_PER_MINUTE', '0')
+os.environ.setdefault('RESULT_TTL', '300')
+_scratch = tempfile.mkdtemp(prefix='filecnvt-soak-')
+atexit.register(shutil.rmtree, _scratch, True)
+os.environ.setdefault('UPLOAD_FOLDER', os.path.join(_scratch, 'uploads'))
+os.environ.setdefault('OUTPUT_FOLDER', os.path.join(_scratch, 'outputs'))
+os.environ.setdefault('STORAGE_ROOT', os.path.join(_scratch, 'storage'))
+
+import pymupdf  # noqa: E402
+import openpyxl  # noqa: E402
+import docx  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+# Route, fixture and form fields of each kind of request in the workload
+WORKLOAD = {
+    'word-to-pdf': ('letter.docx', {}),
+    'excel-to-pdf': ('sheet.xlsx', {}),
+    'jpg-to-pdf': ('photo.jpg', {}),
+    'html-to-pdf': ('page.html', {}),
+    'pdf-to-word': ('report.pdf', {}),
+    'pdf-to-excel': ('tables.pdf', {}),
+    'pdf-to-jpg': ('report.pdf', {}),
+    'pdf-split': ('report.pdf', {'every': '2'})
+}
+DEFAULT_MIX = ('word-to-pdf=2,excel-to-pdf=1,jpg-to-pdf=2,html-to-pdf=1,'
+               'pdf-to-word=3,pdf-to-excel=1,pdf-to-jpg=2,pdf-split=1')
+REQUEST_TIMEOUT = 600
+
+# Metrics checked for an upward trend: (sample field, limit argument, unit)
+TRENDS = (
+    ('rss_mb', 'max_rss_slope', 'MB/h'),
+    ('fds', 'max_fd_slope', 'fds/h'),
+    ('children', 'max_children_slope', 'processes/h'),
+    ('temp_mb', 'max_temp_slope', 'MB/h'),
+    ('p95', 'max_p95_slope', '%/h')
+)
+
+def parse_duration(value):
+    """Seconds from '90', '90s', '30m' or '4h'"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+def parse_mix(value):
+    """Weights per workload kind from 'kind=weight,...'"""
+    mix = {}
+    for item in value.split(','):
+        kind, _, weight = item.strip().partition('=')
+        if kind not in WORKLOAD:
+            raise argparse.ArgumentTypeError(f"unknown kind '{kind}' (choose from {', '.join(WORKLOAD)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+# ==================== FIXTURES ====================
+
+def make_fixtures(work_dir, variants, pages):
+    """Generate `variants` distinct inputs per fixture, so identical requests are not coalesced"""
+    fixtures = {}
+    for variant in range(variants):
+        tag = f'Soak document {variant}'
+        paths = {name: os.path.join(work_dir, f'{variant}_{name}') for name, _ in WORKLOAD.values()}
+
+        report = pymupdf.open()
+        for page_number in range(pages):
+            page = report.new_page()
+            page.insert_text((72, 72), f'{tag}, page {page_number + 1}', fontsize=16)
+            page.insert_textbox(pymupdf.Rect(72, 100, 520, 700), 'Lorem ipsum dolor sit amet. ' * 60, fontsize=10)
+        report.save(paths['report.pdf'])
+        report.close()
+
+        tables = pymupdf.open()
+        for page_number in range(pages):
+            page = tables.new_page()
+            for row in range(20):
+                for col in range(5):
+                    x0, y0 = 60 + col * 95, 60 + row * 24
+                    page.draw_rect(pymupdf.Rect(x0, y0, x0 + 95, y0 + 24))
+                    page.insert_text((x0 + 4, y0 + 16), f'{variant}.{page_number}.{row}.{col}', fontsize=9)
+        tables.save(paths['tables.pdf'])
+        tables.close()
+
+        letter = docx.Document()
+        letter.add_heading(tag, 1)
+        for _ in range(pages * 5):
+            letter.add_paragraph('Lorem ipsum dolor sit amet. ' * 12)
+        letter.save(paths['letter.docx'])
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append([tag])
+        for row in range(pages * 40):
+            sheet.append([row, f'Item {row}', row * 1.5 + variant])
+        workbook.save(paths['sheet.xlsx'])
+
+        image = Image.new('RGB', (1600, 1200), (40 * variant % 256, 120, 200))
+        ImageDraw.Draw(image).text((40, 40), tag, fill='white')
+        image.save(paths['photo.jpg'], quality=85)
+
+        with open(paths['page.html'], 'w', encoding='utf-8') as f:
+            f.write(f'<html><body><h1>{tag}</h1>' + '<p>Lorem ipsum dolor sit amet.</p>' * pages * 20 + '</body></html>')
+
+        for name, path in paths.items():
+            with open(path, 'rb') as f:
+                fixtures.setdefault(name, []).append((os.path.basename(path), f.read()))
+    return fixtures
+
+# ==================== LOAD ====================
+
+def encode_multipart(fields, filename, data):
+    """Body and content type of a multipart form with one `file` field"""
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+class LoadGenerator:
+    """Closed-loop clients sending a weighted mix of conversions"""
+
+    def __init__(self, base_url, fixtures, mix, concurrency, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.fixtures = fixtures
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.results = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _request(self, kind):
+        fixture, fields = WORKLOAD[kind]
+        with self._lock:
+            filename, data = self.random.choice(self.fixtures[fixture])
+        body, content_type = encode_multipart(fields, filename, data)
+        request = urllib.request.Request(f'{self.base_url}/api/convert/{kind}', data=body,
+                                         headers={'Content-Type': content_type}, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+        except OSError:
+            return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                kind = self.random.choices(self.kinds, self.weights)[0]
+            start = time.monotonic()
+            status = self._request(kind)
+            with self._lock:
+                self.results.append((kind, status, time.monotonic() - start))
+
+    def start(self):
+        for _ in range(self.concurrency):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(REQUEST_TIMEOUT)
+
+    def drain(self):
+        """Results since the last call: [(kind, status, seconds), ...]"""
+        with self._lock:
+            results, self.results = self.results, []
+        return results
+
+# ==================== SAMPLING ====================
+
+def descendants(pid):
+    """PIDs of every process below `pid`"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name is in parentheses and may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def open_fds(pid):
+    try:
+        return len(os.listdir(f'/proc/{pid}/fd'))
+    except OSError:
+        return 0
+
+def dir_size_mb(paths):
+    total = 0
+    for path in paths:
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+    return total / (1024 * 1024)
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def take_sample(elapsed, pid, temp_dirs, results):
+    """One row of the soak report"""
+    latencies = [seconds for _, status, seconds in results if status == 200]
+    sample = {
+        'elapsed': round(elapsed, 1),
+        'requests': len(results),
+        'errors': sum(1 for _, status, _ in results if status != 200),
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'temp_mb': round(dir_size_mb(temp_dirs), 1)
+    }
+    if pid:
+        children = descendants(pid)
+        sample.update({
+            'rss_mb': round(rss_mb(pid), 1),
+            'children_rss_mb': round(sum(rss_mb(child) for child in children), 1),
+            'fds': open_fds(pid),
+            'children': len(children)
+        })
+    return sample
+
+def format_sample(sample):
+    def seconds(value):
+        return f'{value:7.2f}' if value is not None else '      -'
+    line = (f"{sample['elapsed']:8.0f}s {sample['requests']:5d} req {sample['errors']:4d} err  "
+            f"p50 {seconds(sample['p50'])} p95 {seconds(sample['p95'])} p99 {seconds(sample['p99'])}  "
+            f"temp {sample['temp_mb']:8.1f} MB")
+    if 'rss_mb' in sample:
+        line += (f"  rss {sample['rss_mb']:7.1f} MB  fds {sample['fds']:4d}  "
+                 f"children {sample['children']:3d} ({sample['children_rss_mb']:.0f} MB)")
+    return line
+
+# ==================== TRENDS ====================
+
+def slope_per_hour(points):
+    """Least-squares slope of [(seconds, value), ...], per hour"""
+    if len(points) < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in points) / len(points)
+    mean_v = sum(v for _, v in points) / len(points)
+    variance = sum((t - mean_t) ** 2 for t, _ in points)
+    if not variance:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in points) / variance * 3600
+
+def check_trends(samples, args):
+    """Compare each metric's slope after the warm-up with its limit; returns the failures"""
+    steady = [sample for sample in samples if sample['elapsed'] >= args.warmup]
+    failures = []
+    print(f"\nTrends over {len(steady)} samples after a {args.warmup:.0f}s warm-up")
+    if len(steady) < args.min_samples:
+        print(f"not enough samples to judge trends (need {args.min_samples})")
+        return failures
+    for field, limit_name, unit in TRENDS:
+        points = [(sample['elapsed'], sample[field]) for sample in steady if sample.get(field) is not None]
+        if len(points) < 2:
+            continue
+        slope = slope_per_hour(points)
+        if field == 'p95':
+            # Latency depends on the mix: judge growth relative to its level
+            mean = sum(v for _, v in points) / len(points)
+            slope = slope / mean * 100 if mean else 0.0
+        limit = getattr(args, limit_name)
+        failed = slope > limit
+        print(f"{field:<10} {points[0][1]:10.2f} → {points[-1][1]:10.2f}   slope {slope:+10.2f} {unit:<12} "
+              f"limit {limit:g}   {'FAIL' if failed else 'ok'}")
+        if failed:
+            failures.append(field)
+    requests = sum(sample['requests'] for sample in steady)
+    errors = sum(sample['errors'] for sample in steady)
+    error_rate = errors / requests if requests else 0.0
+    print(f"{'errors':<10} {errors} of {requests} requests ({error_rate:.1%}), limit {args.max_error_rate:.1%}   "
+          f"{'FAIL' if error_rate > args.max_error_rate else 'ok'}")
+    if error_rate > args.max_error_rate:
+        failures.append('errors')
+    return failures
+
+# ==================== MAIN ====================
+
+def start_server(verbose=False):
+    """Serve the app on a free local port in this process"""
+    from werkzeug.serving import make_server
+    import app as converter
+
+    if not verbose:
+        # Access and converter logs would bury the samples
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    server = make_server('127.0.0.1', 0, converter.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='soak', description='File Converter soak test')
+    parser.add_argument('--url', help='Soak a running server instead of one in this process')
+    parser.add_argument('--pid', type=int, help='PID of the server behind --url, to sample its processes')
+    parser.add_argument('--temp-dir', action='append', default=None,
+                        help='Directory whose size is tracked (repeatable; default: the temp dir when in-process)')
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration('1h'), help='e.g. 90s, 30m, 4h')
+    parser.add_argument('--interval', type=parse_duration, default=30.0, help='Seconds between samples')
+    parser.add_argument('--warmup', type=parse_duration, default=parse_duration('10m'),
+                        help='Samples before this are not used for trends (pools and caches fill up)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help='kind=weight,...')
+    parser.add_argument('--pages', type=int, default=5, help='Pages in generated documents')
+    parser.add_argument('--variants', type=int, default=8, help='Distinct files per fixture')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--report', help='Write every sample to this JSON lines file')
+    parser.add_argument('--verbose', action='store_true', help='Keep the in-process server\'s logs')
+    parser.add_argument('--min-samples', type=int, default=5)
+    parser.add_argument('--max-rss-slope', type=float, default=50.0, help='Server RSS growth, MB per hour')
+    parser.add_argument('--max-fd-slope', type=float, default=10.0, help='Open descriptors per hour')
+    parser.add_argument('--max-children-slope', type=float, default=1.0, help='Child processes per hour')
+    parser.add_argument('--max-temp-slope', type=float, default=100.0, help='Temp directory growth, MB per hour')
+    parser.add_argument('--max-p95-slope', type=float, default=20.0, help='p95 latency growth, percent per hour')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Fraction of failed requests')
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        base_url, pid, temp_dirs = args.url, args.pid, args.temp_dir or []
+    else:
+        server, base_url = start_server(args.verbose)
+        pid, temp_dirs = os.getpid(), args.temp_dir or [tempfile.gettempdir()]
+    if pid and not os.path.isdir('/proc'):
+        print('Process sampling needs /proc (Linux); only latency and temp files are tracked')
+        pid = None
+
+    fixture_dir = tempfile.mkdtemp(prefix='fixtures-', dir=_scratch)
+    fixtures = make_fixtures(fixture_dir, args.variants, args.pages)
+    print(f"Soaking {base_url} for {args.duration:.0f}s with {args.concurrency} clients, "
+          f"sampling every {args.interval:.0f}s")
+
+    load = LoadGenerator(base_url, fixtures, args.mix, args.concurrency, args.seed)
+    report = open(args.report, 'w') if args.report else None
+    samples = []
+    start = time.monotonic()
+    load.start()
+    try:
+        while time.monotonic() - start < args.duration:
+            time.sleep(min(args.interval, max(0.0, args.duration - (time.monotonic() - start))))
+            sample = take_sample(time.monotonic() - start, pid, temp_dirs, load.drain())
+            samples.append(sample)
+            print(format_sample(sample), flush=True)
+            if report:
+                report.write(json.dumps(sample) + '\n')
+                report.flush()
+    except KeyboardInterrupt:
+        print('Interrupted, judging the samples so far')
+    finally:
+        load.stop()
+        if report:
+            report.close()
+        if server:
+            server.shutdown()
+
+    failures = check_trends(samples, args)
+    if failures:
+        print(f"\nFAILED: {', '.join(failures)} trending upward")
+        return 1
+    print('\nPASSED')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,6 +12,40 @@ function getConverterType() {
     return page;
 }
 
+// Files larger than this are sent through the resumable chunked upload API
+const CHUNKED_UPLOAD_THRESHOLD = 20 * 1024 * 1024;
+const CHUNK_RETRIES = 5;
+
+// Progress phases reported by the server while a conversion runs
+const PHASE_LABELS = {
+    starting: 'Starting...',
+    queued: 'Waiting for a free converter...',
+    converting: 'Converting...',
+    analyzing: 'Analyzing document...',
+    parsing: 'Reading pages',
+    rendering: 'Rendering pages',
+    extracting: 'Extracting tables',
+    copying: 'Copying pages',
+    splitting: 'Writing parts',
+    writing: 'Writing file...'
+};
+
+// Client-chosen job id, so progress can be followed while the upload is still running
+function newJobId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID().replace(/-/g, '');
+    }
+    const bytes = new Uint8Array(16);
+    crypto.getRandomValues(bytes);
+    return Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+// Format a remaining time in seconds
+function formatDuration(seconds) {
+    if (seconds < 60) return Math.max(1, Math.ceil(seconds)) + 's';
+    return Math.floor(seconds / 60) + 'm ' + Math.round(seconds % 60) + 's';
+}
+
 // Format file size
 function formatFileSize(bytes) {
     if (bytes === 0) return '0 Bytes';
@@ -42,8 +76,13 @@ function initConverterPage(converterType) {
     const progressFill = document.getElementById('progressFill');
     const progressText = document.getElementById('progressText');
     const messageDiv = document.getElementById('message');
+    const optimizeImages = document.getElementById('optimizeImages');
+
+    // Upload limits advertised by the server for this converter
+    const limits = JSON.parse(uploadArea.dataset.limits || '{}');
     
-    let selectedFile = null;
+    // Several files only where the input allows it (e.g. PDF merge)
+    let selectedFiles = [];
 
     // Map converter types to API endpoints
     const apiEndpoints = {
@@ -56,7 +95,11 @@ function initConverterPage(converterType) {
         'pdf-to-excel': '/api/convert/pdf-to-excel',
         'pdf-to-powerpoint': '/api/convert/pdf-to-powerpoint',
         'pdf-to-jpg': '/api/convert/pdf-to-jpg',
-        'pdf-to-pdfa': '/api/convert/pdf-to-pdfa'
+        'pdf-to-pdfa': '/api/convert/pdf-to-pdfa',
+        'office-to-jpg': '/api/convert/office-to-jpg',
+        'pdf-merge': '/api/convert/pdf-merge',
+        'pdf-split': '/api/convert/pdf-split',
+        'pdf-extract': '/api/convert/pdf-extract'
     };
 
     const apiEndpoint = apiEndpoints[converterType];
@@ -74,14 +117,14 @@ function initConverterPage(converterType) {
     // File input change
     fileInput.addEventListener('change', (e) => {
         if (e.target.files.length > 0) {
-            handleFileSelect(e.target.files[0]);
+            handleFileSelect(e.target.files);
         }
     });
 
     // Convert button
     convertBtn.addEventListener('click', () => {
-        if (selectedFile) {
-            convertFile(selectedFile, apiEndpoint);
+        if (selectedFiles.length > 0) {
+            convertFile(selectedFiles, apiEndpoint);
         } else {
             showMessage('Please select a file first', 'error');
         }
@@ -103,24 +146,106 @@ function initConverterPage(converterType) {
         uploadArea.classList.remove('dragover');
         
         if (e.dataTransfer.files.length > 0) {
-            handleFileSelect(e.dataTransfer.files[0]);
+            handleFileSelect(e.dataTransfer.files);
         }
     }
 
     // Handle file selection
-    function handleFileSelect(file) {
-        selectedFile = file;
-        fileName.textContent = file.name;
-        fileSize.textContent = formatFileSize(file.size);
+    function handleFileSelect(files) {
+        selectedFiles = fileInput.multiple ? Array.from(files) : [files[0]];
+        const totalSize = selectedFiles.reduce((sum, file) => sum + file.size, 0);
+        fileName.textContent = selectedFiles.length > 1
+            ? `${selectedFiles.length} files: ${selectedFiles.map((file) => file.name).join(', ')}`
+            : selectedFiles[0].name;
+        fileSize.textContent = formatFileSize(totalSize);
         fileInfo.classList.add('active');
         convertBtn.disabled = false;
         hideMessage();
     }
 
-    // Convert file
-    async function convertFile(file, endpoint) {
+    // Upload a large file in chunks, resuming from the server's offset on errors
+    async function uploadInChunks(file) {
+        const createResponse = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        let upload = await createResponse.json();
+        if (!createResponse.ok) {
+            throw new Error(upload.error || 'Upload failed');
+        }
+
+        let retries = 0;
+        while (upload.offset < upload.size) {
+            const chunk = file.slice(upload.offset, upload.offset + upload.chunk_size);
+            try {
+                const response = await fetch(`/api/uploads/${upload.upload_id}`, {
+                    method: 'PUT',
+                    headers: { 'Upload-Offset': String(upload.offset) },
+                    body: chunk
+                });
+                if (!response.ok && response.status !== 409) {
+                    throw new Error('Chunk upload failed');
+                }
+                upload = await response.json();
+                retries = 0;
+            } catch (error) {
+                if (++retries > CHUNK_RETRIES) throw error;
+                // Ask the server how much it actually received, then resume
+                const status = await fetch(`/api/uploads/${upload.upload_id}`);
+                if (status.ok) upload = await status.json();
+            }
+            progressText.textContent = `Uploading... ${Math.floor(upload.offset / upload.size * 100)}%`;
+        }
+
+        const completeResponse = await fetch(`/api/uploads/${upload.upload_id}/complete`, { method: 'POST' });
+        upload = await completeResponse.json();
+        if (!completeResponse.ok) {
+            throw new Error(upload.error || 'Upload failed');
+        }
+        return upload.upload_id;
+    }
+
+    // Follow a job's progress stream from the server (Server-Sent Events)
+    function followProgress(jobId) {
+        if (!window.EventSource) return null;
+        const source = new EventSource(`/api/jobs/${encodeURIComponent(jobId)}/events`);
+        source.addEventListener('progress', (e) => updateProgress(JSON.parse(e.data)));
+        source.addEventListener('done', () => source.close());
+        source.addEventListener('failed', () => source.close());
+        return source;
+    }
+
+    // Downscale and re-encode an image in a Web Worker; falls back to the original file
+    function prepareImage(file) {
+        if (!limits.image || !optimizeImages || !optimizeImages.checked ||
+                !window.Worker || !window.OffscreenCanvas) {
+            return Promise.resolve(file);
+        }
+        return new Promise((resolve) => {
+            const worker = new Worker(optimizeImages.dataset.worker);
+            worker.onmessage = (e) => {
+                worker.terminate();
+                if (e.data.error) {
+                    resolve(file);
+                } else {
+                    resolve(new File([e.data.blob], file.name, { type: e.data.blob.type }));
+                }
+            };
+            worker.onerror = () => {
+                worker.terminate();
+                resolve(file);
+            };
+            worker.postMessage({ file, maxEdge: limits.image.max_edge, quality: limits.image.quality });
+        });
+    }
+
+    // Convert the selected file (or files, sent together in one request)
+    async function convertFile(files, endpoint) {
+        let file = files[0];
         const formData = new FormData();
-        formData.append('file', file);
+        const jobId = newJobId();
+        let progressSource = null;
 
         // Reset UI
         convertBtn.disabled = true;
@@ -128,8 +253,36 @@ function initConverterPage(converterType) {
         showProgress();
 
         try {
+            if (limits.image) {
+                progressText.textContent = 'Optimizing image...';
+                file = await prepareImage(file);
+                progressText.textContent = 'Uploading...';
+            }
+            const totalSize = files.length > 1 ? files.reduce((sum, f) => sum + f.size, 0) : file.size;
+            if (limits.max_upload_mb && totalSize > limits.max_upload_mb * 1024 * 1024) {
+                throw new Error(`File too large (maximum ${limits.max_upload_mb} MB)`);
+            }
+
+            if (files.length > 1) {
+                // The chunked upload API takes one file, so several go in one form
+                files.forEach((f) => formData.append('file', f));
+            } else if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                formData.append('upload_id', await uploadInChunks(file));
+            } else {
+                formData.append('file', file);
+            }
+
+            // Converter-specific options (e.g. Excel sheet selection)
+            document.querySelectorAll('.converter-option').forEach((input) => {
+                if (input.value.trim() !== '') {
+                    formData.append(input.name, input.value.trim());
+                }
+            });
+
+            progressSource = followProgress(jobId);
             const response = await fetch(endpoint, {
                 method: 'POST',
+                headers: { 'X-Job-Id': jobId },
                 body: formData
             });
 
@@ -166,7 +319,7 @@ function initConverterPage(converterType) {
             
             // Reset after 3 seconds
             setTimeout(() => {
-                selectedFile = null;
+                selectedFiles = [];
                 fileInput.value = '';
                 fileInfo.classList.remove('active');
                 convertBtn.disabled = false;
@@ -177,6 +330,8 @@ function initConverterPage(converterType) {
             hideProgress();
             showMessage(error.message || 'An error occurred during conversion', 'error');
             convertBtn.disabled = false;
+        } finally {
+            if (progressSource) progressSource.close();
         }
     }
 
@@ -184,15 +339,20 @@ function initConverterPage(converterType) {
     function showProgress() {
         progressContainer.classList.add('active');
         progressFill.style.width = '0%';
-        progressText.textContent = 'Converting...';
-        
-        // Simulate progress (actual progress would come from server)
-        let progress = 0;
-        const interval = setInterval(() => {
-            progress += Math.random() * 15;
-            if (progress > 90) progress = 90;
-            progressFill.style.width = progress + '%';
-        }, 200);
+        progressText.textContent = 'Uploading...';
+    }
+
+    // Show a progress event: the phase, and pages done with an ETA when known
+    function updateProgress(progress) {
+        let text = PHASE_LABELS[progress.phase] || 'Converting...';
+        if (progress.total) {
+            progressFill.style.width = Math.floor(progress.done / progress.total * 100) + '%';
+            text += ` ${progress.done} / ${progress.total}`;
+            if (progress.done && progress.eta != null) {
+                text += ` (about ${formatDuration(progress.eta)} left)`;
+            }
+        }
+        progressText.textContent = text;
     }
 
     function hideProgress() {
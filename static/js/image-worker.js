@@ -0,0 +1,33 @@
+/**
+ * All-in-One File Converter - image pre-processing worker
+ *
+ * Downscales an image to at most `maxEdge` pixels on its longest side and
+ * re-encodes it, which drops EXIF metadata. The EXIF orientation is applied
+ * first so the pixels end up upright.
+ */
+
+self.onmessage = async function(e) {
+    const { file, maxEdge, quality } = e.data;
+    try {
+        const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+        const scale = Math.min(1, maxEdge / Math.max(bitmap.width, bitmap.height));
+        const width = Math.round(bitmap.width * scale);
+        const height = Math.round(bitmap.height * scale);
+
+        const canvas = new OffscreenCanvas(width, height);
+        const ctx = canvas.getContext('2d');
+        const type = file.type === 'image/png' ? 'image/png' : 'image/jpeg';
+        if (type === 'image/jpeg') {
+            // JPEG has no alpha channel: flatten onto white like a printed page
+            ctx.fillStyle = '#fff';
+            ctx.fillRect(0, 0, width, height);
+        }
+        ctx.drawImage(bitmap, 0, 0, width, height);
+        bitmap.close();
+
+        const blob = await canvas.convertToBlob({ type, quality });
+        self.postMessage({ blob, resized: scale < 1 });
+    } catch (error) {
+        self.postMessage({ error: error.message || String(error) });
+    }
+};
@@ -0,0 +1,50 @@
+"""
+Shared test setup
+The converter reads its configuration from the environment at import time,
+so folders, storage and the queue are pointed at a scratch directory here,
+before any test module imports app
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRATCH = tempfile.mkdtemp(prefix='converter-tests-')
+atexit.register(shutil.rmtree, SCRATCH, True)
+os.environ.setdefault('UPLOAD_FOLDER', os.path.join(SCRATCH, 'uploads'))
+os.environ.setdefault('OUTPUT_FOLDER', os.path.join(SCRATCH, 'outputs'))
+os.environ.setdefault('STORAGE_ROOT', os.path.join(SCRATCH, 'storage'))
+os.environ.setdefault('QUEUE_DB', os.path.join(SCRATCH, 'queue.sqlite3'))
+os.environ.setdefault('RATE_LIMIT_DB', os.path.join(SCRATCH, 'ratelimit.sqlite3'))
+os.environ.setdefault('WARMUP_ENABLED', '0')
+# Rate limiting has its own tests; elsewhere it would only get in the way
+os.environ.setdefault('RATE_LIMIT_PER_MINUTE', '0')
+
+@pytest.fixture
+def converter():
+    import app
+    return app
+
+@pytest.fixture
+def client(converter):
+    return converter.app.test_client()
+
+@pytest.fixture
+def make_pdf(tmp_path, converter):
+    """Write a PDF with `pages` numbered pages and return its path"""
+    def make(pages=3, name='doc.pdf'):
+        path = tmp_path / name
+        doc = converter.pymupdf.open()
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f'Page {number}')
+        doc.save(str(path))
+        doc.close()
+        return path
+    return make
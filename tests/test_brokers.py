@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def broker(request, converter, tmp_path, monkeypatch):
+    if request.param == 'sqlite':
+        broker = converter.SQLiteBroker(str(tmp_path / 'queue.sqlite3'))
+    else:
+        fakeredis = pytest.importorskip('fakeredis')
+        monkeypatch.setattr(converter.redis.Redis, 'from_url', lambda url: fakeredis.FakeRedis())
+        broker = converter.RedisBroker('redis://test')
+    monkeypatch.setattr(converter, 'broker', broker)
+    return broker
+
+def job(converter, job_id, cost=1, lane='fast', enqueued=None):
+    enqueued = time.time() if enqueued is None else enqueued
+    return {
+        'job_id': job_id, 'kind': 'pdf-extract', 'lane': lane, 'cost': cost,
+        'score': converter.queue_score(cost, enqueued), 'state': 'queued', 'attempts': 0,
+        'enqueued': enqueued, 'input_key': f'inputs/{job_id}', 'filename': 'doc.pdf',
+        'options': {}, 'etag': None
+    }
+
+def test_claims_in_score_order_per_lane(converter, broker):
+    now = time.time()
+    broker.enqueue(job(converter, 'late', cost=1, enqueued=now + 5))
+    broker.enqueue(job(converter, 'early', cost=1, enqueued=now))
+    broker.enqueue(job(converter, 'bulk', cost=100, lane='bulk', enqueued=now - 60))
+    assert broker.claim('fast', 'w1')['job_id'] == 'early'
+    assert broker.claim('fast', 'w1')['job_id'] == 'late'
+    assert broker.claim('fast', 'w1') is None
+    claimed = broker.claim('bulk', 'w2')
+    assert (claimed['job_id'], claimed['state'], claimed['worker'], claimed['attempts']) == ('bulk', 'running', 'w2', 1)
+
+def test_cheap_job_overtakes_recent_costly_one(converter, broker):
+    now = time.time()
+    broker.enqueue(job(converter, 'costly', cost=converter.FAST_LANE_MAX_COST, enqueued=now))
+    broker.enqueue(job(converter, 'cheap', cost=1, enqueued=now + 1))
+    assert broker.claim('fast', 'w')['job_id'] == 'cheap'
+
+def test_enqueue_refuses_existing_id(converter, broker):
+    assert broker.enqueue(job(converter, 'same'))
+    assert not broker.enqueue(job(converter, 'same', cost=5))
+    assert broker.get('same')['cost'] == 1
+
+def test_heartbeat_only_for_owner(converter, broker):
+    broker.enqueue(job(converter, 'j'))
+    broker.claim('fast', 'w1')
+    assert broker.heartbeat('j', 'w1')
+    assert not broker.heartbeat('j', 'w2')
+    assert broker.update('j', 'w2', state='done') is None
+    assert broker.update('j', 'w1', state='done', result_key='results/x')['state'] == 'done'
+    assert not broker.heartbeat('j', 'w1')
+
+def test_cancel_queued_and_running(converter, broker):
+    broker.enqueue(job(converter, 'queued'))
+    assert broker.cancel('queued')
+    assert broker.get('queued')['state'] == 'cancelled'
+    assert broker.claim('fast', 'w') is None
+    assert not broker.cancel('queued')
+
+    broker.enqueue(job(converter, 'running'))
+    broker.claim('fast', 'w')
+    assert broker.cancel('running')
+    assert broker.get('running')['state'] == 'running'
+    # The worker learns about it on its next heartbeat
+    assert not broker.heartbeat('running', 'w')
+
+def test_stale_jobs_retried_then_dead(converter, broker, monkeypatch):
+    monkeypatch.setattr(converter, 'WORKER_MAX_ATTEMPTS', 2)
+    broker.enqueue(job(converter, 'j'))
+    broker.claim('fast', 'w1')
+    assert broker.stale(time.time() + 1) == ['j']
+    assert converter.retry_job('j', 'Worker stopped responding')['state'] == 'queued'
+    assert broker.stale(time.time() + 1) == []
+
+    claimed = broker.claim('fast', 'w2')
+    assert claimed['attempts'] == 2
+    dead = converter.retry_job('j', 'boom', 'w2')
+    assert (dead['state'], dead['error']) == ('dead', 'boom')
+    assert broker.dead() == ['j']
+    assert broker.claim('fast', 'w3') is None
+
+def test_purge_keeps_dead_jobs(converter, broker):
+    for job_id in ('done', 'dead'):
+        broker.enqueue(job(converter, job_id))
+        broker.claim('fast', 'w')
+    broker.update('done', 'w', state='done')
+    broker.update('dead', 'w', state='dead', error='boom')
+    time.sleep(0.01)
+    broker.purge(0)
+    assert broker.get('done') is None
+    assert broker.get('dead')['state'] == 'dead'
+
+def test_requeued_dead_job_can_be_claimed(converter, broker):
+    broker.enqueue(job(converter, 'j'))
+    broker.claim('fast', 'w')
+    broker.update('j', 'w', state='dead', error='boom')
+    broker.update('j', state='queued', worker=None, attempts=0)
+    assert broker.dead() == []
+    assert broker.claim('fast', 'w')['job_id'] == 'j'
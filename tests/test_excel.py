@@ -0,0 +1,78 @@
+import zipfile
+
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+def make_workbook(path, print_area=None):
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'Summary'
+    workbook.create_sheet('Data')
+    workbook.create_sheet("Bob's Sheet")
+    for sheet in workbook.worksheets:
+        for row in range(1, 30):
+            sheet.append([f'{sheet.title} {row}', row, row * 2.5])
+    if print_area:
+        workbook['Data'].print_area = print_area
+    workbook.save(path)
+    return path
+
+def test_prepare_workbook_hides_unselected_sheets(tmp_path, converter):
+    source = make_workbook(tmp_path / 'in.xlsx')
+    converter.prepare_workbook(str(source), str(tmp_path / 'out.xlsx'), sheets=['data', '3'])
+    workbook = openpyxl.load_workbook(tmp_path / 'out.xlsx')
+    states = {sheet.title: sheet.sheet_state for sheet in workbook.worksheets}
+    assert states == {'Summary': 'hidden', 'Data': 'visible', "Bob's Sheet": 'visible'}
+    assert workbook.active.title == 'Data'
+
+def test_prepare_workbook_rejects_unknown_sheet(tmp_path, converter):
+    source = make_workbook(tmp_path / 'in.xlsx')
+    with pytest.raises(converter.ValidationError, match='Sheet not found'):
+        converter.prepare_workbook(str(source), str(tmp_path / 'out.xlsx'), sheets=['Missing'])
+
+def test_prepare_workbook_replaces_print_areas(tmp_path, converter):
+    source = make_workbook(tmp_path / 'in.xlsx', print_area='A1:B2')
+    converter.prepare_workbook(str(source), str(tmp_path / 'out.xlsx'), print_area='a1:c10')
+    workbook = openpyxl.load_workbook(tmp_path / 'out.xlsx')
+    for sheet in workbook.worksheets:
+        # Quotes in sheet names are doubled in references
+        quoted = sheet.title.replace("'", "''")
+        assert sheet.print_area == f"'{quoted}'!$A$1:$C$10"
+    with zipfile.ZipFile(tmp_path / 'out.xlsx') as out:
+        assert out.read('xl/workbook.xml').count(b'_xlnm.Print_Area') == 3
+
+def test_prepare_workbook_fits_selected_sheets_to_width(tmp_path, converter):
+    source = make_workbook(tmp_path / 'in.xlsx')
+    converter.prepare_workbook(str(source), str(tmp_path / 'out.xlsx'), sheets=['Data'], fit='width')
+    workbook = openpyxl.load_workbook(tmp_path / 'out.xlsx')
+    data = workbook['Data']
+    assert data.sheet_properties.pageSetUpPr.fitToPage
+    assert data.page_setup.fitToWidth == 1
+    assert data.page_setup.fitToHeight == 0
+    assert [row[:2] for row in data.iter_rows(values_only=True)][:2] == [('Data 1', 1), ('Data 2', 2)]
+    summary = workbook['Summary']
+    assert not (summary.sheet_properties.pageSetUpPr and summary.sheet_properties.pageSetUpPr.fitToPage)
+
+def test_prepare_workbook_drops_calc_chain(tmp_path, converter):
+    source = make_workbook(tmp_path / 'in.xlsx')
+    patched = tmp_path / 'with-chain.xlsx'
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(patched, 'w') as dst:
+        for item in src.infolist():
+            dst.writestr(item, src.read(item))
+        dst.writestr('xl/calcChain.xml', '<calcChain/>')
+    converter.prepare_workbook(str(patched), str(tmp_path / 'out.xlsx'), sheets=['Summary'])
+    with zipfile.ZipFile(tmp_path / 'out.xlsx') as out:
+        assert 'xl/calcChain.xml' not in out.namelist()
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    (' 42 ', 42),
+    ('-3.5', -3.5),
+    ('007', '007'),
+    ('1.10', '1.10'),
+    ('1234567890123456', '1234567890123456'),
+    ('12 apples', '12 apples'),
+    ('bell\x07', 'bell')
+])
+def test_excel_cell(converter, value, expected):
+    assert converter._excel_cell(value) == expected
@@ -0,0 +1,51 @@
+import pytest
+
+import html_render
+
+needs_weasyprint = pytest.mark.skipif(html_render.weasyprint is None,
+                                      reason='WeasyPrint (and Pango) is not installed')
+
+@needs_weasyprint
+def test_fetch_refuses_http_when_remote_resources_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(html_render, 'HTML_REMOTE_RESOURCES', False)
+    url = 'https://example.com/style.css'
+    # A cached copy must not be served either
+    html_render.resources.put(url, url, b'p { color: red }', {}, 200)
+    fetcher = html_render.CachingURLFetcher(str(tmp_path))
+    with pytest.raises(ValueError, match='disabled'):
+        fetcher.fetch(url)
+
+@needs_weasyprint
+def test_remote_image_not_requested_when_remote_resources_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(html_render, 'HTML_REMOTE_RESOURCES', False)
+    requested = []
+    monkeypatch.setattr(html_render, '_public_address', lambda host, port: requested.append(host) or '93.184.216.34')
+    monkeypatch.setattr(html_render.CachingURLFetcher, '_fetch_pinned',
+                        lambda self, url, *args: requested.append(url) or (b'', {}, 200))
+    page = tmp_path / 'page.html'
+    page.write_text('<p>Remote image below</p><img src="http://example.com/pixel.png">')
+    html_render.render_pdf(str(page), str(tmp_path / 'page.pdf'))
+    assert requested == []
+    assert (tmp_path / 'page.pdf').read_bytes().startswith(b'%PDF-')
+
+def test_resource_cache_drops_least_recently_used():
+    cache = html_render.ResourceCache(max_bytes=10, ttl=60)
+    cache.put('a', 'a', b'1234', {}, 200)
+    cache.put('b', 'b', b'1234', {}, 200)
+    assert cache.get('a') is not None
+    cache.put('c', 'c', b'1234', {}, 200)
+    assert cache.get('b') is None
+    assert cache.get('a')['body'] == b'1234'
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'hits': 2, 'misses': 1}
+
+def test_resource_cache_expires_entries(monkeypatch):
+    cache = html_render.ResourceCache(max_bytes=100, ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(html_render.time, 'monotonic', lambda: now[0])
+    cache.put('a', 'a', b'body', {}, 200)
+    now[0] += 61
+    assert cache.get('a') is None
+
+@pytest.mark.parametrize('host', ['localhost', '127.0.0.1', '10.0.0.8', '169.254.169.254', '::1', 'nonexistent.invalid'])
+def test_public_address_refuses_internal_hosts(host):
+    assert html_render._public_address(host, 80) is None
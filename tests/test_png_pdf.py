@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from PIL import Image
+
+def save_png(path, image, **params):
+    image.save(path, 'PNG', **params)
+    return str(path)
+
+def gradient(mode, size=(64, 48)):
+    image = Image.new('RGB', size)
+    image.putdata([(x * 4, y * 5, (x + y) % 256) for y in range(size[1]) for x in range(size[0])])
+    return image.convert(mode)
+
+def render_page(converter, pdf_path):
+    """First page of a PDF rendered at the image's own resolution"""
+    with converter.pymupdf.open(pdf_path) as doc:
+        page = doc[0]
+        pixmap = page.get_pixmap(dpi=int(converter.IMAGE_PDF_RESOLUTION))
+        return page.rect, Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+@pytest.mark.parametrize('mode', ['RGB', 'L', 'P'])
+def test_png_rows_copied_unchanged(tmp_path, converter, mode):
+    image = gradient(mode)
+    path = save_png(tmp_path / 'in.png', image)
+    layout = converter.png_layout(path)
+    assert layout is not None
+    output = converter.convert_jpg_to_pdf(path, str(tmp_path), 'out')
+
+    # The image stream is the PNG's IDAT data, byte for byte
+    with converter.pymupdf.open(output) as doc:
+        xref = doc[0].get_images()[0][0]
+        stream = doc.xref_stream_raw(xref)
+    with open(path, 'rb') as f:
+        idat = b''
+        for offset, length in layout['idat']:
+            f.seek(offset)
+            idat += f.read(length)
+    assert stream == idat
+
+    rect, rendered = render_page(converter, output)
+    assert (rect.width, rect.height) == pytest.approx((64 * 72 / 100, 48 * 72 / 100), abs=0.01)
+    assert list(rendered.getdata()) == list(image.convert('RGB').getdata())
+
+def test_png_split_over_several_idat_chunks(tmp_path, converter):
+    image = Image.frombytes('RGB', (300, 200), os.urandom(300 * 200 * 3))
+    # Incompressible data in small chunks: many IDATs
+    path = save_png(tmp_path / 'in.png', image, compress_level=0)
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert data.count(b'IDAT') > 1
+    output = converter.convert_jpg_to_pdf(path, str(tmp_path), 'out')
+    _, rendered = render_page(converter, output)
+    assert rendered.tobytes() == image.tobytes()
+
+@pytest.mark.parametrize('make, params', [
+    (lambda: gradient('RGBA'), {}),
+    (lambda: gradient('RGB'), {'transparency': (0, 0, 0)}),
+    (lambda: gradient('RGB'), {'optimize': False, 'interlace': 1}),
+    (lambda: Image.new('I;16', (64, 48), 1000), {}),
+    (lambda: gradient('RGB'), {'exif': Image.Exif().tobytes()})
+])
+def test_png_layout_declines_rows_that_need_decoding(tmp_path, converter, make, params):
+    path = save_png(tmp_path / 'in.png', make(), **params)
+    if params.get('interlace'):
+        # Pillow cannot write interlaced PNGs: set the IHDR flag by hand
+        with open(path, 'r+b') as f:
+            f.seek(8 + 8 + 12)
+            f.write(b'\x01')
+    assert converter.png_layout(path) is None
+
+def test_transparent_png_flattened_onto_white(tmp_path, converter):
+    image = Image.new('RGBA', (20, 10), (255, 0, 0, 0))
+    image.paste((0, 0, 255, 255), (0, 0, 10, 10))
+    path = save_png(tmp_path / 'in.png', image)
+    output = converter.convert_jpg_to_pdf(path, str(tmp_path), 'out')
+    _, rendered = render_page(converter, output)
+    # Decoded images are embedded as JPEG, so colours are only close
+    assert rendered.getpixel((2, 5)) == pytest.approx((0, 0, 255), abs=24)
+    assert rendered.getpixel((15, 5)) == pytest.approx((255, 255, 255), abs=24)
+
+def test_not_a_png(tmp_path, converter):
+    path = tmp_path / 'in.png'
+    path.write_bytes(b'GIF89a' + b'\0' * 32)
+    assert converter.png_layout(str(path)) is None
@@ -0,0 +1,90 @@
+import types
+
+import pytest
+
+DAY = 24 * 3600
+
+@pytest.fixture
+def clock(converter, monkeypatch):
+    """Freeze the time the limiter sees; advance it by assigning clock.now"""
+    clock = types.SimpleNamespace(now=1000 * DAY + 3600.0)
+    monkeypatch.setattr(converter, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, converter, tmp_path):
+    if request.param == 'memory':
+        return converter.MemoryRateLimitStore()
+    return converter.SQLiteRateLimitStore(str(tmp_path / 'ratelimit.sqlite3'))
+
+def test_bucket_charges_cost_and_refills(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=10, per_minute=60, daily_quota=0)
+    assert limiter.acquire('a', 6)['allowed']
+    decision = limiter.acquire('a', 6)
+    assert not decision['allowed']
+    assert decision['retry_after'] == pytest.approx(2)
+    assert decision['remaining'] == pytest.approx(4)
+    clock.now += 2
+    assert limiter.acquire('a', 6)['allowed']
+
+def test_clients_have_separate_buckets(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=5, per_minute=60, daily_quota=0)
+    assert limiter.acquire('a', 5)['allowed']
+    assert not limiter.acquire('a', 1)['allowed']
+    assert limiter.acquire('b', 5)['allowed']
+
+def test_job_larger_than_burst_needs_a_full_bucket(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=10, per_minute=60, daily_quota=0)
+    assert limiter.acquire('a', 50)['allowed']
+    assert not limiter.acquire('a', 50)['allowed']
+    clock.now += 10
+    assert limiter.acquire('a', 50)['allowed']
+
+def test_check_only_needs_one_token(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=3, per_minute=60, daily_quota=0)
+    assert limiter.acquire('a', 3)['allowed']
+    assert not limiter.acquire('a')['allowed']
+    clock.now += 1
+    decision = limiter.acquire('a')
+    assert decision['allowed']
+    # Checking does not spend anything
+    assert decision['remaining'] == pytest.approx(1)
+
+def test_daily_quota_resets_at_midnight(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=100, per_minute=0, daily_quota=10)
+    assert limiter.acquire('a', 8)['allowed']
+    decision = limiter.acquire('a', 8)
+    assert not decision['allowed']
+    assert decision['error'] == 'Daily conversion quota exceeded'
+    assert decision['retry_after'] == pytest.approx(DAY - 3600)
+    assert decision['remaining'] == pytest.approx(2)
+    clock.now += DAY
+    assert limiter.acquire('a', 8)['allowed']
+
+def test_prune_forgets_clients_back_to_a_full_bucket(converter, store, clock):
+    limiter = converter.TokenBucketLimiter(store, burst=10, per_minute=60, daily_quota=0)
+    limiter.acquire('a', 10)
+    clock.now += 5
+    store.prune(clock.now)
+    assert not limiter.acquire('a', 10)['allowed']
+    clock.now += 10
+    store.prune(clock.now)
+    assert limiter.acquire('a', 10)['remaining'] == pytest.approx(0)
+
+def test_conversion_refused_with_retry_after(converter, client, make_pdf, monkeypatch):
+    limiter = converter.TokenBucketLimiter(converter.MemoryRateLimitStore(), burst=1, per_minute=1, daily_quota=0)
+    monkeypatch.setattr(converter, 'rate_limiter', limiter)
+    pdf = make_pdf(pages=1)
+
+    def extract():
+        with open(pdf, 'rb') as f:
+            return client.post('/api/convert/pdf-extract', data={'file': (f, 'doc.pdf'), 'pages': '1'})
+
+    response = extract()
+    assert response.status_code == 200
+    assert response.headers['RateLimit-Limit'] == '1'
+    # Under one token left: the next request is refused before its upload is read
+    response = extract()
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert response.headers['RateLimit-Remaining'] == '0'
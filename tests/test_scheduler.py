@@ -0,0 +1,188 @@
+import threading
+import time
+
+import pytest
+
+def make_scheduler(converter, fast=1, bulk=1, **kwargs):
+    kwargs.setdefault('queue_timeout', 5)
+    return converter.ConversionScheduler(fast, bulk, fast_max_cost=20, aging_seconds=30, **kwargs)
+
+def hold(scheduler, cost, client=None, started=None, release=None, order=None, name=None):
+    """Thread that takes a slot, records its turn and holds it until `release` is set"""
+    def run():
+        with scheduler.slot(cost, client):
+            if order is not None:
+                order.append(name)
+            if started:
+                started.set()
+            if release:
+                release.wait(5)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def wait_for_waiting(scheduler, lane, count):
+    deadline = time.monotonic() + 5
+    while scheduler.stats()[lane]['waiting'] < count:
+        assert time.monotonic() < deadline, 'jobs never queued'
+        time.sleep(0.01)
+
+def test_lane_for_cost(converter):
+    scheduler = make_scheduler(converter)
+    assert scheduler.lane_for(20) == 'fast'
+    assert scheduler.lane_for(20.5) == 'bulk'
+
+def test_fast_lane_not_blocked_by_bulk_job(converter):
+    scheduler = make_scheduler(converter)
+    started, release = threading.Event(), threading.Event()
+    bulk = hold(scheduler, 500, started=started, release=release)
+    assert started.wait(5)
+    with scheduler.slot(1) as lane:
+        assert lane == 'fast'
+        assert scheduler.stats()['bulk']['running'] == 1
+    release.set()
+    bulk.join(5)
+    assert scheduler.stats()['bulk'] == {'workers': 1, 'running': 0, 'waiting': 0, 'completed': 1}
+
+def test_cheapest_waiting_job_runs_first(converter):
+    scheduler = make_scheduler(converter, fair_clients=False)
+    started, release = threading.Event(), threading.Event()
+    order = []
+    first = hold(scheduler, 10, started=started, release=release)
+    assert started.wait(5)
+    waiters = []
+    for count, cost in enumerate((15, 2, 8), 1):
+        waiters.append(hold(scheduler, cost, order=order, name=cost))
+        wait_for_waiting(scheduler, 'fast', count)
+    release.set()
+    for thread in [first] + waiters:
+        thread.join(5)
+    assert order == [2, 8, 15]
+
+def test_busy_client_yields_to_others(converter):
+    scheduler = make_scheduler(converter, fast=2)
+    busy_started, other_started = threading.Event(), threading.Event()
+    release_busy, release_other = threading.Event(), threading.Event()
+    order = []
+    busy = hold(scheduler, 5, client='busy', started=busy_started, release=release_busy)
+    other = hold(scheduler, 5, client='other', started=other_started, release=release_other)
+    assert busy_started.wait(5) and other_started.wait(5)
+    waiters = [hold(scheduler, 3, client='busy', order=order, name='busy')]
+    wait_for_waiting(scheduler, 'fast', 1)
+    waiters.append(hold(scheduler, 4, client='calm', order=order, name='calm'))
+    wait_for_waiting(scheduler, 'fast', 2)
+    # One slot frees up: the costlier job goes first, as 'busy' already has one running
+    release_other.set()
+    other.join(5)
+    waiters[1].join(5)
+    release_busy.set()
+    for thread in [busy] + waiters:
+        thread.join(5)
+    assert order == ['calm', 'busy']
+
+def test_queue_timeout_raises_busy(converter):
+    scheduler = make_scheduler(converter, queue_timeout=0.2)
+    started, release = threading.Event(), threading.Event()
+    holder = hold(scheduler, 1, started=started, release=release)
+    assert started.wait(5)
+    with pytest.raises(converter.SchedulerBusy):
+        with scheduler.slot(1):
+            pass
+    release.set()
+    holder.join(5)
+    assert scheduler.stats()['fast']['waiting'] == 0
+
+def test_cancelled_while_waiting(converter):
+    scheduler = make_scheduler(converter)
+    started, release = threading.Event(), threading.Event()
+    holder = hold(scheduler, 1, started=started, release=release)
+    assert started.wait(5)
+    with pytest.raises(converter.ConversionCancelled):
+        with scheduler.slot(1, cancelled=lambda: True):
+            pass
+    release.set()
+    holder.join(5)
+    assert scheduler.stats()['fast']['waiting'] == 0
+
+def test_single_flight_shares_one_call(converter):
+    flights = converter.SingleFlight()
+    calls = []
+    gate = threading.Event()
+    results = []
+
+    def work():
+        calls.append(1)
+        gate.wait(5)
+        return 'result'
+
+    def request():
+        results.append(flights.run('key', work))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(results) == [('result', False)] + [('result', True)] * 3
+    assert flights.in_flight() == 0
+
+def test_single_flight_shares_errors(converter):
+    flights = converter.SingleFlight()
+    gate = threading.Event()
+    errors = []
+
+    def fail():
+        gate.wait(5)
+        raise converter.ConversionError('broken')
+
+    def request():
+        try:
+            flights.run('key', fail)
+        except converter.ConversionError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert errors == ['broken'] * 3
+
+def test_single_flight_waiter_reruns_after_cancelled_leader(converter):
+    flights = converter.SingleFlight()
+    leader_running = threading.Event()
+    gate = threading.Event()
+    outcome = {}
+
+    def cancelled_work():
+        leader_running.set()
+        gate.wait(5)
+        raise converter.ConversionCancelled('Conversion cancelled')
+
+    def lead():
+        try:
+            flights.run('key', cancelled_work)
+        except converter.ConversionCancelled:
+            outcome['leader'] = 'cancelled'
+
+    def follow():
+        outcome['waiter'] = flights.run('key', lambda: 'own result')
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    assert leader_running.wait(5)
+    waiter = threading.Thread(target=follow)
+    waiter.start()
+    time.sleep(0.1)
+    gate.set()
+    leader.join(5)
+    waiter.join(5)
+    assert outcome == {'leader': 'cancelled', 'waiter': ('own result', False)}
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import uuid
+
+def create(client, data, **extra):
+    body = {'filename': 'doc.pdf', 'size': len(data), **extra}
+    return client.post('/api/uploads', json=body)
+
+def put(client, upload_id, offset, chunk):
+    return client.put(f'/api/uploads/{upload_id}', data=chunk, headers={'Upload-Offset': str(offset)})
+
+def test_chunked_upload_resumes_and_converts(client, make_pdf):
+    data = make_pdf(pages=4).read_bytes()
+    response = create(client, data)
+    assert response.status_code == 201
+    upload_id = response.json['upload_id']
+    half = len(data) // 2
+
+    assert put(client, upload_id, 0, data[:half]).headers['Upload-Offset'] == str(half)
+    # A chunk re-sent after a lost response only adds the missing bytes
+    response = put(client, upload_id, half - 10, data[half - 10:half + 100])
+    assert response.headers['Upload-Offset'] == str(half + 100)
+    # A gap is refused with the offset to resume from
+    response = put(client, upload_id, half + 200, data[half + 200:])
+    assert response.status_code == 409
+    assert response.headers['Upload-Offset'] == str(half + 100)
+    assert put(client, upload_id, half + 100, data[half + 100:]).status_code == 200
+    assert client.head(f'/api/uploads/{upload_id}').headers['Upload-Offset'] == str(len(data))
+
+    response = client.post(f'/api/uploads/{upload_id}/complete',
+                           json={'sha256': hashlib.sha256(data).hexdigest()})
+    assert response.json['status'] == 'complete'
+
+    response = client.post('/api/convert/pdf-extract', data={'upload_id': upload_id, 'pages': '2-3'})
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF-')
+
+def test_chunk_past_declared_size_refused(client):
+    upload_id = create(client, b'x' * 10, filename='doc.pdf').json['upload_id']
+    assert put(client, upload_id, 0, b'x' * 11).status_code == 400
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 0
+
+def test_checksum_mismatch_restarts_upload(client):
+    data = os.urandom(1000)
+    upload_id = create(client, data).json['upload_id']
+    put(client, upload_id, 0, data)
+    response = client.post(f'/api/uploads/{upload_id}/complete', json={'sha256': '0' * 64})
+    assert response.status_code == 422
+    assert response.json['sha256'] == hashlib.sha256(data).hexdigest()
+    assert client.get(f'/api/uploads/{upload_id}').json['offset'] == 0
+
+def test_incomplete_upload_cannot_be_completed_or_converted(client):
+    data = os.urandom(1000)
+    upload_id = create(client, data).json['upload_id']
+    put(client, upload_id, 0, data[:500])
+    assert client.post(f'/api/uploads/{upload_id}/complete').status_code == 409
+    response = client.post('/api/convert/pdf-extract', data={'upload_id': upload_id, 'pages': '1'})
+    assert response.status_code == 409
+
+def test_known_content_needs_no_transfer(client):
+    data = os.urandom(2048)
+    digest = hashlib.sha256(data).hexdigest()
+    first = create(client, data, sha256=digest).json['upload_id']
+    put(client, first, 0, data)
+    client.post(f'/api/uploads/{first}/complete')
+    response = create(client, data, sha256=digest)
+    assert response.json['status'] == 'complete'
+    assert response.headers['Upload-Offset'] == str(len(data))
+
+def test_create_validates_request(client):
+    assert client.post('/api/uploads', json={'filename': 'x.exe', 'size': 10}).status_code == 400
+    assert client.post('/api/uploads', json={'filename': 'x.pdf', 'size': 0}).status_code == 400
+    assert client.post('/api/uploads', json={'filename': 'x.pdf', 'size': 10, 'sha256': 'abc'}).status_code == 400
+    assert client.get('/api/uploads/not-an-id').status_code == 404
+
+def convert_with_job_id(client, pdf, **form):
+    job_id = uuid.uuid4().hex
+    with open(pdf, 'rb') as f:
+        response = client.post('/api/convert/pdf-split', headers={'X-Job-Id': job_id},
+                               data={'file': (f, 'doc.pdf'), **form})
+    return job_id, response
+
+def test_result_download_supports_range_and_etag(client, make_pdf):
+    job_id, response = convert_with_job_id(client, make_pdf(pages=3))
+    assert response.status_code == 200
+    assert response.headers['X-Job-Id'] == job_id
+    full = response.data
+    etag = response.headers['ETag']
+
+    response = client.get(f'/api/jobs/{job_id}/result', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(full)}'
+    assert response.data == full[10:20]
+
+    response = client.get(f'/api/jobs/{job_id}/result', headers={'Range': 'bytes=-5'})
+    assert response.data == full[-5:]
+
+    response = client.get(f'/api/jobs/{job_id}/result', headers={'Range': f'bytes={len(full) + 10}-'})
+    assert response.status_code == 416
+
+    response = client.get(f'/api/jobs/{job_id}/result', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_identical_conversion_answers_not_modified(client, make_pdf):
+    pdf = make_pdf(pages=2)
+    _, response = convert_with_job_id(client, pdf)
+    etag = response.headers['ETag']
+    with open(pdf, 'rb') as f:
+        response = client.post('/api/convert/pdf-split', headers={'If-None-Match': etag},
+                               data={'file': (f, 'doc.pdf')})
+    assert response.status_code == 304
+
+def test_job_id_is_never_reused(client, make_pdf):
+    pdf = make_pdf(pages=2)
+    job_id, response = convert_with_job_id(client, pdf)
+    assert response.status_code == 200
+    with open(pdf, 'rb') as f:
+        response = client.post('/api/convert/pdf-extract', headers={'X-Job-Id': job_id},
+                               data={'file': (f, 'doc.pdf'), 'pages': '1'})
+    assert response.status_code == 409
+    result = client.get(f'/api/jobs/{job_id}/result')
+    assert result.headers['Content-Type'] == 'application/zip'
+
+def test_short_job_id_refused(client, make_pdf):
+    with open(make_pdf(), 'rb') as f:
+        response = client.post('/api/convert/pdf-split', headers={'X-Job-Id': 'myjob1'},
+                               data={'file': (f, 'doc.pdf')})
+    assert response.status_code == 400